@@ -0,0 +1,34 @@
+"""
+Microbenchmark for the per-value cost of unpacking and packing atomic values, compares the ``Unpack``/``Pack``
+lambdas (a case-insensitive ``EnumMap`` lookup, slicing the buffer and an ``unpack`` call with the format
+parsed from its cache) to the precompiled ``CODECS`` (a dict lookup and a ``Struct.unpack_from`` at an offset).
+
+usage: python -m benchmarks.codecs
+"""
+
+import timeit
+
+from pycomm3.bytes_ import Pack, Unpack, CODECS
+
+DATATYPES = ('SINT', 'INT', 'DINT', 'LINT', 'REAL')
+NUMBER = 200_000
+
+
+def _ns(stmt, namespace):
+    return min(timeit.repeat(stmt, globals=namespace, number=NUMBER, repeat=3)) / NUMBER * 1e9
+
+
+def main():
+    data = memoryview(bytes(range(16)))
+    print(f'{"type":<6} {"Unpack":>9} {"CODECS":>9} {"Pack":>9} {"CODECS":>9}   (ns / value)')
+    for datatype in DATATYPES:
+        namespace = {'Pack': Pack, 'Unpack': Unpack, 'CODECS': CODECS, 'data': data, 'typ': datatype, 'value': 1}
+        unpack_ns = _ns('Unpack[typ](data[4:])', namespace)
+        codec_unpack_ns = _ns('CODECS[typ].unpack_from(data, 4)', namespace)
+        pack_ns = _ns('Pack[typ](value)', namespace)
+        codec_pack_ns = _ns('CODECS[typ].pack(value)', namespace)
+        print(f'{datatype:<6} {unpack_ns:>9.0f} {codec_unpack_ns:>9.0f} {pack_ns:>9.0f} {codec_pack_ns:>9.0f}')
+
+
+if __name__ == '__main__':
+    main()
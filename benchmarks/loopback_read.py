@@ -0,0 +1,73 @@
+"""
+Benchmark for the full read path (building requests, sending, and parsing replies) of the LogixDriver, using the
+in-memory LoopbackTransport so there is no network involved.  Each read is of 400 DINT[8] tags.
+
+usage: python -m benchmarks.loopback_read
+"""
+
+import struct
+import timeit
+
+from pycomm3 import LogixDriver
+from pycomm3.socket_ import LoopbackTransport
+
+from .response_parsing import build_reply
+
+NUM_TAGS = 400
+ELEMENTS = 8
+CONNECTION_ID = b'\x01\x02\x03\x04'
+
+
+def _frame(command, context, data):
+    return command + struct.pack('<HII', len(data), 1, 0) + context + b'\x00\x00\x00\x00' + data
+
+
+def responder(msg):
+    """
+    Replies to register session, forward open/close, and multi-service reads of DINT[8] tags
+    """
+    command, context = msg[:2], msg[12:20]
+    if command == b'\x65\x00':  # register session
+        return _frame(command, context, b'\x01\x00\x00\x00')
+    if command == b'\x66\x00':  # unregister session
+        return None
+    if command == b'\x6f\x00':  # forward open/close
+        service = msg[40]
+        reply = bytes([service | 0x80, 0, 0, 0]) + CONNECTION_ID + b'\x00' * 24
+        return _frame(command, context, b'\x00' * 6 + b'\x02\x00\x00\x00\x00\x00\xb2\x00' +
+                      struct.pack('<H', len(reply)) + reply)
+
+    num_tags = struct.unpack_from('<H', msg, 52)[0]  # service count of the multi-service request
+    reply = bytearray(build_reply(num_tags, ELEMENTS))
+    reply[12:20] = context
+    return bytes(reply)
+
+
+def make_driver(**kwargs):
+    plc = LogixDriver('10.20.30.100', init_info=False, init_tags=False,
+                      transport=lambda: LoopbackTransport(responder), **kwargs)
+    plc.use_instance_ids = False
+    plc._tags = {
+        f'tag{i}': {'tag_name': f'tag{i}', 'instance_id': i, 'tag_type': 'atomic', 'data_type': 'DINT',
+                    'data_type_name': 'DINT', 'dim': 1, 'dimensions': [ELEMENTS, 0, 0]}
+        for i in range(NUM_TAGS)
+    }
+    return plc
+
+
+def main():
+    tags = [f'tag{i}{{{ELEMENTS}}}' for i in range(NUM_TAGS)]
+    with make_driver() as plc:
+        results = plc.read(*tags)
+        assert all(results) and results[0].value == list(range(ELEMENTS))
+
+        number = 50
+        seconds = timeit.timeit(lambda: plc.read(*tags), number=number)
+
+    print(f'tags / read:  {NUM_TAGS}')
+    print(f'time / read:  {seconds / number * 1000:.2f} ms')
+    print(f'time / tag:   {seconds / number / NUM_TAGS * 1_000_000:.1f} us')
+
+
+if __name__ == '__main__':
+    main()
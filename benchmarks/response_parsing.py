@@ -0,0 +1,128 @@
+"""
+Benchmark for parsing read replies, measures the time and the memory allocated to parse a full multi-service reply
+containing 100 DINT[8] tags (~4KB of reply data).  The peak is the most memory held at once during the parse, so
+it includes the temporary copies, the retained blocks and bytes are the ones still held by the parsed response.
+
+To compare against an earlier version of pycomm3, pass a git revision with ``--baseline``, the same benchmark is
+then run on the ``pycomm3`` package of that revision and both results are reported together.
+
+usage: python -m benchmarks.response_parsing [--baseline REVISION]
+"""
+
+import argparse
+import json
+import os
+import struct
+import subprocess
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from pathlib import Path
+
+from pycomm3.packets import MultiServiceResponsePacket
+
+NUM_TAGS = 100
+ELEMENTS = 8
+_TAG_INFO = {'tag_type': 'atomic', 'data_type': 'DINT', 'data_type_name': 'DINT'}
+
+
+def build_reply(num_tags=NUM_TAGS, elements=ELEMENTS):
+    replies = [
+        b'\xcc\x00\x00\x00' + struct.pack('<H', 0xc4) + struct.pack(f'<{elements}i', *range(elements))
+        for _ in range(num_tags)
+    ]
+    offset = 2 + 2 * num_tags
+    offsets = []
+    for reply in replies:
+        offsets.append(struct.pack('<H', offset))
+        offset += len(reply)
+    cip_reply = b'\x8a\x00\x00\x00' + struct.pack('<H', num_tags) + b''.join(offsets) + b''.join(replies)
+    data = b'\x01\x00' + cip_reply  # sequence count
+    cpf = b''.join((b'\x00' * 4, b'\x0a\x00', b'\x02\x00', b'\xa1\x00\x04\x00', b'\x00' * 4,
+                    b'\xb1\x00', struct.pack('<H', len(data)), data))
+    header = b'\x70\x00' + struct.pack('<HII', len(cpf), 1, 0) + b'_pycomm_' + b'\x00' * 4
+    return header + cpf
+
+
+def make_tags(num_tags=NUM_TAGS, elements=ELEMENTS):
+    return [{'tag': f'tag{i}', 'elements': elements, 'tag_info': _TAG_INFO, 'service': 'read', 'request_id': i}
+            for i in range(num_tags)]
+
+
+def parse(reply, tags):
+    return MultiServiceResponsePacket(reply, tags=tags)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark for parsing multi-service read replies')
+    parser.add_argument('--baseline', metavar='REVISION', help='git revision of pycomm3 to compare against')
+    parser.add_argument('--json', action='store_true', help=argparse.SUPPRESS)  # used to run the baseline
+    args = parser.parse_args()
+
+    results = measure()
+    if args.json:
+        print(json.dumps(results))
+        return
+
+    columns = [('current', results)]
+    if args.baseline:
+        columns.insert(0, (args.baseline, measure_revision(args.baseline)))
+
+    print(f'reply size:             {results["reply size"]} bytes')
+    print(f'{"":24}' + ''.join(f'{name:>16}' for name, _ in columns))
+    for label, key, unit in (('peak / parse:', 'peak bytes', 'bytes'),
+                             ('retained / parse:', 'retained blocks', 'blocks'),
+                             ('', 'retained bytes', 'bytes'),
+                             ('time / parse:', 'time us', 'us')):
+        print(f'{label:24}' + ''.join(f'{result[key]:>10} {unit:<5}' for _, result in columns))
+
+
+def measure() -> dict:
+    reply = build_reply()
+    tags = make_tags()
+    response = parse(reply, tags)
+    assert response and len(response.values) == NUM_TAGS
+
+    peak, blocks, size = count_allocations(reply, tags)
+
+    number = 2000
+    seconds = timeit.timeit(lambda: parse(reply, tags), number=number)
+
+    return {'reply size': len(reply), 'peak bytes': peak, 'retained blocks': blocks, 'retained bytes': size,
+            'time us': round(seconds / number * 1_000_000, 1)}
+
+
+def measure_revision(revision) -> dict:
+    """
+    Runs the benchmark on the ``pycomm3`` package from the git ``revision`` in a separate process
+    """
+    root = Path(__file__).resolve().parent.parent
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = subprocess.run(['git', 'archive', revision, 'pycomm3'], cwd=root, check=True,
+                                 stdout=subprocess.PIPE).stdout
+        subprocess.run(['tar', '-x'], cwd=tmp, input=archive, check=True)
+        # the baseline package in the working directory comes before the current one
+        env = {**os.environ, 'PYTHONPATH': str(root)}
+        output = subprocess.run([sys.executable, '-m', 'benchmarks.response_parsing', '--json'], cwd=tmp, env=env,
+                                check=True, stdout=subprocess.PIPE).stdout
+    return json.loads(output)
+
+
+def count_allocations(reply, tags):
+    """
+    Returns the peak memory allocated during a parse, and the number of memory blocks and bytes allocated by the
+    parse that are still held by the parsed response
+    """
+    tracemalloc.start()
+    response = parse(reply, tags)
+    _, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot().filter_traces((tracemalloc.Filter(False, tracemalloc.__file__), ))
+    tracemalloc.stop()
+    del response  # kept alive until the snapshot is taken
+
+    stats = snapshot.statistics('filename')
+    return peak, sum(stat.count for stat in stats), sum(stat.size for stat in stats)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark for decoding and encoding structures (UDTs), measures the time to decode a read reply of 500 elements
+of a ``RECIPE_STEP`` structure with bit-aliased BOOLs, atomic arrays, a STRING and a nested TIMER and the time to
+encode the decoded value back for a write.
+
+usage: python -m benchmarks.udt_codec
+"""
+
+import struct
+import timeit
+
+from pycomm3.clx import writable_value
+from pycomm3.packets import parse_read_reply
+from pycomm3.util import StructType
+
+ELEMENTS = 500
+
+
+def _member(data_type, offset, array=0, bit=None):
+    member = {'offset': offset, 'tag_type': 'atomic', 'data_type': data_type, 'data_type_name': data_type}
+    if isinstance(data_type, dict):
+        member.update(tag_type='struct', data_type_name=data_type['name'])
+    if bit is None:
+        member['array'] = array
+    else:
+        member['bit'] = bit
+    return member
+
+
+def _data_type(name, size, handle, members, string=None):
+    # a StructType like the definitions uploaded by the driver, so the compiled codecs are kept with it
+    data_type = StructType({
+        'name': name,
+        'internal_tags': members,
+        'attributes': [member for member in members if not member.startswith(('ZZZZZZZZZZ', '__'))],
+        'template': {'structure_handle': handle, 'structure_size': size, 'member_count': len(members),
+                     'object_definition_size': 0},
+    })
+    if string:
+        data_type['string'] = string
+    return data_type
+
+
+STRING = _data_type('STRING', 88, 0x0fce, {'LEN': _member('DINT', 0), 'DATA': _member('SINT', 4, 82)}, string=82)
+
+TIMER = _data_type('TIMER', 12, 0x0f83, {
+    'CTL': _member('DINT', 0),
+    'PRE': _member('DINT', 4),
+    'ACC': _member('DINT', 8),
+    'EN': _member('BOOL', 3, bit=7),
+    'TT': _member('BOOL', 3, bit=6),
+    'DN': _member('BOOL', 3, bit=5),
+})
+TIMER['attributes'].remove('CTL')
+
+RECIPE_STEP = _data_type('RECIPE_STEP', 136, 0x1234, {
+    'ZZZZZZZZZZRECIPE_ST0': _member('SINT', 0),
+    'Enable': _member('BOOL', 0, bit=0),
+    'Done': _member('BOOL', 0, bit=1),
+    'Id': _member('DINT', 4),
+    'Setpoint': _member('REAL', 8),
+    'Counts': _member('INT', 12, 4),
+    'Flags': _member('DWORD', 20, 1),
+    'Total': _member('LINT', 24),
+    'Name': _member(STRING, 32),
+    'Timer': _member(TIMER, 120),
+    'Status': _member('DWORD', 132),
+})
+
+TAG_INFO = {'tag_type': 'struct', 'data_type': RECIPE_STEP, 'data_type_name': 'RECIPE_STEP'}
+
+
+def pack_step(i):
+    name = f'step {i}'.encode()
+    return b''.join((
+        struct.pack('<B3xifhhhhIq', i % 4, i, i / 2, 1, -2, 3, -4, 0x80000001, i * 1000),
+        struct.pack('<i82s2x', len(name), name),
+        struct.pack('<4xii', 5000, i),
+        struct.pack('<I', 0xFFFF),
+    ))
+
+
+def build_reply(elements=ELEMENTS):
+    return b'\xa0\x02' + struct.pack('<H', RECIPE_STEP['template']['structure_handle']) + \
+           b''.join(pack_step(i) for i in range(elements))
+
+
+def decode(reply, elements=ELEMENTS):
+    return parse_read_reply(reply, TAG_INFO, elements)
+
+
+def encode(value, elements=ELEMENTS):
+    return writable_value({'value': value, 'elements': elements, 'tag_info': TAG_INFO})
+
+
+def main():
+    reply = build_reply()
+    value, data_type = decode(reply)
+    assert len(value) == ELEMENTS and data_type == f'RECIPE_STEP[{ELEMENTS}]'
+    assert encode(value) == reply[4:]
+
+    number = 50
+    decode_seconds = timeit.timeit(lambda: decode(reply), number=number)
+    encode_seconds = timeit.timeit(lambda: encode(value), number=number)
+
+    print(f'reply size:     {len(reply)} bytes')
+    print(f'time / decode:  {decode_seconds / number * 1_000:.2f} ms')
+    print(f'time / encode:  {encode_seconds / number * 1_000:.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
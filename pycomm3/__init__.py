@@ -36,3 +36,6 @@ from .exceptions import PycommError, CommError, DataError, RequestError
 from .cip_base import CIPDriver
 from .clx import LogixDriver
 from .slc import SLCDriver
+from .async_ import AsyncLogixDriver
+from .fleet import FleetPoller, ScanResult
+from .implicit import TagConsumer
@@ -0,0 +1,770 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 Ian Ottoway <ian@ottoway.dev>
+# Copyright (c) 2014 Agostino Ruscito <ruscito@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+__all__ = ['AsyncLogixDriver', 'with_forward_open', ]
+
+import asyncio
+import logging
+from functools import wraps
+from os import urandom
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from .bytes_ import print_bytes_msg
+from .cip_base import _module_info_message, _parse_identity_object, _reconnect_delays
+from .clx import (LogixDriver, ReadWriteReturnType, TagValueType, _PLC_NAME_MESSAGE, _PLC_INFO_MESSAGE,
+                  _GET_PLC_TIME_MESSAGE, _plc_time_reply, _set_plc_time_message, _add_request_error,
+                  _add_request_results, _pipeline_results, _template_struct_ids, _cached_templates,
+                  _templates_changed)
+from .const import MICRO800_PREFIX, SUCCESS, INSUFFICIENT_PACKETS
+from .exceptions import CommError, DataError, RequestError
+from .packets import RequestTypes, RequestPipeline, DataFormatType
+from .socket_ import AsyncSocket
+from .tag import Tag
+
+# asyncio.current_task() was added in 3.7, Task.current_task() was removed in 3.9
+_current_task = getattr(asyncio, 'current_task', None) or asyncio.Task.current_task
+
+
+def with_forward_open(func):
+    """
+    Decorator to ensure a forward open request has been completed with the plc before awaiting the coroutine.
+    If reconnecting is enabled and the connection is lost, the driver is reconnected and the call retried once.
+    Only the outermost decorated call reconnects and retries, calls nested inside it let the error through.
+    The outermost call is tracked per task, so concurrent calls from other tasks still retry on their own.
+    """
+
+    @wraps(func)
+    async def wrapped(self, *args, **kwargs):
+        task = _current_task()
+        if task in self._outer_call_tasks:
+            await _ensure_forward_open(self, func.__name__)
+            return await func(self, *args, **kwargs)
+
+        self._outer_call_tasks.add(task)
+        sock = self._sock
+        try:
+            try:
+                # inside the retry, so a connection dropped by an earlier call (or failed reconnect) is reopened
+                await _ensure_forward_open(self, func.__name__)
+                return await func(self, *args, **kwargs)
+            except CommError as err:
+                if not self._cfg['reconnect attempts']:
+                    raise
+                logger = logging.getLogger('pycomm3.async_.AsyncLogixDriver')
+                logger.warning(f'{func.__name__} failed ({err}), reconnecting and retrying')
+                await self._reconnect(sock)
+                return await func(self, *args, **kwargs)
+        finally:
+            self._outer_call_tasks.discard(task)
+
+    return wrapped
+
+
+async def _ensure_forward_open(plc, func_name):
+    opened = False
+    if not await plc._forward_open():
+        if plc._cfg['extended forward open']:
+            logger = logging.getLogger('pycomm3.async_.AsyncLogixDriver')
+            logger.info('Extended Forward Open failed, attempting standard Forward Open.')
+            plc._cfg['extended forward open'] = False
+            if await plc._forward_open():
+                opened = True
+    else:
+        opened = True
+
+    if not opened:
+        msg = f'Target did not connected. {func_name} will not be executed.'
+        raise DataError(msg)
+
+
+class AsyncLogixDriver(LogixDriver):
+    """
+    An asyncio version of the :class:`LogixDriver`.  All methods that communicate with the PLC are coroutines, allowing
+    a single event loop to drive many connections without needing a thread for each one.  The same driver may also be
+    used by multiple tasks at once, their requests will take turns on the connection.
+
+    Unlike the :class:`LogixDriver`, creating the driver does not connect to the PLC. The connection and any
+    initialization (``init_info``, ``init_tags``, etc) happen when the driver is opened, either with :meth:`.open`
+    or by using it as an async context manager.
+
+    >>> async with AsyncLogixDriver('10.20.30.100') as plc:
+    ...     tag1, tag2 = await plc.read('tag1', 'tag2')
+
+    """
+    __log = logging.getLogger(f'{__module__}.{__qualname__}')
+
+    def __init__(self, path: str, *args, micro800: bool = False,
+                 init_info: bool = True, init_tags: bool = True, init_program_tags: bool = False, **kwargs):
+        """
+        See :meth:`LogixDriver.__init__` for details on the arguments.  The ``connections`` argument is not supported,
+        multiple tasks may read and write concurrently over the same connection instead.  With ``lazy_tags`` the tags
+        are only uploaded when they are read or written, :meth:`.get_tag_info` is not a coroutine so it raises a
+        ``RequestError`` for tags that have not been uploaded yet.
+        """
+        super().__init__(path, *args, micro800=micro800 and not init_info, init_info=False, init_tags=False, **kwargs)
+        self._cfg['connections'] = 1
+        self._transport = kwargs.get('transport') or AsyncSocket
+        self._init_cfg = {
+            'init_info': init_info,
+            'init_tags': init_tags,
+            'init_program_tags': init_program_tags,
+        }
+        self._initialized = False
+        self._lock = None
+        self._outer_call_tasks = set()  # tasks running a with_forward_open call, nested calls do not retry
+
+    def __enter__(self):
+        raise TypeError('AsyncLogixDriver must be used with "async with"')
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        try:
+            await self.close()
+        except CommError:
+            self.__log.exception('Error closing connection.')
+            return False
+        else:
+            if not exc_type:
+                return True
+            else:
+                self.__log.exception('Unhandled Client Error', exc_info=(exc_type, exc_val, exc_tb))
+                return False
+
+    async def _send_request(self, request):
+        """
+        Sends the request packet and returns the response, this is the asyncio equivalent of ``request.send()``.
+        """
+        async with self._connection_lock:
+            return await self._exchange_request(request)
+
+    async def _exchange_request(self, request):
+        """
+        Sends the request packet and returns the response, the caller must be holding the connection lock.
+        If the task is cancelled or fails while a reply is outstanding, the connection is dropped so that reply
+        is not received as the reply to the next request.
+        """
+        if self._sock is None:
+            raise CommError('Not connected')
+
+        exchange = request._exchange()
+        outstanding = False
+        try:
+            message = next(exchange)
+            while True:
+                if request.VERBOSE_DEBUG:
+                    self.__log.debug(print_bytes_msg(message, '>>> SEND >>>'))
+                outstanding = request._reply_expected
+                await self._sock.send(message)
+                reply = await self._sock.receive() if request._reply_expected else b''
+                outstanding = False
+                if request.VERBOSE_DEBUG:
+                    self.__log.debug(print_bytes_msg(reply, '<<< RECEIVE <<<'))
+                message = exchange.send(reply)
+        except StopIteration as stop:
+            return stop.value
+        except BaseException:
+            if outstanding:
+                await self._reset_connection()
+            raise
+
+    @property
+    def _connection_lock(self):
+        # created on first use so it belongs to the running event loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    @classmethod
+    async def list_identity(cls, path) -> Optional[str]:
+        """
+        Uses the ListIdentity service to identify the target
+
+        :return: device identity if reply contains valid response else None
+        """
+        plc = cls(path, init_tags=False, init_info=False)
+        await plc.open()
+        identity = await plc._list_identity()
+        await plc.close()
+        return identity
+
+    async def _list_identity(self):
+        response = await self._send_request(RequestTypes.list_identity(self))
+        return response.identity
+
+    async def get_module_info(self, slot):
+        """
+        Gets the identity of the module in the ``slot`` of the local chassis
+        """
+        try:
+            response = await self.generic_message(**_module_info_message(slot))
+
+            if response:
+                return _parse_identity_object(response.value)
+            else:
+                raise DataError(f'generic_message did not return valid data - {response.error}')
+
+        except Exception as err:
+            raise DataError('error getting module info') from err
+
+    async def open(self):
+        """
+        Creates a new Ethernet/IP connection to target device and registers a CIP session.  The first time the
+        driver is opened it will also do the initialization configured when creating the driver.
+
+        :return: True if successful, False otherwise
+        """
+        if self._connection_opened:
+            return
+        try:
+            if self._sock is None:
+                self._sock = self._transport()
+            await self._sock.connect(self._cfg['ip address'], self._cfg['port'])
+            self._connection_opened = True
+            self._cfg['cid'] = urandom(4)
+            self._cfg['vsn'] = urandom(4)
+            if await self._register_session() is None:
+                self.__log.warning("Session not registered")
+                return False
+        except Exception as err:
+            raise CommError('failed to open a connection') from err
+
+        if not self._initialized:
+            await self._initialize()
+            self._initialized = True
+
+        return True
+
+    async def _initialize(self):
+        if self._init_cfg['init_info']:
+            target_identity = await self._list_identity()
+            self._micro800 = target_identity.get('product_name', '').startswith(MICRO800_PREFIX)
+            await self.get_plc_info()
+
+            self._init_instance_ids()
+            if not self._micro800:
+                await self.get_plc_name()
+
+            self._init_micro800_path()
+
+        if self._init_cfg['init_tags']:
+            program = '*' if self._init_cfg['init_program_tags'] else None
+            if not await self._use_tag_cache(program) and not self._cfg['lazy_tags']:
+                await self.get_tag_list(program=program)
+
+    async def _register_session(self) -> Optional[int]:
+        if self._session:
+            return self._session
+
+        self._session = 0
+        response = await self._send_request(self._register_session_request())
+        return self._register_session_reply(response)
+
+    async def _forward_open(self):
+        if self._target_is_connected:
+            return True
+
+        if self._session == 0:
+            raise CommError("A Session Not Registered Before forward_open.")
+
+        response = await self.generic_message(**self._forward_open_message())
+        return self._forward_open_reply(response)
+
+    async def close(self):
+        """
+        Closes the current connection and un-registers the session.
+        """
+        errs = []
+        try:
+            if self._target_is_connected:
+                await self._forward_close()
+            if self._session != 0:
+                await self._un_register_session()
+        except Exception as err:
+            errs.append(err)
+            self.__log.warning(f"Error on close() -> session Err: {err}")
+
+        try:
+            if self._sock:
+                await self._sock.close()
+        except Exception as err:
+            errs.append(err)
+            self.__log.warning(f"close() -> _sock.close Err: {err}")
+
+        self._sock = None
+        self._target_is_connected = False
+        self._session = 0
+        self._connection_opened = False
+
+        if errs:
+            raise CommError(' - '.join(str(e) for e in errs))
+
+    async def _reconnect(self, lost_sock):
+        """
+        Drops the lost connection and then reopens it, retrying with an increasing delay between each attempt.
+        The connection lock is held the whole time, so other tasks wait for the reconnect instead of failing.
+        If another task has already reconnected, the new connection is used as is.
+
+        :raises CommError: if all the attempts to reconnect fail
+        """
+        async with self._connection_lock:
+            if self._sock is not lost_sock and self._target_is_connected:
+                return
+
+            for attempt, delay in enumerate(_reconnect_delays(self._cfg['reconnect attempts'],
+                                                              self._cfg['reconnect delay']), start=1):
+                await asyncio.sleep(delay)
+                await self._reset_connection()
+                try:
+                    if await self._reopen():
+                        self.__log.info(f'Reconnected after {attempt} attempt(s)')
+                        return
+                except (CommError, DataError) as err:
+                    self.__log.warning(f'Reconnect attempt {attempt} failed: {err}')
+
+            await self._reset_connection()
+            raise CommError(f'Failed to reconnect after {self._cfg["reconnect attempts"]} attempt(s)')
+
+    async def _reopen(self) -> bool:
+        """
+        Opens the socket, registers the session, and does the Forward Open while holding the connection lock
+
+        :return: True if successful, False otherwise
+        """
+        try:
+            self._sock = self._transport()
+            await self._sock.connect(self._cfg['ip address'], self._cfg['port'])
+        except Exception as err:
+            raise CommError('failed to open a connection') from err
+
+        self._connection_opened = True
+        self._cfg['cid'] = urandom(4)
+        self._cfg['vsn'] = urandom(4)
+        response = await self._exchange_request(self._register_session_request())
+        if self._register_session_reply(response) is None:
+            return False
+
+        for extended in ((True, False) if self._cfg['extended forward open'] else (False, )):
+            self._cfg['extended forward open'] = extended
+            message = self._forward_open_message()
+            name = message.pop('name')
+            response = await self._exchange_request(self._generic_message_request(**message))
+            if self._forward_open_reply(Tag(name, response.value, None, error=response.error)):
+                return True
+
+        return False
+
+    async def _reset_connection(self):
+        try:
+            if self._sock:
+                await self._sock.close()
+        except Exception as err:
+            self.__log.debug(f'Error closing lost connection: {err}')
+
+        self._sock = None
+        self._target_is_connected = False
+        self._session = 0
+        self._connection_opened = False
+
+    async def _un_register_session(self):
+        await self._send_request(RequestTypes.unregister_session(self))
+        self._session = None
+        self.__log.info('Session Unregistered')
+
+    async def _forward_close(self):
+        if self._session == 0:
+            raise CommError("A session need to be registered before to call forward_close.")
+
+        response = await self.generic_message(**self._forward_close_message())
+        return self._forward_close_reply(response)
+
+    async def generic_message(self,
+                              service,
+                              class_code,
+                              instance,
+                              attribute=b'',
+                              request_data: bytes = b'',
+                              data_format: Optional[DataFormatType] = None,
+                              name: str = 'generic',
+                              connected: bool = True,
+                              unconnected_send: bool = False,
+                              route_path=True) -> Tag:
+        """
+        Perform a generic CIP message, see :meth:`CIPDriver.generic_message` for details on the arguments.
+        """
+        send_message = (with_forward_open(AsyncLogixDriver._send_generic_message) if connected
+                        else AsyncLogixDriver._send_generic_message)
+        return await send_message(self, name, service, class_code, instance, attribute, request_data, data_format,
+                                  connected, unconnected_send, route_path)
+
+    async def _send_generic_message(self, name, *args) -> Tag:
+        response = await self._send_request(self._generic_message_request(*args))
+        return Tag(name, response.value, None, error=response.error)
+
+    @with_forward_open
+    async def get_plc_name(self) -> str:
+        """
+        Requests the name of the program running in the PLC, see :meth:`LogixDriver.get_plc_name`
+        """
+        try:
+            response = await self.generic_message(**_PLC_NAME_MESSAGE)
+            return self._plc_name_reply(response)
+        except CommError:
+            raise
+        except Exception as err:
+            raise DataError('failed to get the plc name') from err
+
+    async def get_plc_info(self) -> dict:
+        """
+        Reads basic information from the controller, see :meth:`LogixDriver.get_plc_info`
+        """
+        try:
+            response = await self.generic_message(**_PLC_INFO_MESSAGE, unconnected_send=not self._micro800)
+            return self._plc_info_reply(response)
+        except CommError:
+            raise
+        except Exception as err:
+            raise DataError('Failed to get PLC info') from err
+
+    async def get_plc_time(self, fmt: str = '%A, %B %d, %Y %I:%M:%S%p') -> Tag:
+        """
+        Gets the current time of the PLC system clock, see :meth:`LogixDriver.get_plc_time`
+        """
+        tag = await self.generic_message(**_GET_PLC_TIME_MESSAGE)
+        return _plc_time_reply(tag, fmt)
+
+    async def set_plc_time(self, microseconds: Optional[int] = None) -> Tag:
+        """
+        Set the time of the PLC system clock, see :meth:`LogixDriver.set_plc_time`
+        """
+        return await self.generic_message(**_set_plc_time_message(microseconds))
+
+    @with_forward_open
+    async def get_tag_list(self, program: str = None, cache: bool = True) -> List[dict]:
+        """
+        Reads the tag list from the controller and the definition for each tag, see :meth:`LogixDriver.get_tag_list`
+        """
+        self._start_tag_list(program)
+
+        if program == '*':
+            tags = await self._get_tag_list()
+            for prog in self._info['programs']:
+                tags += await self._get_tag_list(prog)
+        else:
+            tags = await self._get_tag_list(program)
+
+        return self._finish_tag_list(tags, cache, program)
+
+    async def iter_tag_list(self, program: str = None) -> AsyncIterator[dict]:
+        """
+        Reads the tag list from the controller yielding each tag definition as soon as it is finished,
+        see :meth:`LogixDriver.iter_tag_list`
+        """
+        await _ensure_forward_open(self, 'iter_tag_list')
+        self._start_tag_list(program)
+        try:
+            if program == '*':
+                async for tag in self._iter_tags():
+                    yield tag
+                for prog in list(self._info['programs']):
+                    async for tag in self._iter_tags(prog):
+                        yield tag
+            else:
+                async for tag in self._iter_tags(program):
+                    yield tag
+        finally:
+            self._cache = None
+
+    @with_forward_open
+    async def refresh_tag_list(self, program: str = None) -> Dict[str, List[str]]:
+        """
+        Updates the tag definitions after online edits, see :meth:`LogixDriver.refresh_tag_list`
+        """
+        self._start_tag_list(program)
+        self._cache['id:udt'].update(self._uploaded_data_types())
+
+        if program == '*':
+            tags = await self._list_user_tags()
+            for prog in self._info['programs']:
+                tags += await self._list_user_tags(prog)
+        else:
+            tags = await self._list_user_tags(program)
+
+        updated, changes = self._diff_tag_list(tags, program)
+        await self._resolve_data_types(updated)
+
+        return self._finish_refresh_tag_list(updated, changes, program)
+
+    async def _use_tag_cache(self, program) -> bool:
+        """
+        Loads the tag definitions from the ``tag_cache`` file and checks them against the controller,
+        see :meth:`LogixDriver._use_tag_cache`
+        """
+        if not self._load_tag_cache(program):
+            return False
+        await _ensure_forward_open(self, '_use_tag_cache')
+        if await self._cached_data_types_changed():
+            self.__log.info(f'Data types changed since the tag cache {self._cfg["tag_cache"]!r} was saved, '
+                            f'uploading tags')
+            self._tags, self._data_types = {}, {}
+            return False
+        if self._cfg['lazy_tags']:
+            await self._refresh_cached_tags()
+        else:
+            await self.refresh_tag_list(program)
+        return True
+
+    async def _cached_data_types_changed(self) -> bool:
+        templates = _cached_templates(self._data_types)
+        self._reset_tag_list_cache()
+        try:
+            self._structure_makeup_batch_results(await self._send_requests(self._structure_makeup_batch(templates)))
+            return _templates_changed(templates, self._cache['id:struct'])
+        finally:
+            self._cache = None
+
+    async def _refresh_cached_tags(self):
+        requests = self._symbol_attributes_batch(list(self._tags))
+        self._drop_changed_tags(self._symbol_attributes_results(await self._send_requests(requests)))
+
+    async def _get_tag_list(self, program=None):
+        user_tags = await self._list_user_tags(program)
+        await self._resolve_data_types(user_tags)
+
+        return user_tags
+
+    async def _iter_tags(self, program=None):
+        last_instance = 0
+        while last_instance != -1:
+            user_tags, last_instance = await self._tag_list_page(program, last_instance)
+            for tag in user_tags:
+                yield tag
+
+    @with_forward_open
+    async def _tag_list_page(self, program, last_instance):
+        all_tags, last_instance = await self._instance_attribute_list_page(program, last_instance)
+        user_tags = self._isolate_user_tags(all_tags, program)
+        await self._resolve_data_types(user_tags)
+        return user_tags, last_instance
+
+    async def _resolve_data_types(self, tags):
+        await self._upload_data_types(tag['template_instance_id'] for tag in tags if tag['tag_type'] == 'struct')
+        for tag in tags:
+            if tag['tag_type'] == 'struct':
+                tag['data_type'] = await self._upload_data_type(tag['template_instance_id'])
+                tag['data_type_name'] = tag['data_type']['name']
+
+    async def _list_user_tags(self, program=None):
+        all_tags = await self._get_instance_attribute_list_service(program)
+        return self._isolate_user_tags(all_tags, program)
+
+    async def _get_instance_attribute_list_service(self, program=None):
+        tag_list = []
+        async for tags in self._iter_instance_attribute_list(program):
+            tag_list += tags
+        return tag_list
+
+    async def _iter_instance_attribute_list(self, program=None):
+        last_instance = 0
+        while last_instance != -1:
+            tag_list, last_instance = await self._instance_attribute_list_page(program, last_instance)
+            yield tag_list
+
+    async def _instance_attribute_list_page(self, program, last_instance):
+        try:
+            response = await self._send_request(self._instance_attribute_list_request(program, last_instance))
+            if not response:
+                raise DataError(f"send_unit_data returned not valid data - {response.error}")
+
+            tag_list = []
+            return tag_list, self._parse_instance_attribute_list(response, tag_list)
+
+        except CommError:
+            raise
+        except Exception as err:
+            raise DataError('failed to get attribute list') from err
+
+    async def _upload_tags(self, tag_names):
+        """
+        Uploads the definitions of the tags for the ``lazy_tags`` mode, see :meth:`LogixDriver._upload_tags`
+        """
+        if not tag_names:
+            return
+        self._reset_tag_list_cache()
+        self._cache['id:udt'].update(self._uploaded_data_types())
+        results = await self._send_requests(self._symbol_attributes_batch(tag_names))
+        tags = self._symbol_attributes_results(results)
+        await self._resolve_data_types(tags)
+        self._add_uploaded_tags(tags)
+
+    def _resolve_unknown_tag(self, tag_name):
+        # get_tag_info is not a coroutine, so it cannot upload the tag
+        if self._cfg['lazy_tags'] and tag_name not in self._missing_tags:
+            raise RequestError(f'Tag {tag_name!r} has not been uploaded yet, with lazy_tags the AsyncLogixDriver '
+                               f'only uploads tags when they are read or written')
+
+    async def _upload_data_types(self, instance_ids):
+        """
+        Uploads the data types in batches, see :meth:`LogixDriver._upload_data_types`
+        """
+        pending = self._pending_data_types(instance_ids)
+        while pending:
+            self._structure_makeup_batch_results(await self._send_requests(self._structure_makeup_batch(pending)))
+            requests, large_ids = self._template_batch(pending)
+            nested = self._template_batch_results(await self._send_requests(requests))
+            for instance_id in large_ids:
+                template = self._cache['id:struct'][instance_id]
+                data = await self._read_template(instance_id, template['object_definition_size'])
+                nested += self._add_raw_template(instance_id, template, data)
+            pending = self._pending_data_types(nested)
+
+    async def _get_structure_makeup(self, instance_id):
+        if instance_id not in self._cache['id:struct']:
+            response = await self._send_request(self._structure_makeup_request(instance_id))
+            self._structure_makeup_reply(instance_id, response)
+
+        return self._cache['id:struct'][instance_id]
+
+    async def _read_template(self, instance_id, object_definition_size):
+        offset = 0
+        template_raw = b''
+        try:
+            while True:
+                response = await self._send_request(self._template_request(instance_id, object_definition_size, offset))
+
+                if response.service_status not in (SUCCESS, INSUFFICIENT_PACKETS):
+                    raise DataError('Error reading template', response)
+
+                template_raw += response.data
+
+                if response.service_status == SUCCESS:
+                    break
+
+                offset += len(response.data)
+
+        except CommError:
+            raise
+        except Exception as err:
+            raise DataError('Failed to read template') from err
+        else:
+            return template_raw
+
+    async def _upload_data_type(self, instance_id):
+        """
+        Uploads the data type definition for the template, nested structures are uploaded first
+        so they're already cached when the template is parsed.
+        """
+        if instance_id not in self._cache['id:udt']:
+            try:
+                template = await self._get_structure_makeup(instance_id)
+                if not template.get('error'):
+                    _data = self._cache['id:raw'].pop(instance_id, None)
+                    if _data is None:
+                        _data = await self._read_template(instance_id, template['object_definition_size'])
+                    for struct_id in _template_struct_ids(_data, template['member_count']):
+                        await self._upload_data_type(struct_id)
+                    self._add_data_type(instance_id, template, _data)
+            except CommError:
+                raise
+            except Exception as err:
+                raise DataError('Failed to get data type information') from err
+
+        return self._cache['id:udt'][instance_id]
+
+    def _get_data_type(self, instance_id):
+        # nested data types are already uploaded by _upload_data_type before parsing the template
+        try:
+            return self._cache['id:udt'][instance_id]
+        except KeyError as err:
+            raise DataError(f'Data type for template instance {instance_id} has not been uploaded') from err
+
+    @with_forward_open
+    async def read(self, *tags: str, as_numpy: bool = False, lazy_structs: bool = False) -> ReadWriteReturnType:
+        """
+        Read the value of tag(s), see :meth:`LogixDriver.read` for details.
+
+        :param tags: one or many tags to read
+        :param as_numpy: return arrays as ``numpy.ndarray`` views, requires NumPy
+        :param lazy_structs: return structures as views that decode attributes when accessed
+        :return: a single or list of ``Tag`` objects
+        """
+        await self._upload_tags(self._unknown_tags(tags))
+        parsed_requests = self._parse_requested_tags(tags)
+        requests = self._read_build_requests(parsed_requests, as_numpy, lazy_structs)
+        read_results = await self._send_requests(requests)
+
+        return self._read_results(tags, parsed_requests, read_results)
+
+    @with_forward_open
+    async def write(self, *tags_values: Tuple[str, TagValueType]) -> ReadWriteReturnType:
+        """
+        Write to tag(s), see :meth:`LogixDriver.write` for details.
+
+        :param tags_values: one or many 2-element tuples (tag name, value)
+        :return: a single or list of ``Tag`` objects.
+        """
+        await self._upload_tags(self._unknown_tags(tag for tag, _ in tags_values))
+        parsed_requests = self._parse_requested_writes(tags_values)
+        requests, bit_writes = self._write_build_requests(parsed_requests)
+        write_results = await self._send_requests(requests)
+
+        return self._write_results(tags_values, parsed_requests, write_results, bit_writes)
+
+    async def _send_requests(self, requests):
+        if self._cfg['pipeline'] > 1:
+            return await self._send_requests_pipelined(requests)
+
+        results = {}
+
+        for request in requests:
+            try:
+                response = await self._send_request(request)
+            except (RequestError, DataError) as err:
+                self.__log.exception('Error sending request')
+                _add_request_error(results, request, err)
+            else:
+                _add_request_results(results, request, response)
+        return results
+
+    async def _send_requests_pipelined(self, requests):
+        pipeline = RequestPipeline(requests, self._cfg['pipeline'], self._pipeline_contexts)
+        async with self._connection_lock:
+            if self._sock is None:
+                raise CommError('Not connected')
+            try:
+                messages = pipeline.fill()
+                while True:
+                    for request, message in messages:
+                        await self._sock.send(message)
+                    if not pipeline.in_flight:
+                        break
+                    messages = pipeline.reply(await self._sock.receive())
+            finally:
+                if pipeline.in_flight:
+                    # the replies still in flight would be received as the replies to the next requests
+                    await self._reset_connection()
+
+        return _pipeline_results(pipeline)
@@ -22,11 +22,16 @@
 # SOFTWARE.
 #
 
-from typing import Callable
-from struct import pack, unpack
+from typing import Callable, Optional
+from struct import Struct, pack, unpack, unpack_from
 from .map import EnumMap
 from itertools import chain
 
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, only needed for reading arrays as ndarrays
+    np = None
+
 
 def _pack_epath(path, pad_len=False):
     if len(path) % 2:
@@ -44,16 +49,20 @@ def _pack_char(char):
     return Pack.sint(unsigned - 256 if unsigned > 127 else unsigned)
 
 
+def _encode_string(string):
+    return string.encode('iso-8859-1')  # strings are 1 byte per character, the same as packing each with Pack.char
+
+
 def _logix_string_encode(string):
-    return Pack.udint(len(string)) + b''.join([_pack_char(x) for x in string])
+    return Pack.udint(len(string)) + _encode_string(string)
 
 
 def _string_encode(string):
-    return Pack.uint(len(string)) + b''.join([_pack_char(x) for x in string])
+    return Pack.uint(len(string)) + _encode_string(string)
 
 
 def _short_string_encode(string):
-    return Pack.usint(len(string)) + b''.join([_pack_char(x) for x in string])
+    return Pack.usint(len(string)) + _encode_string(string)
 
 
 def _logix_string_decode(str_data):
@@ -72,9 +81,7 @@ def _short_string_decode(str_data):
 
 
 def _decode_string(str_bytes):
-    return ''.join(
-        chr(v + 256) if v < 0 else chr(v) for v in str_bytes
-    )
+    return bytes(str_bytes).decode('iso-8859-1')
 
 
 def _decode_pccc_ascii(data):
@@ -90,8 +97,10 @@ def _decode_pccc_string(str_bytes):
 
 def _encode_pccc_string(string):
     str_len = Pack.uint(len(string))
-    str_data = str_len + b''.join(_pack_char(x) for x in _slc_string_swap(string))
-    return str_data
+    str_data = _encode_string(string)
+    if len(str_data) % 2:
+        str_data += b'\x00'  # odd length strings are padded to a whole word
+    return str_len + _slc_string_swap(str_data)
 
 
 def _encode_pccc_ascii(string):
@@ -101,16 +110,18 @@ def _encode_pccc_ascii(string):
     elif _len < 2:
         string += ' ' * (2 - _len)
 
-    return b''.join(_pack_char(x) for x in _slc_string_swap(string))
+    return _slc_string_swap(_encode_string(string))
 
 
-def _slc_string_swap(data):
-    return [
-        x for x in
-        chain.from_iterable(
-                (x2, x1) for x1, x2 in (data[i:i + 2] for i in range(0, len(data), 2))
-            )
-    ]
+def _slc_string_swap(data) -> bytes:
+    """
+    Swaps the bytes of each word, any odd byte at the end is dropped
+    """
+    data = bytes(data[:len(data) - len(data) % 2])
+    swapped = bytearray(len(data))
+    swapped[0::2] = data[1::2]
+    swapped[1::2] = data[0::2]
+    return bytes(swapped)
 
 
 class Pack(EnumMap):
@@ -187,6 +198,151 @@ class Unpack(EnumMap):
     pccc_l: Callable[[bytes], int] = dint
 
 
+class Codec:
+    """
+    Packs and unpacks the values of an atomic data type with a precompiled ``struct.Struct``.  Unlike ``Pack`` and
+    ``Unpack``, values are unpacked from and packed into a buffer at an offset, so the buffer is not sliced first.
+    """
+    __slots__ = ('name', 'code', 'format', 'size', '_struct')
+
+    def __init__(self, name: str, code: int, fmt: str):
+        self.name = name
+        self.code = code
+        self.format = fmt
+        self._struct = Struct(f'<{fmt}')
+        self.size = self._struct.size
+
+    def unpack_from(self, buffer, offset: int = 0):
+        return self._struct.unpack_from(buffer, offset)[0]
+
+    def unpack_array(self, buffer, offset: int = 0, count: Optional[int] = None) -> list:
+        """
+        Unpacks ``count`` values, or all the whole values in the buffer after ``offset``, in a single call
+        """
+        if count is None:
+            count = (len(buffer) - offset) // self.size
+        return list(unpack_from(f'<{count}{self.format}', buffer, offset))
+
+    def pack(self, value) -> bytes:
+        return self._struct.pack(value)
+
+    def pack_into(self, buffer, offset: int, value):
+        self._struct.pack_into(buffer, offset, value)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.name!r}, {self.code:#04x}, {self.format!r})'
+
+
+class _BoolCodec(Codec):
+    """
+    BOOLs are packed as 0xFF for True, the same as ``Pack.bool``
+    """
+    __slots__ = ()
+
+    def pack(self, value) -> bytes:
+        return b'\xFF' if value else b'\x00'
+
+    def pack_into(self, buffer, offset: int, value):
+        buffer[offset] = 0xFF if value else 0x00
+
+
+def _build_codecs() -> dict:
+    codecs = {}
+    for codec in (
+        _BoolCodec('BOOL', 0xc1, '?'),
+        Codec('SINT', 0xc2, 'b'),
+        Codec('INT', 0xc3, 'h'),
+        Codec('DINT', 0xc4, 'i'),
+        Codec('LINT', 0xc5, 'q'),
+        Codec('USINT', 0xc6, 'B'),
+        Codec('UINT', 0xc7, 'H'),
+        Codec('UDINT', 0xc8, 'I'),
+        Codec('ULINT', 0xc9, 'Q'),
+        Codec('REAL', 0xca, 'f'),
+        Codec('BYTE', 0xd1, 'b'),
+        Codec('WORD', 0xd2, 'H'),
+        Codec('DWORD', 0xd3, 'I'),
+        Codec('LWORD', 0xd4, 'Q'),
+    ):
+        codecs[codec.name] = codecs[codec.code] = codec
+
+    # numeric data files of SLC/MicroLogix PLCs, T/C/R elements are decoded from the first word(s) of the element
+    for file_type, name in (('N', 'INT'), ('B', 'INT'), ('T', 'INT'), ('C', 'INT'), ('S', 'INT'), ('O', 'INT'),
+                            ('I', 'INT'), ('F', 'REAL'), ('R', 'DINT'), ('L', 'DINT')):
+        codecs[f'PCCC_{file_type}'] = codecs[name]
+
+    return codecs
+
+
+#: ``{name or CIP type code: Codec}`` of the atomic data types, names are in caps like ``DataType``,
+#: PCCC file types are named ``PCCC_<file type>``
+CODECS = _build_codecs()
+
+
+def unpack_ndarray(datatype: str, data):
+    """
+    Decodes an atomic array as a ``numpy.ndarray`` view of ``data`` (so the array is read-only), DWORD arrays
+    are unpacked into an array of BOOLs.  Requires NumPy to be installed.
+    """
+    if np is None:
+        raise ImportError('NumPy is required to decode arrays as ndarrays')
+    codec = CODECS[datatype]
+    count = len(data) // codec.size
+    if datatype == 'DWORD':
+        bits = np.frombuffer(data, np.uint8, count * 4)
+        return np.unpackbits(bits, bitorder='little').view(np.bool_)
+    return np.frombuffer(data, np.dtype(f'<{codec.format}'), count)
+
+
+#: the 8 BOOLs of each byte value, bit 0 first
+_BYTE_BOOLS = tuple(tuple(bool(byte & (1 << bit)) for bit in range(8)) for byte in range(256))
+_BIT_CHARS = bytes.maketrans(b'\x00\x01', b'01')
+_NUMPY_MIN_BOOL_BYTES = 64  # below this unpacking with the table is faster
+
+
+def unpack_bools(data) -> list:
+    """
+    Unpacks a BOOL array (DWORDs) into a list of bools, 8 per byte starting with bit 0 of the first byte.
+    Large arrays are unpacked with NumPy if it is installed.
+    """
+    if np is not None and len(data) >= _NUMPY_MIN_BOOL_BYTES:
+        return np.unpackbits(np.frombuffer(data, np.uint8), bitorder='little').view(np.bool_).tolist()
+    return list(chain.from_iterable(map(_BYTE_BOOLS.__getitem__, data)))
+
+
+def _is_byte_buffer(value) -> bool:
+    """
+    True if ``value`` exposes a buffer of single byte items, ``bytes()`` of any other buffer (e.g. an int64
+    ``numpy.ndarray`` or ``array.array``) copies its raw memory instead of its items.
+    """
+    try:
+        with memoryview(value) as view:
+            return view.itemsize == 1
+    except TypeError:
+        return False
+
+
+def pack_bools(bools) -> bytes:
+    """
+    Packs bools into a BOOL array, the counterpart of :func:`unpack_bools`.  The bools are converted to a binary
+    string so the packing is done by ``int()`` instead of setting each bit.
+    """
+    bits = None
+    if isinstance(bools, (list, tuple)) or _is_byte_buffer(bools):
+        try:
+            bits = bytes(bools)  # fast path for bools (and 0/1), anything else is converted with bool()
+            if bits.translate(None, b'\x00\x01'):
+                bits = None
+        except (TypeError, ValueError):
+            bits = None
+    if bits is None:
+        bits = bytes(map(bool, bools))
+
+    if not bits:
+        return b''
+    return int(bits.translate(_BIT_CHARS)[::-1], 2).to_bytes((len(bits) + 7) // 8, 'little')
+
+
 def print_bytes_msg(msg, info=''):
     out = info
     new_line = True
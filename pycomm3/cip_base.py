@@ -26,44 +26,83 @@ __all__ = ['CIPDriver', 'with_forward_open', 'parse_connection_path', ]
 
 import logging
 import ipaddress
+import time
 from functools import wraps
+from itertools import count
 from os import urandom
-from typing import Union, Optional
+from typing import Union, Optional, Iterator, Iterable, Callable
 
 from .exceptions import DataError, CommError, RequestError
 from .tag import Tag
 from .bytes_ import Pack, Unpack
 from .const import (PATH_SEGMENTS, ConnectionManagerInstance, PRIORITY, ClassCode, TIMEOUT_MULTIPLIER, TIMEOUT_TICKS,
                     TRANSPORT_CLASS, PRODUCT_TYPES, VENDORS, STATES, MSG_ROUTER_PATH,
-                    ConnectionManagerService, Services)
-from .packets import DataFormatType, RequestTypes
-from .socket_ import Socket
+                    ConnectionManagerService, Services, MAX_RECONNECT_DELAY, EncapsulationCommand)
+from .packets import DataFormatType, RequestTypes, ListIdentityResponsePacket
+from .socket_ import Socket, UDPSocket, Transport
 
 
 def with_forward_open(func):
-    """Decorator to ensure a forward open request has been completed with the plc"""
+    """
+    Decorator to ensure a forward open request has been completed with the plc.
+    If reconnecting is enabled and the connection is lost, the driver is reconnected and the call retried once.
+    Only the outermost decorated call reconnects and retries, calls nested inside it let the error through.
+    """
 
     @wraps(func)
     def wrapped(self, *args, **kwargs):
-        opened = False
-        if not self._forward_open():
-            if self._cfg['extended forward open']:
-                logger = logging.getLogger('pycomm3.clx.LogixDriver')
-                logger.info('Extended Forward Open failed, attempting standard Forward Open.')
-                self._cfg['extended forward open'] = False
-                if self._forward_open():
-                    opened = True
-        else:
-            opened = True
+        if self._in_outer_call:
+            _ensure_forward_open(self, func.__name__)
+            return func(self, *args, **kwargs)
 
-        if not opened:
-            msg = f'Target did not connected. {func.__name__} will not be executed.'
-            raise DataError(msg)
-        return func(self, *args, **kwargs)
+        self._in_outer_call = True
+        try:
+            try:
+                # inside the retry, so a connection dropped by an earlier call (or failed reconnect) is reopened
+                _ensure_forward_open(self, func.__name__)
+                return func(self, *args, **kwargs)
+            except CommError as err:
+                if not self._cfg['reconnect attempts']:
+                    raise
+                logger = logging.getLogger('pycomm3.cip_base.CIPDriver')
+                logger.warning(f'{func.__name__} failed ({err}), reconnecting and retrying')
+                self._reconnect()
+                return func(self, *args, **kwargs)
+        finally:
+            self._in_outer_call = False
 
     return wrapped
 
 
+def _ensure_forward_open(plc, func_name):
+    opened = False
+    if not plc._forward_open():
+        if plc._cfg['extended forward open']:
+            logger = logging.getLogger('pycomm3.clx.LogixDriver')
+            logger.info('Extended Forward Open failed, attempting standard Forward Open.')
+            plc._cfg['extended forward open'] = False
+            if plc._forward_open():
+                opened = True
+    else:
+        opened = True
+
+    if not opened:
+        msg = f'Target did not connected. {func_name} will not be executed.'
+        raise DataError(msg)
+
+
+def _reconnect_delays(attempts: int, delay: float) -> Iterator[float]:
+    """
+    Yields the time to wait before each reconnect attempt.  The first attempt is immediate, after that the
+    delay starts at ``delay`` and doubles each time up to ``MAX_RECONNECT_DELAY``.
+    """
+    if attempts > 0:
+        yield 0
+    for _ in range(attempts - 1):
+        yield delay
+        delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+
 class CIPDriver:
     """
     A base CIP driver for the SLCDriver and LogixDriver classes.  Implements common CIP services like
@@ -71,7 +110,8 @@ class CIPDriver:
     """
     __log = logging.getLogger(f'{__module__}.{__qualname__}')
 
-    def __init__(self, path: str, *args, large_packets: bool = True, **kwargs):
+    def __init__(self, path: str, *args, large_packets: bool = True, reconnect_attempts: int = 0,
+                 reconnect_delay: float = 0.5, transport: Optional[Callable[[], Transport]] = None, **kwargs):
         """
         :param path: CIP path to intended target
 
@@ -95,15 +135,34 @@ class CIPDriver:
                 The standard *Forward Open* is limited to 500 bytes.  Not all hardware supports the large packet size,
                 like ENET or ENBT modules or ControlLogix version 19 or lower.  **This argument is no longer required
                 as of 0.5.1, since it will automatically try a standard Forward Open if the extended one fails**
+
+        :param reconnect_attempts: number of times to try reconnecting if the connection is lost, ``0`` (default) disables
+                                   reconnecting and a ``CommError`` is raised instead
+        :param reconnect_delay: seconds to wait after the first failed reconnect attempt, doubled after each failure
+
+            .. note::
+
+                When the connection is lost during a request, the socket, session, and Forward Open are all reopened
+                and the request is retried once.  Everything already uploaded from the target (tags, data types,
+                controller info, etc) is kept, so reconnecting is much faster than creating a new driver.
+                Unconnected messages (``generic_message(connected=False)``, ``get_plc_info`` and ``get_module_info``)
+                are not retried, a lost connection is still raised as an error for those.
+
+        :param transport: class (or any callable) returning a new :class:`~pycomm3.socket_.Transport` for each
+                          connection opened, by default a TCP :class:`~pycomm3.socket_.Socket` is used.
+                          Use a :class:`~pycomm3.socket_.LoopbackTransport` to connect to a Python responder instead.
         """
 
         self._sequence_number = 1
+        self._pipeline_contexts = count()  # sender contexts for pipelined requests, never reused on this driver
+        self._in_outer_call = False  # set while a with_forward_open call is running, nested calls do not retry
         self._sock = None
         self._session = 0
         self._connection_opened = False
         self._target_cid = None
         self._target_is_connected = False
         self._info = {}
+        self._transport = transport or Socket
         ip, _path = parse_connection_path(path)
 
         self._cfg = {
@@ -121,7 +180,9 @@ class CIPDriver:
             'vid': b'\x09\x10',
             'vsn': b'\x09\x10\x19\x71',
             'name': 'LogixDriver',
-            'extended forward open': large_packets}
+            'extended forward open': large_packets,
+            'reconnect attempts': max(reconnect_attempts, 0),
+            'reconnect delay': reconnect_delay}
 
     def __enter__(self):
         self.open()
@@ -185,6 +246,41 @@ class CIPDriver:
         plc.close()
         return identity
 
+    @staticmethod
+    def discover(targets: Union[str, Iterable[str], None] = None, timeout: float = 1.0,
+                 broadcast: bool = False, port: int = 0xAF12) -> Iterator[dict]:
+        """
+        Discovers devices using the ListIdentity service over UDP.  Unlike :meth:`.list_identity`, no connections are
+        made, requests are sent to every target at once and the identity of each device is returned as its reply
+        is received.  Scanning a whole subnet takes about ``timeout`` seconds.
+
+        >>> for device in CIPDriver.discover('10.20.30.0/24'):
+        ...     print(device['ip_address'], device['product_name'])
+
+        :param targets: an IP address or subnet (``10.20.30.0/24``), or a list of them.
+                        If not provided, the request is broadcast to ``255.255.255.255``
+        :param timeout: seconds to wait for replies after the last request is sent
+        :param broadcast: if True, a single request is sent to the broadcast address of each subnet
+                          instead of a request to each address in it
+        :param port: UDP port to send the requests to
+        :return: a generator of identity dicts, same format as :meth:`.list_identity` with the added ``ip_address`` key
+        """
+        addresses = _discovery_addresses(targets, broadcast)
+        request = _list_identity_request()
+        seen = set()
+        sock = UDPSocket()
+        try:
+            for address in addresses:
+                try:
+                    sock.send_to(request, address, port)
+                except CommError as err:
+                    logging.getLogger('pycomm3.cip_base.CIPDriver').debug(f'ListIdentity not sent: {err}')
+                yield from _discovery_replies(sock, seen, 0)
+
+            yield from _discovery_replies(sock, seen, timeout)
+        finally:
+            sock.close()
+
     def _list_identity(self):
         request = RequestTypes.list_identity(self)
         response = request.send()
@@ -192,12 +288,7 @@ class CIPDriver:
 
     def get_module_info(self, slot):
         try:
-            response = self.generic_message(
-                service=Services.get_attributes_all,
-                class_code=ClassCode.identity_object, instance=b'\x01',
-                connected=False, unconnected_send=True,
-                route_path=Pack.epath(Pack.usint(PATH_SEGMENTS['bp']) + Pack.usint(slot), pad_len=True)
-            )
+            response = self.generic_message(**_module_info_message(slot))
 
             if response:
                 return _parse_identity_object(response.value)
@@ -218,7 +309,7 @@ class CIPDriver:
             return
         try:
             if self._sock is None:
-                self._sock = Socket()
+                self._sock = self._transport()
             self._sock.connect(self._cfg['ip address'], self._cfg['port'])
             self._connection_opened = True
             self._cfg['cid'] = urandom(4)
@@ -240,13 +331,18 @@ class CIPDriver:
             return self._session
 
         self._session = 0
+        response = self._register_session_request().send()
+        return self._register_session_reply(response)
+
+    def _register_session_request(self):
         request = RequestTypes.register_session(self)
         request.add(
             self._cfg['protocol version'],
             b'\x00\x00'
         )
+        return request
 
-        response = request.send()
+    def _register_session_reply(self, response) -> Optional[int]:
         if response:
             self._session = response.session
             self.__log.info(f"Session = {response.session} has been registered.")
@@ -268,6 +364,13 @@ class CIPDriver:
         if self._session == 0:
             raise CommError("A Session Not Registered Before forward_open.")
 
+        response = self.generic_message(**self._forward_open_message())
+        return self._forward_open_reply(response)
+
+    def _forward_open_message(self) -> dict:
+        """
+        Builds the arguments for the ``generic_message`` call used to send the *(Extended) Forward Open* request
+        """
         init_net_params = 0b_0100_0010_0000_0000  # CIP Vol 1 - 3-5.5.1.1
 
         if self._cfg['extended forward open']:
@@ -297,16 +400,22 @@ class CIPDriver:
             TRANSPORT_CLASS,
         ]
 
-        response = self.generic_message(
-            service=service,
-            class_code=ClassCode.connection_manager,
-            instance=ConnectionManagerInstance.open_request,
-            request_data=b''.join(forward_open_msg),
-            route_path=route_path,
-            connected=False,
-            name='__FORWARD_OPEN__'
-        )
+        return {
+            'service': service,
+            'class_code': ClassCode.connection_manager,
+            'instance': ConnectionManagerInstance.open_request,
+            'request_data': b''.join(forward_open_msg),
+            'route_path': route_path,
+            'connected': False,
+            'name': '__FORWARD_OPEN__'
+        }
+
+    def _forward_open_reply(self, response: Tag) -> bool:
+        """
+        Updates the connection status from the *Forward Open* reply
 
+        :return: True if the connection was opened, False otherwise
+        """
         if response:
             self._target_cid = response.value[:4]
             self._target_is_connected = True
@@ -345,6 +454,42 @@ class CIPDriver:
         if errs:
             raise CommError(' - '.join(str(e) for e in errs))
 
+    def _reconnect(self):
+        """
+        Drops the current connection and then reopens it, retrying with an increasing delay between each attempt.
+
+        :raises CommError: if all the attempts to reconnect fail
+        """
+        for attempt, delay in enumerate(_reconnect_delays(self._cfg['reconnect attempts'], self._cfg['reconnect delay']),
+                                        start=1):
+            time.sleep(delay)
+            self._reset_connection()
+            try:
+                if self.open():
+                    _ensure_forward_open(self, 'reconnect')
+                    self.__log.info(f'Reconnected after {attempt} attempt(s)')
+                    return
+            except (CommError, DataError) as err:
+                self.__log.warning(f'Reconnect attempt {attempt} failed: {err}')
+
+        self._reset_connection()
+        raise CommError(f'Failed to reconnect after {self._cfg["reconnect attempts"]} attempt(s)')
+
+    def _reset_connection(self):
+        """
+        Discards the current connection without sending any messages to the target, used when the connection is lost.
+        """
+        try:
+            if self._sock:
+                self._sock.close()
+        except Exception as err:
+            self.__log.debug(f'Error closing lost connection: {err}')
+
+        self._sock = None
+        self._target_is_connected = False
+        self._session = 0
+        self._connection_opened = False
+
     def _un_register_session(self):
         """
         Un-registers the current session with the target.
@@ -366,6 +511,13 @@ class CIPDriver:
         if self._session == 0:
             raise CommError("A session need to be registered before to call forward_close.")
 
+        response = self.generic_message(**self._forward_close_message())
+        return self._forward_close_reply(response)
+
+    def _forward_close_message(self) -> dict:
+        """
+        Builds the arguments for the ``generic_message`` call used to send the *Forward Close* request
+        """
         route_path = Pack.epath(self._cfg['cip_path'] + MSG_ROUTER_PATH, pad_len=True)
 
         forward_close_msg = [
@@ -376,15 +528,22 @@ class CIPDriver:
             self._cfg['vsn'],
         ]
 
-        response = self.generic_message(
-            service=ConnectionManagerService.forward_close,
-            class_code=ClassCode.connection_manager,
-            instance=ConnectionManagerInstance.open_request,
-            connected=False,
-            route_path=route_path,
-            request_data=b''.join(forward_close_msg),
-            name='__FORWARD_CLOSE__'
-        )
+        return {
+            'service': ConnectionManagerService.forward_close,
+            'class_code': ClassCode.connection_manager,
+            'instance': ConnectionManagerInstance.open_request,
+            'connected': False,
+            'route_path': route_path,
+            'request_data': b''.join(forward_close_msg),
+            'name': '__FORWARD_CLOSE__'
+        }
+
+    def _forward_close_reply(self, response: Tag) -> bool:
+        """
+        Updates the connection status from the *Forward Close* reply
+
+        :return: True if the connection was closed, False otherwise
+        """
         if response:
             self._target_is_connected = False
             self.__log.info('Forward Close succeeded.')
@@ -424,10 +583,19 @@ class CIPDriver:
                            Or provide a packed EPATH (``bytes``) route to use.
         :return: a Tag with the result of the request. (Tag.value for writes will be the request_data)
         """
+        send_message = with_forward_open(CIPDriver._send_generic_message) if connected else CIPDriver._send_generic_message
+        return send_message(self, name, service, class_code, instance, attribute, request_data, data_format,
+                            connected, unconnected_send, route_path)
 
-        if connected:
-            with_forward_open(lambda _: None)(self)
+    def _send_generic_message(self, name, *args) -> Tag:
+        response = self._generic_message_request(*args).send()
+        return Tag(name, response.value, None, error=response.error)
 
+    def _generic_message_request(self, service, class_code, instance, attribute=b'', request_data=b'',
+                                 data_format=None, connected=True, unconnected_send=False, route_path=True):
+        """
+        Builds the request packet for :meth:`.generic_message`, see it for details on the arguments.
+        """
         _kwargs = {
             'service': service,
             'class_code': class_code,
@@ -449,9 +617,7 @@ class CIPDriver:
         request = req_class(self)
         request.build(**_kwargs)
 
-        response = request.send()
-
-        return Tag(name, response.value, None, error=response.error)
+        return request
 
 
 def parse_connection_path(path):
@@ -505,6 +671,69 @@ def _parse_cip_path_segment(segment: str):
         raise RequestError(f'Failed to parse path segment: {segment}') from err
 
 
+def _module_info_message(slot):
+    return {
+        'service': Services.get_attributes_all,
+        'class_code': ClassCode.identity_object,
+        'instance': b'\x01',
+        'connected': False,
+        'unconnected_send': True,
+        'route_path': Pack.epath(Pack.usint(PATH_SEGMENTS['bp']) + Pack.usint(slot), pad_len=True)
+    }
+
+
+def _list_identity_request() -> bytes:
+    """
+    ListIdentity is an encapsulation command with no data or session, so the request is only the header
+    """
+    return b''.join([
+        EncapsulationCommand.list_identity,
+        b'\x00\x00',  # Length UINT
+        b'\x00\x00\x00\x00',  # Session Handle UDINT
+        b'\x00\x00\x00\x00',  # Status UDINT
+        b'_pycomm_',  # Sender Context 8 bytes
+        b'\x00\x00\x00\x00',  # Option UDINT
+    ])
+
+
+def _discovery_addresses(targets, broadcast):
+    if targets is None:
+        targets = ['255.255.255.255']
+    elif isinstance(targets, str):
+        targets = [targets]
+
+    for target in targets:
+        network = ipaddress.ip_network(target, strict=False)
+        if network.num_addresses == 1:
+            yield str(network.network_address)
+        elif broadcast:
+            yield str(network.broadcast_address)
+        else:
+            yield from (str(host) for host in network.hosts())
+
+
+def _discovery_replies(sock, seen, timeout):
+    """
+    Yields the identity of each reply received within ``timeout`` seconds, the wait is a fixed total from when it
+    starts (it is not extended by the replies received).  Devices that have already replied are skipped.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        received = sock.receive_from(max(deadline - time.monotonic(), 0))
+        if received is None:
+            if time.monotonic() >= deadline:
+                return
+            continue
+
+        data, ip_address = received
+        if ip_address in seen:
+            continue
+        response = ListIdentityResponsePacket(data)
+        if response:
+            seen.add(ip_address)
+            yield {**response.identity, 'ip_address': ip_address}
+
+
 def _parse_identity_object(reply):
     vendor = Unpack.uint(reply[:2])
     product_type = Unpack.uint(reply[2:4])
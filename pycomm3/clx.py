@@ -25,24 +25,27 @@
 __all__ = ['LogixDriver', ]
 
 import datetime
-import itertools
 import logging
+import sys
 import time
-from typing import List, Tuple, Optional, Union, Mapping, Dict
+from array import array
+from struct import Struct, unpack_from
+from typing import List, Tuple, Optional, Union, Mapping, Dict, Iterator
 
 from . import util
 from .exceptions import DataError, CommError, RequestError
 from .tag import Tag
-from .bytes_ import Pack, Unpack
-from .cip_base import CIPDriver, with_forward_open
+from .bytes_ import Pack, Unpack, CODECS, pack_bools, np
+from .cip_base import CIPDriver, with_forward_open, _ensure_forward_open
 from .const import (EXTENDED_SYMBOL, CLASS_TYPE, INSTANCE_TYPE, ClassCode, DataType, PRODUCT_TYPES, VENDORS,
                     MICRO800_PREFIX, MULTISERVICE_READ_OVERHEAD, Services, SUCCESS, ELEMENT_TYPE,
                     INSUFFICIENT_PACKETS, BASE_TAG_BIT, MIN_VER_INSTANCE_IDS, SEC_TO_US, KEYSWITCH,
                     TEMPLATE_MEMBER_INFO_LEN, EXTERNAL_ACCESS, DataTypeSize, MIN_VER_EXTERNAL_ACCESS, )
-from .packets import request_path, encode_segment, RequestTypes
+from .packets import request_path, encode_segment, RequestTypes, RequestPipeline, struct_dtype
+from .tag_cache import load_tag_cache, save_tag_cache
 
 AtomicValueType = Union[int, float, bool, str]
-TagValueType = Union[AtomicValueType, List[AtomicValueType], Dict[str, 'TagValueType']]
+TagValueType = Union[AtomicValueType, List[AtomicValueType], Dict[str, 'TagValueType'], bytes, bytearray, memoryview]
 ReadWriteReturnType = Union[Tag, List[Tag]]
 
 
@@ -53,7 +56,9 @@ class LogixDriver(CIPDriver):
     __log = logging.getLogger(f'{__module__}.{__qualname__}')
 
     def __init__(self, path: str, *args,  micro800: bool = False,
-                 init_info: bool = True, init_tags: bool = True, init_program_tags: bool = False, **kwargs):
+                 init_info: bool = True, init_tags: bool = True, init_program_tags: bool = False,
+                 pipeline: int = 1, connections: int = 1, tag_cache: Optional[str] = None, lazy_tags: bool = False,
+                 **kwargs):
         """
         :param path: CIP path to intended target
 
@@ -80,13 +85,56 @@ class LogixDriver(CIPDriver):
         :param init_tags: if True (default), uploads all controller-scoped tag definitions on connect
         :param init_program_tags: if True, uploads all program-scoped tag definitions on connect
         :param micro800: set to True if connecting to a Micro800 series PLC with ``init_info`` disabled, it will disable unsupported features
+        :param pipeline: number of requests to keep in flight at once when a read or write requires multiple packets,
+                         ``1`` (default) waits for each reply before sending the next request
+
+            .. note::
+
+                Pipelining is most useful on high-latency or routed connections, where the round trip time is
+                much larger than the time the PLC takes to process a request.  Not all devices support multiple
+                outstanding requests, it is disabled by default.
+
+        :param connections: number of connections (Forward Opens) to use when a read or write requires multiple packets,
+                            ``1`` (default) uses only a single connection
+
+            .. note::
+
+                The additional connections are opened the first time they are needed, each uses its own session.
+                Packets are spread across all connections and sent in parallel, the tag definitions are shared
+                by all connections.  Each connection counts towards the connection limit of the controller
+                and communication module.  May be combined with ``pipeline``, which then applies to each connection.
+
+        :param tag_cache: path of a file to save the uploaded tag definitions to, if the file was saved for the same
+                          controller (serial number), firmware revision and program name the definitions are loaded
+                          from it instead of being uploaded from the controller.  The cached data types are checked
+                          against the controller first and the tags refreshed like :meth:`.refresh_tag_list`,
+                          so a project edited online or downloaded again does not use outdated definitions.
+
+            .. note::
+
+                The cache is only used when ``init_info`` is enabled, since the controller info is needed to check
+                the cache is for the same controller and project.  It is saved every time all the controller-scoped
+                (and program-scoped if ``init_program_tags``) tags are uploaded with :meth:`.get_tag_list`.
+                Edits to the project that keep the same program name are not detected, call :meth:`.get_tag_list`
+                to upload the tags again and update the cache.
+
+        :param lazy_tags: if True, tag definitions are not uploaded on connect (unless loaded from the ``tag_cache``),
+                          instead the definition of each tag (and its data type) is uploaded the first time it is used
+
+            .. note::
+
+                Only the tags used are uploaded, so startup is much faster on large controllers when only a few tags
+                are used.  The :attr:`.tags` property only contains the tags used so far.  Tags that were not found
+                are not requested again until the tag list is uploaded (:meth:`.get_tag_list`,
+                :meth:`.refresh_tag_list` or :meth:`.iter_tag_list`).
 
         .. tip::
 
             Initialization of tags is required for the :meth:`.read` and :meth:`.write` to work.  This is because
             they require information about the data type and structure of the tags inside the controller.  If opening
             multiple connections to the same controller, you may disable tag initialization in all but the first connection
-            and set ``plc2._tags = plc1.tags`` to prevent needing to upload the tag definitions multiple times.
+            and set ``plc2._tags = plc1.tags`` to prevent needing to upload the tag definitions multiple times,
+            or use the ``tag_cache`` to upload them only once.
 
         """
 
@@ -94,8 +142,14 @@ class LogixDriver(CIPDriver):
         self._cache = None
         self._data_types = {}
         self._tags = {}
+        self._missing_tags = set()  # tags not found by lazy_tags, cleared when the tag list is uploaded
         self._micro800 = micro800
         self._cfg['use_instance_ids'] = True
+        self._cfg['pipeline'] = max(pipeline, 1)
+        self._cfg['connections'] = max(connections, 1)
+        self._cfg['tag_cache'] = tag_cache
+        self._cfg['lazy_tags'] = lazy_tags
+        self._pool = []
 
         if init_tags or init_info:
             self.open()
@@ -105,17 +159,25 @@ class LogixDriver(CIPDriver):
             self._micro800 = target_identity.get('product_name', '').startswith(MICRO800_PREFIX)
             self.get_plc_info()
 
-            self.use_instance_ids = (self.info.get('version_major', 0) >= MIN_VER_INSTANCE_IDS) and not self._micro800
+            self._init_instance_ids()
             if not self._micro800:
                 self.get_plc_name()
 
+        self._init_micro800_path()
+
+        if init_tags:
+            program = '*' if init_program_tags else None
+            if not self._use_tag_cache(program) and not lazy_tags:
+                self.get_tag_list(program=program)
+
+    def _init_instance_ids(self):
+        self.use_instance_ids = (self.info.get('version_major', 0) >= MIN_VER_INSTANCE_IDS) and not self._micro800
+
+    def _init_micro800_path(self):
         if self._micro800:  # strip off backplane/0 from path, not used for these processors
             _path = Pack.epath(self._cfg['cip_path'][:-2])
             self._cfg['cip_path'] = _path[1:]  # leave out the len, we sometimes add to the path later
 
-        if init_tags:
-            self.get_tag_list(program='*' if init_program_tags else None)
-
     def __enter__(self):
         self.open()
         return self
@@ -137,6 +199,24 @@ class LogixDriver(CIPDriver):
         _ = self._info
         return f"Program Name: {_.get('name')}, Device: {_.get('device_type', 'None')}, Revision: {_.get('revision', 'None')}"
 
+    def close(self):
+        """
+        Closes the current connection, any pooled connections, and un-registers the session.
+        """
+        for conn in self._pool:
+            try:
+                conn.close()
+            except CommError as err:
+                self.__log.warning(f'Error closing pooled connection: {err}')
+        self._pool = []
+        super().close()
+
+    def _reset_connection(self):
+        for conn in self._pool:
+            conn._reset_connection()
+        self._pool = []
+        super()._reset_connection()
+
     @property
     def tags(self) -> dict:
         """
@@ -212,47 +292,40 @@ class LogixDriver(CIPDriver):
         :return:  the controller program name
         """
         try:
-            response = self.generic_message(
-                service=Services.get_attribute_list,
-                class_code=ClassCode.program_name,
-                instance=b'\x01\x00',  # instance 1
-                request_data=b'\x01\x00\x01\x00',  # num attributes, attribute 1 (program name)
-                data_format=((None, 6), ('program_name', 'STRING')),
-            )
-            if response:
-                self._info['name'] = response.value['program_name']
-                return self._info['name']
-            else:
-                raise DataError(f'response did not return valid data - {response.error}')
-
+            response = self.generic_message(**_PLC_NAME_MESSAGE)
+            return self._plc_name_reply(response)
+        except CommError:
+            raise
         except Exception as err:
             raise DataError('failed to get the plc name') from err
 
+    def _plc_name_reply(self, response: Tag) -> str:
+        if response:
+            self._info['name'] = response.value['program_name']
+            return self._info['name']
+        else:
+            raise DataError(f'response did not return valid data - {response.error}')
+
     def get_plc_info(self) -> dict:
         """
         Reads basic information from the controller, returns it and stores it in the ``info`` property.
         """
         try:
-            response = self.generic_message(
-                class_code=ClassCode.identity_object, instance=b'\x01',
-                service=Services.get_attributes_all,
-                data_format=[
-                    ('vendor', 'UINT'), ('product_type', 'UINT'), ('product_code', 'UINT'),
-                    ('version_major', 'SINT'), ('version_minor', 'USINT'), ('_keyswitch', 2),
-                    ('serial', 'UDINT'), ('device_type', 'SHORT_STRING')
-                ],
-                connected=False, unconnected_send=not self._micro800)
-
-            if response:
-                info = _parse_plc_info(response.value)
-                self._info = {**self._info, **info}
-                return info
-            else:
-                raise DataError(f'get_plc_info did not return valid data - {response.error}')
-
+            response = self.generic_message(**_PLC_INFO_MESSAGE, unconnected_send=not self._micro800)
+            return self._plc_info_reply(response)
+        except CommError:
+            raise
         except Exception as err:
             raise DataError('Failed to get PLC info') from err
 
+    def _plc_info_reply(self, response: Tag) -> dict:
+        if response:
+            info = _parse_plc_info(response.value)
+            self._info = {**self._info, **info}
+            return info
+        else:
+            raise DataError(f'get_plc_info did not return valid data - {response.error}')
+
     @with_forward_open
     def get_tag_list(self, program: str = None, cache: bool = True) -> List[dict]:
         """
@@ -274,17 +347,7 @@ class LogixDriver(CIPDriver):
         :return: a list containing dicts for each tag definition collected
         """
 
-        self._cache = {
-            'tag_name:id': {},
-            'id:struct': {},
-            'handle:id': {},
-            'id:udt': {}
-        }
-
-        if program in ('*', None):
-            self._info['programs'] = {}
-            self._info['tasks'] = {}
-            self._info['modules'] = {}
+        self._start_tag_list(program)
 
         if program == '*':
             tags = self._get_tag_list()
@@ -293,22 +356,336 @@ class LogixDriver(CIPDriver):
         else:
             tags = self._get_tag_list(program)
 
+        return self._finish_tag_list(tags, cache, program)
+
+    def iter_tag_list(self, program: str = None) -> Iterator[dict]:
+        """
+        Reads the tag list from the controller like :meth:`.get_tag_list`, but yields each tag definition as soon as
+        it is finished instead of returning them all at the end.  The tags are listed one reply at a time and the data
+        types of the tags in a reply are uploaded before they are yielded, so only one reply worth of tags is kept in
+        memory and the first tags are available without waiting for the whole list.
+
+        .. note::
+
+            The tags are not stored in the :attr:`.tags` property (the data types are still stored
+            in :attr:`.data_types`). Do not call the other tag list methods until the iteration is finished.
+            If the connection is lost and reconnecting is enabled, the reply that failed is requested again
+            after reconnecting, tags already yielded are not repeated.
+
+        :param program: scope to retrieve tag list, None for controller-only tags, ``'*'`` for all tags, else name of program
+        :return: an iterator of dicts for each tag definition, the same as the list returned by :meth:`.get_tag_list`
+        """
+        _ensure_forward_open(self, 'iter_tag_list')
+        self._start_tag_list(program)
+        try:
+            if program == '*':
+                yield from self._iter_tags()
+                for prog in list(self._info['programs']):
+                    yield from self._iter_tags(prog)
+            else:
+                yield from self._iter_tags(program)
+        finally:
+            self._cache = None
+
+    @with_forward_open
+    def refresh_tag_list(self, program: str = None) -> Dict[str, List[str]]:
+        """
+        Updates the tag definitions in the :attr:`.tags` property after online edits, without uploading all of them
+        again.  The tag list is read from the controller and compared to the current definitions, only new tags and
+        tags whose definition changed (type, dimensions, etc) are updated and removed tags are deleted.  Only the
+        data types of the new or changed tags that were not uploaded before are read from the controller.
+
+        .. note::
+
+            Use :meth:`.get_tag_list` to upload all the tags again after downloading a different project.
+
+        :param program: scope of the tags to refresh, None for controller-only tags, ``'*'`` for all tags,
+                        else name of program
+
+        :return: a dict of the names of the tags that were ``'added'``, ``'changed'`` and ``'removed'``
+        """
+        self._start_tag_list(program)
+        self._cache['id:udt'].update(self._uploaded_data_types())
+
+        if program == '*':
+            tags = self._list_user_tags()
+            for prog in self._info['programs']:
+                tags += self._list_user_tags(prog)
+        else:
+            tags = self._list_user_tags(program)
+
+        updated, changes = self._diff_tag_list(tags, program)
+        self._resolve_data_types(updated)
+
+        return self._finish_refresh_tag_list(updated, changes, program)
+
+    def _start_tag_list(self, program):
+        self._reset_tag_list_cache()
+        self._missing_tags.clear()
+
+        if program in ('*', None):
+            self._info['programs'] = {}
+            self._info['tasks'] = {}
+            self._info['modules'] = {}
+
+    def _reset_tag_list_cache(self):
+        self._cache = {
+            'tag_name:id': {},
+            'id:struct': {},
+            'handle:id': {},
+            'id:udt': {},
+            'id:raw': {},  # template data uploaded by _upload_data_types, but not parsed yet
+        }
+
+    def _finish_tag_list(self, tags, cache, program=None):
         if cache:
             self._tags = {tag['tag_name']: tag for tag in tags}
+            if program in ('*', None):
+                self._save_tag_cache(program)
 
         self._cache = None
 
         return tags
 
+    def _upload_tags(self, tag_names):
+        """
+        Uploads the definitions of the tags and their data types for the ``lazy_tags`` mode, the attributes of each
+        symbol are requested by name and batched like the data types.  Tags that do not exist are skipped
+        and remembered, so they are not requested again.  The connection is opened (and retried)
+        by the caller, like :meth:`read` and :meth:`write`.
+        """
+        if not tag_names:
+            return
+        self._reset_tag_list_cache()
+        self._cache['id:udt'].update(self._uploaded_data_types())
+        tags = self._symbol_attributes_results(self._send_requests(self._symbol_attributes_batch(tag_names)))
+        self._resolve_data_types(tags)
+        self._add_uploaded_tags(tags)
+
+    def _unknown_tags(self, tags) -> List[str]:
+        """
+        Returns the names of the base tags of the requested tags that have not been uploaded yet,
+        only when using ``lazy_tags``
+        """
+        if not self._cfg['lazy_tags']:
+            return []
+        names = (_base_tag_name(tag) for tag in tags)
+        return [name for name in dict.fromkeys(names) if name not in self._tags and name not in self._missing_tags]
+
+    def _resolve_unknown_tag(self, tag_name):
+        if self._cfg['lazy_tags'] and tag_name not in self._missing_tags:
+            _ensure_forward_open(self, 'get_tag_info')
+            self._upload_tags([tag_name])
+
+    def _symbol_attributes_batch(self, tag_names):
+        attributes = _SYMBOL_ATTRIBUTES
+        if self.info.get('version_major', 0) >= MIN_VER_EXTERNAL_ACCESS:
+            attributes += (_SYMBOL_EXTERNAL_ACCESS, )
+        request_data = Pack.uint(len(attributes)) + b''.join(Pack.uint(attr) for attr, _ in attributes)
+        reply_size = 2 + sum(4 + size for _, size in attributes)
+        services = []
+        for name in tag_names:
+            path = tag_request_path(name, {}, False)
+            if path is not None:
+                services.append((name, Services.get_attribute_list, path, request_data, reply_size))
+        return self._multi_service_requests(services)
+
+    def _symbol_attributes_results(self, results) -> List[dict]:
+        tags = []
+        for name, result in results.items():
+            if not result:
+                self.__log.debug(f'Failed to upload definition of {name!r} - {result.error}')
+                self._missing_tags.add(name)
+                continue
+            try:
+                tags.append(_create_tag(name, _parse_symbol_attributes(result.value)))
+            except Exception as err:
+                self.__log.warning(f'Failed to parse definition of {name!r} - {err}')
+        return tags
+
+    def _add_uploaded_tags(self, tags):
+        for tag in tags:
+            self._tags[tag['tag_name']] = tag
+        self._cache = None
+
+    def _uploaded_data_types(self) -> dict:
+        """
+        The data types already uploaded by template instance id, so they are not uploaded again
+        """
+        data_types = {tag['template_instance_id']: tag['data_type']
+                      for tag in self._tags.values() if tag['tag_type'] == 'struct'}
+        data_types.update((data_type['template']['instance_id'], data_type)
+                          for data_type in self._data_types.values() if 'instance_id' in data_type['template'])
+        return data_types
+
+    def _diff_tag_list(self, tags, program):
+        """
+        Compares the tags listed by the controller to the current definitions
+
+        :return: the new and changed tags and the dict of changes returned by :meth:`.refresh_tag_list`
+        """
+        changes = {'added': [], 'changed': [], 'removed': []}
+        updated = []
+        for tag in tags:
+            current = self._tags.get(tag['tag_name'])
+            if current is None:
+                changes['added'].append(tag['tag_name'])
+                updated.append(tag)
+            elif _tag_changed(current, tag):
+                changes['changed'].append(tag['tag_name'])
+                updated.append(tag)
+            elif current.get('instance_id') is None:
+                current['instance_id'] = tag['instance_id']  # uploaded by name with lazy_tags
+
+        listed = {tag['tag_name'] for tag in tags}
+        changes['removed'] = [name for name in self._tags
+                              if name not in listed and _in_program_scope(name, program)]
+        return updated, changes
+
+    def _finish_refresh_tag_list(self, updated, changes, program):
+        for tag in updated:
+            self._tags[tag['tag_name']] = tag
+        for name in changes['removed']:
+            del self._tags[name]
+
+        self._cache = None
+
+        if any(changes.values()):
+            self.__log.info(f"Refreshed tag list, {len(changes['added'])} added, {len(changes['changed'])} changed, "
+                            f"{len(changes['removed'])} removed")
+            if program in ('*', None):
+                self._save_tag_cache(program)
+
+        return changes
+
+    def _tag_cache_key(self, program) -> Optional[dict]:
+        if self._cfg['tag_cache'] is None or not self._info.get('serial'):
+            return None
+        return {
+            'serial': self._info['serial'],
+            'revision': self._info.get('revision'),
+            'name': self._info.get('name'),
+            'program_tags': program == '*',
+        }
+
+    def _load_tag_cache(self, program) -> bool:
+        """
+        Loads the tag definitions from the ``tag_cache`` file, returns False if they need to be uploaded instead
+        """
+        key = self._tag_cache_key(program)
+        if key is None:
+            return False
+        try:
+            cache = load_tag_cache(self._cfg['tag_cache'], key)
+        except Exception as err:
+            self.__log.warning(f'Failed to load the tag cache {self._cfg["tag_cache"]!r}: {err}')
+            return False
+        if cache is None:
+            self.__log.info(f'Tag cache {self._cfg["tag_cache"]!r} not found or out of date, uploading tags')
+            return False
+
+        self._tags = cache['tags']
+        self._data_types = cache['data_types']
+        self._info.update(cache['info'])
+        self.__log.info(f'Loaded {len(self._tags)} tag definitions from {self._cfg["tag_cache"]!r}')
+        return True
+
+    def _use_tag_cache(self, program) -> bool:
+        """
+        Loads the tag definitions from the ``tag_cache`` file and checks them against the controller, since the
+        project may have been edited online or downloaded again with the same name.  If the structure makeup of
+        any cached data type changed the cache is discarded, else the tags are refreshed like
+        :meth:`.refresh_tag_list` (with ``lazy_tags`` only the cached tags are checked).
+
+        :return: True if the cached tags are used, False if they need to be uploaded instead
+        """
+        if not self._load_tag_cache(program):
+            return False
+        _ensure_forward_open(self, '_use_tag_cache')
+        if self._cached_data_types_changed():
+            self.__log.info(f'Data types changed since the tag cache {self._cfg["tag_cache"]!r} was saved, '
+                            f'uploading tags')
+            self._tags, self._data_types = {}, {}
+            return False
+        if self._cfg['lazy_tags']:
+            self._refresh_cached_tags()
+        else:
+            self.refresh_tag_list(program)
+        return True
+
+    def _cached_data_types_changed(self) -> bool:
+        """
+        Reads the structure makeup of the cached data types, returns True if any of them changed
+        """
+        templates = _cached_templates(self._data_types)
+        self._reset_tag_list_cache()
+        try:
+            self._structure_makeup_batch_results(self._send_requests(self._structure_makeup_batch(templates)))
+            return _templates_changed(templates, self._cache['id:struct'])
+        finally:
+            self._cache = None
+
+    def _refresh_cached_tags(self):
+        """
+        Checks the definitions of the cached tags for ``lazy_tags``, any that changed or no longer exist are
+        removed so they are uploaded again when used
+        """
+        tags = self._symbol_attributes_results(self._send_requests(self._symbol_attributes_batch(list(self._tags))))
+        self._drop_changed_tags(tags)
+
+    def _drop_changed_tags(self, tags):
+        current = {tag['tag_name']: tag for tag in tags}
+        for name, tag in list(self._tags.items()):
+            if name not in current or _tag_changed(tag, current[name]):
+                del self._tags[name]
+
+    def _save_tag_cache(self, program):
+        key = self._tag_cache_key(program)
+        if key is None:
+            return
+        # program-scoped tags may have been added by a previous upload or lazily, only save the tags in scope
+        tags = {name: tag for name, tag in self._tags.items() if _in_program_scope(name, program)}
+        try:
+            save_tag_cache(self._cfg['tag_cache'], key, tags, self._data_types, self._info)
+        except Exception as err:
+            self.__log.warning(f'Failed to save the tag cache {self._cfg["tag_cache"]!r}: {err}')
+
     def _get_tag_list(self, program=None):
-        all_tags = self._get_instance_attribute_list_service(program)
+        user_tags = self._list_user_tags(program)
+        self._resolve_data_types(user_tags)
+
+        return user_tags
+
+    def _iter_tags(self, program=None):
+        last_instance = 0
+        while last_instance != -1:
+            user_tags, last_instance = self._tag_list_page(program, last_instance)
+            yield from user_tags
+
+    @with_forward_open
+    def _tag_list_page(self, program, last_instance):
+        """
+        Lists the user tags in a single reply starting at ``last_instance`` and uploads their data types,
+        returns the tags and the instance to start the next reply at (``-1`` after the last reply)
+        """
+        all_tags, last_instance = self._instance_attribute_list_page(program, last_instance)
         user_tags = self._isolate_user_tags(all_tags, program)
-        for tag in user_tags:
+        self._resolve_data_types(user_tags)
+        return user_tags, last_instance
+
+    def _resolve_data_types(self, tags):
+        self._upload_data_types(tag['template_instance_id'] for tag in tags if tag['tag_type'] == 'struct')
+        for tag in tags:
             if tag['tag_type'] == 'struct':
                 tag['data_type'] = self._get_data_type(tag['template_instance_id'])
                 tag['data_type_name'] = tag['data_type']['name']
 
-        return user_tags
+    def _list_user_tags(self, program=None):
+        """
+        Lists the user tags in the scope, without uploading their data types
+        """
+        all_tags = self._get_instance_attribute_list_service(program)
+        return self._isolate_user_tags(all_tags, program)
 
     def _get_instance_attribute_list_service(self, program=None):
         """ Step 1: Finding user-created controller scope tags in a Logix5000 controller
@@ -316,61 +693,84 @@ class LogixDriver(CIPDriver):
         This service returns instance IDs for each created instance of the symbol class, along with a list
         of the attribute data associated with the requested attribute
         """
-        try:
-            last_instance = 0
-            tag_list = []
-            while last_instance != -1:
-                # Creating the Message Request Packet
-                path = []
-                if program:
-                    if not program.startswith('Program:'):
-                        program = f'Program:{program}'
-                    path = [EXTENDED_SYMBOL, Pack.usint(len(program)), program.encode('utf-8')]
-                    if len(program) % 2:
-                        path.append(b'\x00')
-
-                # just manually build the request path b/c there my be the extended symbol portion
-                path += [
-                    # Request Path ( 20 6B 25 00 Instance )
-                    CLASS_TYPE["8-bit"],  # Class id = 20 from spec 0x20
-                    ClassCode.symbol_object,  # Logical segment: Symbolic Object 0x6B
-                    INSTANCE_TYPE["16-bit"],  # Instance Segment: 16 Bit instance 0x25
-                    Pack.uint(last_instance),  # The instance
-                ]
-                path = b''.join(path)
-                path_size = Pack.usint(len(path) // 2)
-                request = RequestTypes.send_unit_data(self)
-
-                attributes = [
-                    b'\x01\x00',  # Attr. 1: Symbol name
-                    b'\x02\x00',  # Attr. 2 : Symbol Type
-                    b'\x03\x00',  # Attr. 3 : Symbol Address
-                    b'\x05\x00',  # Attr. 5 : Symbol Object Address
-                    b'\x06\x00',  # Attr. 6 : ? - Not documented (Software Control?)
-                    b'\x08\x00'  # Attr. 8 : array dimensions [1,2,3]
-                ]
-
-                if self.info.get('version_major', 0) >= MIN_VER_EXTERNAL_ACCESS:
-                    attributes.append(b'\x0a\x00')  # Attr. 10 : external access
+        tag_list = []
+        for tags in self._iter_instance_attribute_list(program):
+            tag_list += tags
+        return tag_list
 
-                request.add(
-                    Services.get_instance_attribute_list,
-                    path_size,
-                    path,
-                    Pack.uint(len(attributes)),
-                    *attributes
+    def _iter_instance_attribute_list(self, program=None):
+        """
+        Yields the symbol instances returned in each reply of the Get Instance Attribute List service
+        """
+        last_instance = 0
+        while last_instance != -1:
+            tag_list, last_instance = self._instance_attribute_list_page(program, last_instance)
+            yield tag_list
 
-                )
-                response = request.send()
-                if not response:
-                    raise DataError(f"send_unit_data returned not valid data - {response.error}")
+    def _instance_attribute_list_page(self, program, last_instance):
+        """
+        Returns the symbol instances in the reply starting at ``last_instance`` and the instance to start
+        the next reply at (``-1`` after the last reply).  A lost connection is raised as is, so it can be retried.
+        """
+        try:
+            response = self._instance_attribute_list_request(program, last_instance).send()
+            if not response:
+                raise DataError(f"send_unit_data returned not valid data - {response.error}")
 
-                last_instance = self._parse_instance_attribute_list(response, tag_list)
-            return tag_list
+            tag_list = []
+            return tag_list, self._parse_instance_attribute_list(response, tag_list)
 
+        except CommError:
+            raise
         except Exception as err:
             raise DataError('failed to get attribute list') from err
 
+    def _instance_attribute_list_request(self, program, last_instance):
+        """
+        Creates the Get Instance Attribute List request for the symbol instances starting at ``last_instance``
+        """
+        path = []
+        if program:
+            if not program.startswith('Program:'):
+                program = f'Program:{program}'
+            path = [EXTENDED_SYMBOL, Pack.usint(len(program)), program.encode('utf-8')]
+            if len(program) % 2:
+                path.append(b'\x00')
+
+        # just manually build the request path b/c there my be the extended symbol portion
+        path += [
+            # Request Path ( 20 6B 25 00 Instance )
+            CLASS_TYPE["8-bit"],  # Class id = 20 from spec 0x20
+            ClassCode.symbol_object,  # Logical segment: Symbolic Object 0x6B
+            INSTANCE_TYPE["16-bit"],  # Instance Segment: 16 Bit instance 0x25
+            Pack.uint(last_instance),  # The instance
+        ]
+        path = b''.join(path)
+        path_size = Pack.usint(len(path) // 2)
+        request = RequestTypes.send_unit_data(self)
+
+        attributes = [
+            b'\x01\x00',  # Attr. 1: Symbol name
+            b'\x02\x00',  # Attr. 2 : Symbol Type
+            b'\x03\x00',  # Attr. 3 : Symbol Address
+            b'\x05\x00',  # Attr. 5 : Symbol Object Address
+            b'\x06\x00',  # Attr. 6 : ? - Not documented (Software Control?)
+            b'\x08\x00'  # Attr. 8 : array dimensions [1,2,3]
+        ]
+
+        if self.info.get('version_major', 0) >= MIN_VER_EXTERNAL_ACCESS:
+            attributes.append(b'\x0a\x00')  # Attr. 10 : external access
+
+        request.add(
+            Services.get_instance_attribute_list,
+            path_size,
+            path,
+            Pack.uint(len(attributes)),
+            *attributes
+
+        )
+        return request
+
     def _parse_instance_attribute_list(self, response, tag_list):
         """ extract the tags list from the message received"""
 
@@ -379,28 +779,14 @@ class LogixDriver(CIPDriver):
         idx = count = instance = 0
         try:
             while idx < tags_returned_length:
-                instance = Unpack.dint(tags_returned[idx:idx + 4])
-                idx += 4
-                tag_length = Unpack.uint(tags_returned[idx:idx + 2])
-                idx += 2
-                tag_name = tags_returned[idx:idx + tag_length]
+                instance, tag_length = _INSTANCE_HEADER.unpack_from(tags_returned, idx)
+                idx += _INSTANCE_HEADER.size
+                tag_name = bytes(tags_returned[idx:idx + tag_length])
                 idx += tag_length
-                symbol_type = Unpack.uint(tags_returned[idx:idx + 2])
-                idx += 2
+                (symbol_type, symbol_address, symbol_object_address, software_control,
+                 dim1, dim2, dim3) = _INSTANCE_ATTRIBUTES.unpack_from(tags_returned, idx)
+                idx += _INSTANCE_ATTRIBUTES.size
                 count += 1
-                symbol_address = Unpack.udint(tags_returned[idx:idx + 4])
-                idx += 4
-                symbol_object_address = Unpack.udint(tags_returned[idx:idx + 4])
-                idx += 4
-                software_control = Unpack.udint(tags_returned[idx:idx + 4])
-                idx += 4
-
-                dim1 = Unpack.udint(tags_returned[idx:idx + 4])
-                idx += 4
-                dim2 = Unpack.udint(tags_returned[idx:idx + 4])
-                idx += 4
-                dim3 = Unpack.udint(tags_returned[idx:idx + 4])
-                idx += 4
 
                 if self.info.get('version_major', 0) >= MIN_VER_EXTERNAL_ACCESS:
                     access = tags_returned[idx] & 0b_0011
@@ -448,7 +834,8 @@ class LogixDriver(CIPDriver):
                     if _program is None:
                         self.__log.error(f'Program {program} not defined in tag list')
                     else:
-                        _program['routines'].append(rtn_name)
+                        if rtn_name not in _program['routines']:  # may be listed again if retried
+                            _program['routines'].append(rtn_name)
                     continue
 
                 if name.startswith('Task:'):
@@ -499,34 +886,126 @@ class LogixDriver(CIPDriver):
         except Exception as err:
             raise DataError('failed isolating user tags') from err
 
+    def _upload_data_types(self, instance_ids):
+        """
+        Uploads the structure makeup and template of the data types and all the data types nested in them, one level
+        of nesting at a time.  The requests for many templates are batched into multiple service requests and sent
+        using the pipeline and connections of the driver, instead of a request (or more) for each template.
+        The data types are parsed by :meth:`._get_data_type`, which uploads anything that failed here on its own.
+        """
+        pending = self._pending_data_types(instance_ids)
+        while pending:
+            self._structure_makeup_batch_results(self._send_requests(self._structure_makeup_batch(pending)))
+            requests, large_ids = self._template_batch(pending)
+            nested = self._template_batch_results(self._send_requests(requests))
+            for instance_id in large_ids:
+                template = self._cache['id:struct'][instance_id]
+                data = self._read_template(instance_id, template['object_definition_size'])
+                nested += self._add_raw_template(instance_id, template, data)
+            pending = self._pending_data_types(nested)
+
+    def _pending_data_types(self, instance_ids) -> List[int]:
+        return [instance_id for instance_id in dict.fromkeys(instance_ids)
+                if instance_id not in self._cache['id:udt'] and instance_id not in self._cache['id:raw']]
+
+    def _structure_makeup_batch(self, instance_ids):
+        services = [(instance_id, Services.get_attribute_list,
+                     request_path(ClassCode.template_object, Pack.uint(instance_id)),
+                     _STRUCTURE_MAKEUP_ATTRIBUTES, _STRUCTURE_MAKEUP_REPLY_SIZE)
+                    for instance_id in instance_ids if instance_id not in self._cache['id:struct']]
+        return self._multi_service_requests(services)
+
+    def _structure_makeup_batch_results(self, results):
+        for instance_id, result in results.items():
+            if result:
+                _struct = _parse_structure_makeup_data(result.value)
+                if not _struct.get('error'):
+                    self._cache['id:struct'][instance_id] = _struct
+                    self._cache['handle:id'][_struct['structure_handle']] = instance_id
+
+    def _template_batch(self, instance_ids):
+        """
+        Creates the requests to read the templates that fit in a single reply
+
+        :return: the requests and the ids of the templates that need to be read on their own
+        """
+        services, large_ids = [], []
+        for instance_id in instance_ids:
+            template = self._cache['id:struct'].get(instance_id)
+            if template is None:
+                continue
+            size = _template_size(template)
+            if size + MULTISERVICE_READ_OVERHEAD + 6 < self.connection_size:
+                services.append((instance_id, Services.read_tag,
+                                 request_path(ClassCode.template_object, Pack.uint(instance_id)),
+                                 Pack.dint(0) + Pack.uint(size), size))
+            else:
+                large_ids.append(instance_id)
+        return self._multi_service_requests(services), large_ids
+
+    def _template_batch_results(self, results) -> List[int]:
+        """
+        Keeps the uploaded template data
+
+        :return: the template instance ids of the structures nested in them
+        """
+        nested = []
+        for instance_id, result in results.items():
+            if result:
+                nested += self._add_raw_template(instance_id, self._cache['id:struct'][instance_id], result.value)
+        return nested
+
+    def _add_raw_template(self, instance_id, template, data) -> List[int]:
+        data = bytes(data)
+        self._cache['id:raw'][instance_id] = data
+        return _template_struct_ids(data, template['member_count'])
+
+    def _multi_service_requests(self, services):
+        """
+        Packs services into as few multiple service requests as possible, keeping the replies within the connection
+        size.  The ``services`` are ``(request id, service, request path, request data, reply data size)``.
+        """
+        requests = []
+        current_request, response_size = None, 0
+        for request_id, service, path, data, reply_size in services:
+            reply_size += 6  # reply service, status and offset
+            name = f'@{request_id}'
+            if (current_request is None or response_size + reply_size >= self.connection_size
+                    or not current_request.add_service(service, path, data, name, request_id)):
+                current_request = RequestTypes.multi_request(self)
+                current_request.add_service(service, path, data, name, request_id)
+                requests.append(current_request)
+                response_size = MULTISERVICE_READ_OVERHEAD
+            response_size += reply_size
+        return requests
+
     def _get_structure_makeup(self, instance_id):
         """
         get the structure makeup for a specific structure
         """
         if instance_id not in self._cache['id:struct']:
-            request = RequestTypes.send_unit_data(self)
-            req_path = request_path(ClassCode.template_object, Pack.uint(instance_id))
-            request.add(
-                Services.get_attribute_list,
-                req_path,
-
-                # service data:
-                b'\x04\x00',  # Number of attributes
-                b'\x04\x00',  # Template Object Definition Size UDINT
-                b'\x05\x00',  # Template Structure Size UDINT
-                b'\x02\x00',  # Template Member Count UINT
-                b'\x01\x00',  # Structure Handle We can use this to read and write UINT
-            )
-
-            response = request.send()
-            if not response:
-                raise DataError(f"send_unit_data returned not valid data", response.error)
-            _struct = _parse_structure_makeup_attributes(response)
-            self._cache['id:struct'][instance_id] = _struct
-            self._cache['handle:id'][_struct['structure_handle']] = instance_id
+            response = self._structure_makeup_request(instance_id).send()
+            self._structure_makeup_reply(instance_id, response)
 
         return self._cache['id:struct'][instance_id]
 
+    def _structure_makeup_request(self, instance_id):
+        request = RequestTypes.send_unit_data(self)
+        req_path = request_path(ClassCode.template_object, Pack.uint(instance_id))
+        request.add(
+            Services.get_attribute_list,
+            req_path,
+            _STRUCTURE_MAKEUP_ATTRIBUTES,
+        )
+        return request
+
+    def _structure_makeup_reply(self, instance_id, response):
+        if not response:
+            raise DataError(f"send_unit_data returned not valid data", response.error)
+        _struct = _parse_structure_makeup_attributes(response)
+        self._cache['id:struct'][instance_id] = _struct
+        self._cache['handle:id'][_struct['structure_handle']] = instance_id
+
     def _read_template(self, instance_id, object_definition_size):
         """ get a list of the tags in the plc
 
@@ -536,16 +1015,7 @@ class LogixDriver(CIPDriver):
         template_raw = b''
         try:
             while True:
-                request = RequestTypes.send_unit_data(self)
-                req_path = request_path(ClassCode.template_object, instance=Pack.uint(instance_id))
-                request.add(
-                    Services.read_tag,
-                    req_path,
-                    # service data:
-                    Pack.dint(offset),
-                    Pack.uint(((object_definition_size * 4) - 21) - offset)
-                )
-                response = request.send()
+                response = self._template_request(instance_id, object_definition_size, offset).send()
 
                 if response.service_status not in (SUCCESS, INSUFFICIENT_PACKETS):
                     raise DataError('Error reading template', response)
@@ -557,11 +1027,25 @@ class LogixDriver(CIPDriver):
 
                 offset += len(response.data)
 
+        except CommError:
+            raise
         except Exception as err:
             raise DataError('Failed to read template') from err
         else:
             return template_raw
 
+    def _template_request(self, instance_id, object_definition_size, offset):
+        request = RequestTypes.send_unit_data(self)
+        req_path = request_path(ClassCode.template_object, instance=Pack.uint(instance_id))
+        request.add(
+            Services.read_tag,
+            req_path,
+            # service data:
+            Pack.dint(offset),
+            Pack.uint(_template_size({'object_definition_size': object_definition_size}) - offset)
+        )
+        return request
+
     def _parse_template_data(self, data, member_count):
         info_len = member_count * TEMPLATE_MEMBER_INFO_LEN
         info_data = data[:info_len]
@@ -586,11 +1070,11 @@ class LogixDriver(CIPDriver):
         if template_name == 'ASCIISTRING82':  # internal name for STRING builtin type
             template_name = 'STRING'
 
-        template = {
+        template = util.StructType({
             'name': template_name,  # predefined types put name as first member (DWORD)
             'internal_tags': {},
             'attributes': []
-        }
+        })
 
         for member, info in zip(member_names, member_data):
             if not (member.startswith('ZZZZZZZZZZ') or member.startswith('__')):
@@ -610,10 +1094,7 @@ class LogixDriver(CIPDriver):
         member = {'offset': Unpack.udint(info[4:])}
         tag_type = 'atomic'
 
-        data_type = DataType.get(typ)
-        if data_type is None:
-            instance_id = typ & 0b0000_1111_1111_1111
-            data_type = DataType.get(instance_id)
+        data_type, instance_id = _template_member_type(typ)
         if data_type is None:
             tag_type = 'struct'
             data_type = self._get_data_type(instance_id)
@@ -634,18 +1115,25 @@ class LogixDriver(CIPDriver):
             try:
                 template = self._get_structure_makeup(instance_id)  # instance id from type
                 if not template.get('error'):
-                    _data = self._read_template(instance_id, template['object_definition_size'])
-                    data_type = self._parse_template_data(_data, template['member_count'])
-                    data_type['template'] = template
-                    self._cache['id:udt'][instance_id] = data_type
-                    self._data_types[data_type['name']] = data_type
+                    _data = self._cache['id:raw'].pop(instance_id, None)
+                    if _data is None:
+                        _data = self._read_template(instance_id, template['object_definition_size'])
+                    self._add_data_type(instance_id, template, _data)
+            except CommError:
+                raise
             except Exception as err:
                 raise DataError('Failed to get data type information') from err
 
         return self._cache['id:udt'][instance_id]
 
+    def _add_data_type(self, instance_id, template, data):
+        data_type = self._parse_template_data(data, template['member_count'])
+        data_type['template'] = {**template, 'instance_id': instance_id}
+        self._cache['id:udt'][instance_id] = data_type
+        self._data_types[data_type['name']] = data_type
+
     @with_forward_open
-    def read(self, *tags: str) -> ReadWriteReturnType:
+    def read(self, *tags: str, as_numpy: bool = False, lazy_structs: bool = False) -> ReadWriteReturnType:
         """
         Read the value of tag(s).  Automatically will split tags into multiple requests by tracking the request and
         response size.  Will use the multi-service request to group many tags into a single packet and also will automatically
@@ -654,13 +1142,23 @@ class LogixDriver(CIPDriver):
         will be a dict of {attribute name: value}.
 
         :param tags: one or many tags to read
+        :param as_numpy: return the values of arrays as read-only ``numpy.ndarray`` views of the reply instead of
+                         lists, BOOL arrays are unpacked into ``bool`` arrays and arrays of structures use a
+                         structured dtype (:func:`~pycomm3.packets.struct_dtype`). Requires NumPy.
+        :param lazy_structs: return the values of structures as read-only mappings
+                             (:class:`~pycomm3.packets.StructView`) that only decode an attribute when it is
+                             accessed, instead of dicts.  Useful when only a few attributes of large structures are used.
         :return: a single or list of ``Tag`` objects
         """
 
+        self._upload_tags(self._unknown_tags(tags))
         parsed_requests = self._parse_requested_tags(tags)
-        requests = self._read_build_requests(parsed_requests)
+        requests = self._read_build_requests(parsed_requests, as_numpy, lazy_structs)
         read_results = self._send_requests(requests)
 
+        return self._read_results(tags, parsed_requests, read_results)
+
+    def _read_results(self, tags, parsed_requests, read_results) -> ReadWriteReturnType:
         results = []
 
         for i, tag in enumerate(tags):
@@ -688,12 +1186,20 @@ class LogixDriver(CIPDriver):
         else:
             return results[0]
 
-    def _read_build_requests(self, parsed_tags):
+    def _read_build_requests(self, parsed_tags, as_numpy=False, lazy_structs=False):
+        if as_numpy and np is None:
+            raise RequestError('NumPy must be installed to read arrays as_numpy')
+
         if len(parsed_tags) == 1 or self._micro800:
             requests = (self._read_build_single_request(parsed_tags[request_id]) for request_id in parsed_tags)
-            return [r for r in requests if r is not None]
+            requests = [r for r in requests if r is not None]
         else:
-            return self._read_build_multi_requests(parsed_tags)
+            requests = list(self._read_build_multi_requests(parsed_tags))
+
+        for request in requests:
+            request.as_numpy = as_numpy
+            request.lazy_structs = lazy_structs
+        return requests
 
     def _read_build_multi_requests(self, parsed_tags):
         """
@@ -771,15 +1277,23 @@ class LogixDriver(CIPDriver):
         :param tags_values: one or many 2-element tuples (tag name, value)
         :return: a single or list of ``Tag`` objects.
         """
+        self._upload_tags(self._unknown_tags(tag for tag, _ in tags_values))
+        parsed_requests = self._parse_requested_writes(tags_values)
+        requests, bit_writes = self._write_build_requests(parsed_requests)
+        write_results = self._send_requests(requests)
+
+        return self._write_results(tags_values, parsed_requests, write_results, bit_writes)
+
+    def _parse_requested_writes(self, tags_values):
         tags = (tag for (tag, value) in tags_values)
         parsed_requests = self._parse_requested_tags(tags)
 
         for i, (tag, value) in enumerate(tags_values):
             parsed_requests[i]['value'] = value
 
-        requests, bit_writes = self._write_build_requests(parsed_requests)
-        write_results = self._send_requests(requests)
+        return parsed_requests
 
+    def _write_results(self, tags_values, parsed_requests, write_results, bit_writes) -> ReadWriteReturnType:
         for bw in bit_writes:   # restore original request ids that were handled by a bits write
             bit_request_id = bit_writes[bw]['request_id']
             result = write_results.pop(bit_request_id)
@@ -923,6 +1437,10 @@ class LogixDriver(CIPDriver):
 
         """
         base, *attrs = tag_name.split('.')
+        if base.startswith('Program:') and attrs:
+            base = f'{base}.{attrs.pop(0)}'
+        if util.strip_array(base) not in self._tags:
+            self._resolve_unknown_tag(util.strip_array(base))
         return self._get_tag_info(base, attrs)
 
     def _get_tag_info(self, base, attrs) -> Optional[dict]:
@@ -1012,6 +1530,9 @@ class LogixDriver(CIPDriver):
             raise RequestError('Failed to parse tag request', tag) from err
 
     def _send_requests(self, requests):
+        if self._cfg['pipeline'] > 1 or self._cfg['connections'] > 1:
+            return self._send_requests_pipelined(requests)
+
         results = {}
 
         for request in requests:
@@ -1019,29 +1540,77 @@ class LogixDriver(CIPDriver):
                 response = request.send()
             except (RequestError, DataError) as err:
                 self.__log.exception('Error sending request')
-                if request.type_ != 'multi':
-                    results[request.request_id] = Tag(request.tag, None, None, str(err))
-                else:
-                    for tag in request.tags:
-                        results[tag['request_id']] = Tag(tag['tag'], None, None, str(err))
+                _add_request_error(results, request, err)
             else:
-                if request.type_ != 'multi':
-                    if response:
-                        results[request.request_id] = Tag(request.tag,
-                                                         response.value if request.type_ == 'read' else request.value,
-                                                         response.data_type if request.type_ == 'read' else request.data_type,
-                                                         response.error)
-                    else:
-                        results[request.request_id] = Tag(request.tag, None, None, response.error)
-                else:
-                    for tag in response.tags:
-                        if tag['service_status'] == SUCCESS:
-                            results[tag['request_id']] = Tag(tag['tag'], tag['value'], tag['data_type'], None)
-                        else:
-                            results[tag['request_id']] = Tag(tag['tag'], None, None,
-                                                         tag.get('error', 'Unknown Service Error'))
+                _add_request_results(results, request, response)
         return results
 
+    def _send_requests_pipelined(self, requests):
+        # every connection pulls its next request from the same iterator,
+        # so the requests are balanced across the connections as the replies come back
+        requests = iter(requests)
+        pipelines = [(conn, RequestPipeline(_bind_requests(requests, conn), self._cfg['pipeline'],
+                                            conn._pipeline_contexts))
+                     for conn in self._connection_pool()]
+        try:
+            messages = {conn: pipeline.fill() for conn, pipeline in pipelines}
+
+            while True:
+                for conn_messages in messages.values():
+                    for request, message in conn_messages:
+                        request._send(message)
+
+                active = [(conn, pipeline) for conn, pipeline in pipelines if pipeline.in_flight]
+                if not active:
+                    break
+
+                messages = {conn: pipeline.reply(conn._sock.receive()) for conn, pipeline in active}
+        finally:
+            if any(pipeline.in_flight for _, pipeline in pipelines):
+                # the replies still in flight would be received as the replies to the next requests
+                self._reset_connection()
+
+        return _pipeline_results(*(pipeline for _, pipeline in pipelines))
+
+    def _connection_pool(self) -> List[CIPDriver]:
+        """
+        Returns all the connections to use for sending requests, this driver and any additional pooled connections.
+        Pooled connections are created and opened as needed, any that fail to open are dropped and the requests
+        are sent over the connections that did open.
+        """
+        while len(self._pool) < self._cfg['connections'] - 1:
+            self._pool.append(self._new_pooled_connection())
+
+        pool = []
+        for conn in self._pool:
+            try:
+                if not conn.connected:
+                    conn.open()
+                if conn._forward_open():
+                    pool.append(conn)
+                    continue
+                self.__log.warning('Failed to open pooled connection')
+            except (CommError, DataError) as err:
+                self.__log.warning(f'Failed to open pooled connection: {err}')
+            try:
+                conn.close()
+            except CommError:
+                pass
+        self._pool = pool
+
+        return [self, *self._pool]
+
+    def _new_pooled_connection(self) -> CIPDriver:
+        """
+        Creates a new connection to the same target using the same configuration as this driver.
+        Only the connection is created, all requests are still built by this driver.
+        """
+        conn = CIPDriver(self._cfg['ip address'])
+        conn._cfg.update(self._cfg)
+        conn._info = self._info
+        conn._transport = self._transport
+        return conn
+
     def get_plc_time(self, fmt: str='%A, %B %d, %Y %I:%M:%S%p') -> Tag:
         """
         Gets the current time of the PLC system clock. The ``value`` attribute will be a dict containing the time in
@@ -1051,19 +1620,8 @@ class LogixDriver(CIPDriver):
         :param fmt: format string for converting the time to a string
         :return: a Tag object with the current time
         """
-        tag = self.generic_message(
-            service=Services.get_attribute_list,
-            class_code=ClassCode.wall_clock_time,
-            instance=b'\x01',
-            request_data=b'\x01\x00\x0B\x00',
-            data_format=[(None, 6), ('us', 'ULINT'), ]
-        )
-        if tag:
-            _time = datetime.datetime(1970, 1, 1) + datetime.timedelta(microseconds=tag.value['us'])
-            value = {'datetime': _time, 'microseconds': tag.value['us'], 'string': _time.strftime(fmt)}
-        else:
-            value = None
-        return Tag('__GET_PLC_TIME__', value, None, error=tag.error)
+        tag = self.generic_message(**_GET_PLC_TIME_MESSAGE)
+        return _plc_time_reply(tag, fmt)
 
     def set_plc_time(self, microseconds: Optional[int] = None) -> Tag:
         """
@@ -1072,20 +1630,232 @@ class LogixDriver(CIPDriver):
         :param microseconds: None to use client PC clock, else timestamp in microseconds to set the PLC clock to
         :return: Tag with status of request
         """
-        if microseconds is None:
-            microseconds = int(time.time() * SEC_TO_US)
-
-        request_data = b''.join([
-            b'\x01\x00',  # attribute count
-            b'\x06\x00',  # attribute
-            Pack.ulint(microseconds),
-        ])
-        return self.generic_message(
-            service=Services.set_attribute_list,
-            class_code=ClassCode.wall_clock_time,
-            instance=b'\x01',
-            request_data=request_data, name='__SET_PLC_TIME__'
-        )
+        return self.generic_message(**_set_plc_time_message(microseconds))
+
+
+# instance id, name length / symbol type, address, object address, software control, dim 1-3
+_INSTANCE_HEADER = Struct('<iH')
+_INSTANCE_ATTRIBUTES = Struct('<H6I')
+
+_PLC_NAME_MESSAGE = {
+    'service': Services.get_attribute_list,
+    'class_code': ClassCode.program_name,
+    'instance': b'\x01\x00',  # instance 1
+    'request_data': b'\x01\x00\x01\x00',  # num attributes, attribute 1 (program name)
+    'data_format': ((None, 6), ('program_name', 'STRING')),
+}
+
+_PLC_INFO_MESSAGE = {
+    'class_code': ClassCode.identity_object,
+    'instance': b'\x01',
+    'service': Services.get_attributes_all,
+    'data_format': [
+        ('vendor', 'UINT'), ('product_type', 'UINT'), ('product_code', 'UINT'),
+        ('version_major', 'SINT'), ('version_minor', 'USINT'), ('_keyswitch', 2),
+        ('serial', 'UDINT'), ('device_type', 'SHORT_STRING')
+    ],
+    'connected': False,
+}
+
+_GET_PLC_TIME_MESSAGE = {
+    'service': Services.get_attribute_list,
+    'class_code': ClassCode.wall_clock_time,
+    'instance': b'\x01',
+    'request_data': b'\x01\x00\x0B\x00',
+    'data_format': [(None, 6), ('us', 'ULINT'), ]
+}
+
+
+def _plc_time_reply(tag, fmt):
+    if tag:
+        _time = datetime.datetime(1970, 1, 1) + datetime.timedelta(microseconds=tag.value['us'])
+        value = {'datetime': _time, 'microseconds': tag.value['us'], 'string': _time.strftime(fmt)}
+    else:
+        value = None
+    return Tag('__GET_PLC_TIME__', value, None, error=tag.error)
+
+
+def _set_plc_time_message(microseconds=None):
+    if microseconds is None:
+        microseconds = int(time.time() * SEC_TO_US)
+
+    request_data = b''.join([
+        b'\x01\x00',  # attribute count
+        b'\x06\x00',  # attribute
+        Pack.ulint(microseconds),
+    ])
+    return {
+        'service': Services.set_attribute_list,
+        'class_code': ClassCode.wall_clock_time,
+        'instance': b'\x01',
+        'request_data': request_data,
+        'name': '__SET_PLC_TIME__'
+    }
+
+
+def _add_request_error(results, request, err):
+    if request.type_ != 'multi':
+        results[request.request_id] = Tag(request.tag, None, None, str(err))
+    else:
+        for tag in request.tags:
+            results[tag['request_id']] = Tag(tag['tag'], None, None, str(err))
+
+
+def _pipeline_results(*pipelines):
+    results = {}
+    for pipeline in pipelines:
+        for request, response in pipeline.responses:
+            if isinstance(response, Exception):
+                _add_request_error(results, request, response)
+            else:
+                _add_request_results(results, request, response)
+    return results
+
+
+def _bind_requests(requests, conn):
+    """
+    Sends each of the requests over ``conn`` instead of the driver that created it
+    """
+    for request in requests:
+        request._plc = conn
+        yield request
+
+
+def _add_request_results(results, request, response):
+    if request.type_ != 'multi':
+        if response:
+            results[request.request_id] = Tag(request.tag,
+                                             response.value if request.type_ == 'read' else request.value,
+                                             response.data_type if request.type_ == 'read' else request.data_type,
+                                             response.error)
+        else:
+            results[request.request_id] = Tag(request.tag, None, None, response.error)
+    else:
+        for tag in response.tags:
+            if tag.get('service_status') == SUCCESS:
+                results[tag['request_id']] = Tag(tag['tag'], tag['value'], tag['data_type'], None)
+            else:
+                results[tag['request_id']] = Tag(tag['tag'], None, None,
+                                             tag.get('error') or response.error or 'Unknown Service Error')
+
+
+# (attribute id, size) of the symbol attributes uploaded for a single tag, the same as the instance attribute list
+_SYMBOL_ATTRIBUTES = ((2, 2), (3, 4), (5, 4), (6, 4), (8, 12))  # type, address, object address, software control, dims
+_SYMBOL_EXTERNAL_ACCESS = (10, 1)
+
+
+def _parse_symbol_attributes(data) -> dict:
+    """
+    Parses the reply of a Get Attribute List for a symbol into the same format as the instance attribute list,
+    the instance id is not known when the symbol is requested by name.
+    """
+    count = Unpack.uint(data)
+    idx = 2
+    values = {}
+    for _ in range(count):
+        attr, status = unpack_from('<HH', data, idx)
+        idx += 4
+        if status != SUCCESS:
+            raise DataError(f'attribute {attr} not returned, status {status}')
+        if attr == 8:
+            values[attr] = list(unpack_from('<3I', data, idx))
+            idx += 12
+        elif attr == 2:
+            values[attr] = Unpack.uint(data[idx:])
+            idx += 2
+        elif attr == 10:
+            values[attr] = data[idx] & 0b_0011
+            idx += 1
+        else:
+            values[attr] = Unpack.udint(data[idx:])
+            idx += 4
+
+    return {'instance_id': None,
+            'symbol_type': values[2],
+            'symbol_address': values[3],
+            'symbol_object_address': values[5],
+            'software_control': values[6],
+            'external_access': EXTERNAL_ACCESS.get(values.get(10), 'Unknown'),
+            'dimensions': values[8]}
+
+
+def _base_tag_name(tag: str) -> str:
+    """
+    The name of the base tag (without any array index) of a tag requested in a read or write
+    """
+    base, *attrs = tag.split('{')[0].split('.')
+    if base.startswith('Program:') and attrs:
+        base = f'{base}.{attrs[0]}'
+    return util.strip_array(base)
+
+
+# may change when the project is edited, but they are not used to access the tag
+_SYMBOL_ADDRESS_KEYS = {'symbol_address', 'symbol_object_address'}
+
+
+def _tag_changed(current, tag):
+    """
+    Returns True if the definition of the tag changed, the instance id is only compared if both have one
+    since tags uploaded with ``lazy_tags`` do not have it
+    """
+    for key, value in tag.items():
+        if key in _SYMBOL_ADDRESS_KEYS or (key == 'instance_id' and None in (value, current.get(key))):
+            continue
+        if current.get(key) != value:
+            return True
+    return False
+
+
+def _cached_templates(data_types) -> Dict[int, dict]:
+    """
+    Returns the templates of the data types by template instance id
+    """
+    return {data_type['template']['instance_id']: data_type['template']
+            for data_type in data_types.values() if 'instance_id' in data_type['template']}
+
+
+def _templates_changed(templates, makeups) -> bool:
+    """
+    Returns True if the structure makeup of any of the ``templates`` is missing from ``makeups`` or differs
+    """
+    return any(makeups.get(instance_id) is None or
+               any(template.get(key) != value for key, value in makeups[instance_id].items())
+               for instance_id, template in templates.items())
+
+
+def _in_program_scope(tag_name, program):
+    """
+    Returns True if the tag is in the scope of the tag list, see ``program`` of :meth:`LogixDriver.get_tag_list`
+    """
+    if program == '*':
+        return True
+    if program is None:
+        return not tag_name.startswith('Program:')
+    return tag_name.startswith(f'Program:{program}.')
+
+
+def _template_member_type(typ):
+    """
+    Returns the atomic data type of a template member or ``None`` and the template instance id if it is a structure
+    """
+    data_type = DataType.get(typ)
+    instance_id = None
+    if data_type is None:
+        instance_id = typ & 0b0000_1111_1111_1111
+        data_type = DataType.get(instance_id)
+    return data_type, instance_id
+
+
+def _template_struct_ids(data, member_count):
+    """
+    Returns the template instance ids of all the structure members in the raw template data
+    """
+    ids = []
+    for i in range(0, member_count * TEMPLATE_MEMBER_INFO_LEN, TEMPLATE_MEMBER_INFO_LEN):
+        data_type, instance_id = _template_member_type(Unpack.uint(data[i + 2:i + 4]))
+        if data_type is None:
+            ids.append(instance_id)
+    return ids
 
 
 def _parse_plc_info(data):
@@ -1099,17 +1869,35 @@ def _parse_plc_info(data):
     return parsed
 
 
+_STRUCTURE_MAKEUP_ATTRIBUTES = b''.join((
+    b'\x04\x00',  # Number of attributes
+    b'\x04\x00',  # Template Object Definition Size UDINT
+    b'\x05\x00',  # Template Structure Size UDINT
+    b'\x02\x00',  # Template Member Count UINT
+    b'\x01\x00',  # Structure Handle We can use this to read and write UINT
+))
+_STRUCTURE_MAKEUP_REPLY_SIZE = 30  # attribute count + id, status and value of each attribute
+
+
+def _template_size(template):
+    """
+    Size of the template data to read, the object definition size is in 32-bit words and includes 21 bytes not read
+    """
+    return template['object_definition_size'] * 4 - 21
+
+
 def _parse_structure_makeup_attributes(response):
     """
     extract the tags list from the message received
     """
-    structure = {}
-
     if response.service_status != SUCCESS:
-        structure['error'] = response.service_status
-        return
+        return {'error': response.service_status}
+
+    return _parse_structure_makeup_data(response.data)
 
-    attribute = response.data
+
+def _parse_structure_makeup_data(attribute):
+    structure = {}
     idx = 4
     try:
         if Unpack.uint(attribute[idx:idx + 2]) == SUCCESS:
@@ -1158,6 +1946,9 @@ def writable_value(parsed_tag: dict) -> bytes:
         elements = parsed_tag['elements']
         data_type = parsed_tag['tag_info']['data_type']
 
+        if isinstance(value, (bytearray, memoryview, array)) or (np is not None and isinstance(value, np.ndarray)):
+            return _writable_buffer(value, elements, parsed_tag['tag_info'])
+
         value_elements = elements * 32 if data_type == 'DWORD' else elements
 
         if value_elements > 1:
@@ -1171,7 +1962,7 @@ def writable_value(parsed_tag: dict) -> bytes:
         else:
             pack_func = Pack[data_type]
             if data_type == 'DWORD':
-                return b''.join(pack_func(_pack_bool_array(value[i:i+32])) for i in range(0, value_elements, 32))
+                return _pack_bools(value, value_elements)
 
             else:
                 if elements > 1:
@@ -1182,6 +1973,73 @@ def writable_value(parsed_tag: dict) -> bytes:
         raise RequestError('Unable to create a writable value') from err
 
 
+_BYTE_TYPES = {'SINT', 'USINT', 'BYTE'}
+_FORMAT_KINDS = {'?': 'bool', 'e': 'float', 'f': 'float', 'd': 'float',
+                 **{fmt: 'int' for fmt in 'bhilqn'}, **{fmt: 'uint' for fmt in 'BHILQN'}}
+
+
+def _writable_buffer(value, elements, tag_info) -> bytes:
+    """
+    Converts a buffer (``numpy.ndarray``, ``array.array``, ``bytearray``, ``memoryview``) to the data to write with a
+    single copy instead of packing each element.  Buffers of unsigned bytes are written as-is like ``bytes`` values,
+    but only to byte sized tags and structures (including strings), for any other buffer the elements must be the
+    same kind and size as the data type of the tag.  NumPy arrays are cast to the data type of the tag if they are
+    the same kind (e.g. int64 to DINT or float64 to REAL) and the values are in range.  Structures can be written from arrays with the dtype from
+    :func:`~pycomm3.packets.struct_dtype`.
+    """
+    data_type = tag_info['data_type']
+    is_struct = tag_info['tag_type'] == 'struct'
+    is_ndarray = np is not None and isinstance(value, np.ndarray)
+    if is_ndarray and value.dtype.names:
+        if not is_struct or value.dtype != struct_dtype(data_type):
+            raise DataError('dtype of the array does not match the data type of the tag')
+        if value.size < elements:
+            raise RequestError(f'Insufficient data for requested elements, expected {elements} and got {value.size}')
+        return value.ravel()[:elements].tobytes()
+
+    view = memoryview(value)
+    if view.format in ('B', 'c') and (is_struct or data_type in _BYTE_TYPES):
+        size = elements * (data_type['template']['structure_size'] if is_struct else 1)
+        if view.nbytes < size:
+            raise RequestError(f'Insufficient data for requested elements, expected {size} bytes and got {view.nbytes}')
+        return view.cast('B')[:size].tobytes()
+
+    if is_struct:
+        raise DataError('Writing UDTs only supports bytes for value')
+
+    codec = CODECS[data_type]
+    if is_ndarray:
+        value = value.ravel()
+        bools = data_type == 'DWORD' and value.dtype == np.bool_
+        count = elements * 32 if bools else elements
+        if len(value) < count:
+            raise RequestError(f'Insufficient data for requested elements, expected {count} and got {len(value)}')
+        if bools:
+            return np.packbits(value[:count], bitorder='little').tobytes()
+        dtype = np.dtype(f'<{codec.format}')
+        value = value[:elements]
+        if not np.can_cast(value.dtype, dtype, casting='same_kind'):
+            raise DataError(f'Cannot write an array of {value.dtype} to a {data_type} tag')
+        if value.size and not np.can_cast(value.dtype, dtype):  # like int64 to DINT, only if the values fit
+            if dtype.kind in 'iu':
+                info = np.iinfo(dtype)
+                values = value
+            else:
+                info = np.finfo(dtype)
+                values = value[np.isfinite(value)]
+            if values.size and (values.min() < info.min or values.max() > info.max):
+                raise DataError(f'Values of the {value.dtype} array are out of range for a {data_type} tag')
+        return value.astype(dtype, copy=False).tobytes()
+
+    byte_order, item_fmt = view.format[:-1], view.format[-1]
+    little_endian = byte_order == '<' or (byte_order in ('', '@', '=') and sys.byteorder == 'little')
+    if not little_endian or _FORMAT_KINDS.get(item_fmt) != _FORMAT_KINDS[codec.format] or view.itemsize != codec.size:
+        raise DataError(f'Cannot write a buffer of {view.format!r} to a {data_type} tag')
+    if view.nbytes < elements * view.itemsize:
+        raise RequestError(f'Insufficient data for requested elements, expected {elements} and got {view.nbytes // view.itemsize}')
+    return view.cast('B')[:elements * view.itemsize].tobytes()
+
+
 def _tag_return_size(tag_data):
     tag_info = tag_data['tag_info']
     if tag_info['tag_type'] == 'atomic':
@@ -1196,85 +2054,127 @@ def _tag_return_size(tag_data):
 
 def _writable_value_structure(value, elements, data_type):
     if elements > 1:
-        return b''.join(_pack_structure(val, data_type) for val in value)
+        encoder = struct_encoder(data_type)
+        buffer = bytearray(encoder.size * elements)
+        try:
+            for offset, val in zip(range(0, len(buffer), encoder.size), value):
+                encoder.encode_into(buffer, offset, val)
+        except RequestError:
+            raise
+        except Exception as err:
+            raise RequestError('Value Invalid for Structure') from err
+        return bytes(buffer)
     else:
         return _pack_structure(value, data_type)
 
 
-def _pack_bool_array(bools):
-    if len(bools) != 32:
-        raise RequestError(f'boolean arrays must have 32 elements: not {len(bools)}')
-    value = 0
-    for i, val in enumerate(bools):
-        if val:
-            value |= 1 << i
-    return value
+def _pack_bools(bools, count):
+    if len(bools) < count:
+        raise RequestError(f'boolean arrays must have {count} elements: not {len(bools)}')
+    return pack_bools(bools[:count])
 
 
 def _pack_string(value, string_len, struct_size):
     try:
-        sint_array = [b'\x00' for _ in range(struct_size-4)]  # 4 for .LEN
-        if len(value) > string_len:
-            value = value[:string_len]
-        for i, s in enumerate(value):
-            sint_array[i] = Pack.char(s)
+        data = value[:string_len].encode('iso-8859-1')
     except Exception as err:
         raise RequestError('Failed to pack string') from err
-    return Pack.dint(len(value)) + b''.join(sint_array)
+    return Pack.dint(len(data)) + data.ljust(struct_size - 4, b'\x00')  # 4 for .LEN
 
 
 def _pack_structure(value, data_type):
-    string_len = data_type.get('string')
+    try:
+        return struct_encoder(data_type).encode(value)
+    except RequestError:
+        raise
+    except Exception as err:
+        raise RequestError('Value Invalid for Structure') from err
 
-    if string_len:
-        data = _pack_string(value, string_len, data_type['template']['structure_size'])
-    else:
-        # NOTE:  start with object-definition-size array, then replace sections with offset + data len
-        #        DONT use bytes, needs to be a list for swapping values later on
-        data = [0 for _ in range(data_type['template']['structure_size'])]
-        try:
-            val_is_dict = isinstance(value, Mapping)
 
-            for i, attr in enumerate(data_type['attributes']):
-                val = value[attr] if val_is_dict else value[i]
+class StructEncoder:
+    """
+    Encodes the value of a structure (UDT) from a dict of ``{attribute: value}`` or a sequence of the values in
+    attribute order, the counterpart of :class:`~pycomm3.packets.responses.StructDecoder`.  The encoder is compiled
+    once from the template of the data type and packs each member directly into a buffer at the member offset.
+    """
 
-                dtype = data_type['internal_tags'][attr]
-                offset = dtype['offset']
+    def __init__(self, data_type):
+        self.size = data_type['template']['structure_size']
+        self._string = data_type.get('string')
+        self._members = []  # (name, index, offset, pack function)
+
+        for index, name in enumerate(data_type['attributes']):
+            member = data_type['internal_tags'][name]
+            datatype, offset, array = member['data_type'], member['offset'], member.get('array')
+            if member['tag_type'] == 'struct':
+                pack = _struct_member_packer(struct_encoder(datatype), array)
+            elif datatype == 'BOOL':
+                pack = _bit_member_packer(1 << member.get('bit', 0))
+            else:
+                pack = _atomic_member_packer(datatype, array)
+            self._members.append((name, index, offset, pack))
 
-                ary = dtype.get('array')
-                if dtype['tag_type'] == 'struct':
-                    if ary:
-                        value_bytes = [_pack_structure(val[i], dtype['data_type']) for i in range(ary)]
-                    else:
-                        value_bytes = [_pack_structure(val, dtype['data_type']), ]
-                else:
-                    pack_func = Pack[dtype['data_type']]
-                    bit = dtype.get('bit')
-                    if bit is not None:  # attributes that are aliased to a bit
-                        _byte = data[offset]
-                        if val:
-                            _byte |= 1 << bit
-                        else:
-                            _byte &= ~(1 << bit)
+    def encode(self, value) -> bytes:
+        buffer = bytearray(self.size)
+        self.encode_into(buffer, 0, value)
+        return bytes(buffer)
 
-                        data[offset] = _byte
-                        continue
+    def encode_into(self, buffer: bytearray, offset: int, value):
+        """
+        Packs the value into ``buffer`` starting at ``offset``, the bytes of the structure must already be zeroed
+        """
+        if self._string:
+            buffer[offset:offset + self.size] = _pack_string(value, self._string, self.size)
+            return
 
-                    elif dtype['data_type'] == 'DWORD':  # boolean arrays
-                        value_bytes = [b''.join(pack_func(_pack_bool_array(val[i:i + 32])) for i in range(0, ary*32, 32)), ]
-                    else:  # all other types
-                        if ary:
-                            value_bytes = [pack_func(val[i]) for i in range(ary)]
-                        else:
-                            value_bytes = [pack_func(val), ]
+        if isinstance(value, Mapping):
+            for name, _, member_offset, pack in self._members:
+                pack(buffer, offset + member_offset, value[name])
+        else:
+            for _, index, member_offset, pack in self._members:
+                pack(buffer, offset + member_offset, value[index])
+
+
+def _atomic_member_packer(datatype, array):
+    count = array or 1
+    packer = Struct(f'<{count}{CODECS[datatype].format}')
+    if datatype == 'DWORD':  # boolean arrays
+        def pack(buffer, offset, value):
+            data = _pack_bools(value, count * 32)
+            if len(data) != count * 4:  # slice assignment would resize the buffer and shift the later members
+                raise RequestError(f'boolean arrays must pack to {count * 4} bytes: not {len(data)}')
+            buffer[offset:offset + count * 4] = data
+    elif array:
+        def pack(buffer, offset, value):
+            packer.pack_into(buffer, offset, *value[:count])
+    else:
+        def pack(buffer, offset, value):
+            packer.pack_into(buffer, offset, value)
+    return pack
 
-                val_bytes = list(itertools.chain.from_iterable(value_bytes))
-                data[offset:offset+len(val_bytes)] = val_bytes
 
-        except Exception as err:
-            raise RequestError('Value Invalid for Structure') from err
+def _bit_member_packer(mask):
+    def pack(buffer, offset, value):
+        if value:
+            buffer[offset] |= mask
+        else:
+            buffer[offset] &= ~mask & 0xFF
+    return pack
+
+
+def _struct_member_packer(encoder, array):
+    if array:
+        def pack(buffer, offset, value):
+            for i in range(array):
+                encoder.encode_into(buffer, offset + i * encoder.size, value[i])
+    else:
+        def pack(buffer, offset, value):
+            encoder.encode_into(buffer, offset, value)
+    return pack
+
 
-    return bytes(data)
+#: returns the encoder for a structure data type, compiled the first time it is used
+struct_encoder = util.DataTypeCache(StructEncoder)
 
 
 def _bit_request(tag_data, bit_requests):
@@ -1346,11 +2246,12 @@ def tag_request_path(tag, tag_cache, use_instance_ids):
     if tags:
         base, *attrs = tags
         base_tag, index = _find_tag_index(base)
-        if use_instance_ids and base_tag in tag_cache:
+        instance_id = tag_cache[base_tag]['instance_id'] if base_tag in tag_cache else None
+        if use_instance_ids and instance_id is not None:
             rp = [CLASS_TYPE['8-bit'],
                   ClassCode.symbol_object,
                   INSTANCE_TYPE['16-bit'],
-                  Pack.uint(tag_cache[base_tag]['instance_id'])]
+                  Pack.uint(instance_id)]
         else:
             base_len = len(base_tag)
             rp = [EXTENDED_SYMBOL,
@@ -26,6 +26,8 @@ from .map import EnumMap
 from .bytes_ import Pack, Unpack
 
 HEADER_SIZE = 24
+MAX_ENCAPSULATION_DATA = 0xFFFF  # length field in the encapsulation header is a UINT
+MAX_RECONNECT_DELAY = 30  # seconds, upper limit for the reconnect backoff
 
 # used to estimate packet size  and determine
 # when to start a new packet
@@ -47,6 +49,8 @@ PRIORITY = b'\x0a'
 TIMEOUT_TICKS = b'\x05'
 TIMEOUT_MULTIPLIER = b'\x07'
 TRANSPORT_CLASS = b'\xa3'
+CLASS1_TRANSPORT_CLASS = b'\x01'  # class 1, cyclic trigger
+CLASS1_UDP_PORT = 0x08AE  # 2222
 BASE_TAG_BIT = 1 << 26
 
 SEC_TO_US = 1_000_000  # seconds to microseconds
@@ -216,6 +220,12 @@ class AddressItem(EnumMap):
     connection = b'\xa1\x00'
     null = b'\x00\x00'
     uccm = b'\x00\x00'
+    sequenced = b'\x02\x80'
+
+
+class SockaddrItem(EnumMap):
+    o_t = b'\x00\x80'
+    t_o = b'\x01\x80'
 
 
 class StringTypeLenSize(EnumMap):
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 Ian Ottoway <ian@ottoway.dev>
+# Copyright (c) 2014 Agostino Ruscito <ruscito@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+__all__ = ['FleetPoller', 'ScanResult']
+
+import asyncio
+import datetime
+import logging
+import time
+from typing import NamedTuple, List, Optional, Mapping, Sequence, Tuple, Dict, Callable
+from reprlib import repr as _r
+
+from .async_ import AsyncLogixDriver
+from .exceptions import PycommError
+from .tag import Tag
+
+
+class ScanResult(NamedTuple):
+    """
+    The result of reading all the tags of a controller once
+    """
+    path: str
+    timestamp: datetime.datetime  #: (UTC) when the scan was started
+    tags: List[Tag]
+    duration: float  #: seconds taken to read all the tags
+    error: Optional[str] = None
+
+    def __bool__(self):
+        return self.error is None
+
+    def __str__(self):
+        return f'{self.path}, {self.timestamp}, {_r(self.tags)}, {self.duration:.3f}s, {self.error}'
+
+
+class FleetPoller:
+    """
+    Reads tags from many controllers concurrently, each at its own rate.  All the controllers are polled from a single
+    event loop using the :class:`~pycomm3.AsyncLogixDriver`, so a single thread can poll hundreds of controllers.
+
+    The drivers are created and opened when a controller is first scanned.  If a scan fails, the driver is closed and
+    reopened on the next scan, the uploaded tag definitions are kept so reopening does not upload them again.
+
+    >>> controllers = {
+    ...     '10.20.30.100': (['tag1', 'tag2'], 1.0),
+    ...     '10.20.30.101/1': (['tag3'], 0.5),
+    ... }
+    >>> async with FleetPoller(controllers) as fleet:
+    ...     async for result in fleet.poll():
+    ...         print(result.path, result.duration, result.tags)
+
+    """
+    __log = logging.getLogger(f'{__module__}.{__qualname__}')
+
+    def __init__(self, controllers: Mapping[str, Tuple[Sequence[str], float]], max_concurrent: int = 16,
+                 **driver_kwargs):
+        """
+        :param controllers: dict of ``{path: (tags, rate)}``, where ``tags`` is a list of tags to read from the
+                            controller and ``rate`` is the seconds between the start of each scan
+        :param max_concurrent: maximum number of controllers to scan at the same time
+        :param driver_kwargs: keyword arguments passed to each :class:`~pycomm3.AsyncLogixDriver`
+        """
+        self._controllers = {path: (list(tags), rate) for path, (tags, rate) in controllers.items()}
+        self._max_concurrent = max(max_concurrent, 1)
+        self._driver_kwargs = driver_kwargs
+        self._drivers = {}
+        self._durations = {}
+        self._semaphore = None
+        self._tasks = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+        return False
+
+    @property
+    def durations(self) -> Dict[str, float]:
+        """
+        The duration (seconds) of the last scan of each controller
+        """
+        return dict(self._durations)
+
+    @property
+    def drivers(self) -> Dict[str, AsyncLogixDriver]:
+        """
+        The driver for each controller that has been scanned
+        """
+        return dict(self._drivers)
+
+    async def scan(self) -> Dict[str, ScanResult]:
+        """
+        Scans every controller once, concurrently
+
+        :return: dict of ``{path: ScanResult}``
+        """
+        results = await asyncio.gather(*(self._scan(path, tags) for path, (tags, _) in self._controllers.items()))
+        return {result.path: result for result in results}
+
+    async def poll(self):
+        """
+        Continuously scans every controller at its rate, yielding each result as it completes.
+        Scanning stops when the poller is closed.
+
+        :return: an async generator of ``ScanResult``
+        """
+        queue = asyncio.Queue()
+        tasks = [asyncio.ensure_future(self._poll_controller(path, tags, rate, queue))
+                 for path, (tags, rate) in self._controllers.items()]
+        self._tasks.extend(tasks)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            await _cancel(tasks)
+
+    def run(self, callback: Callable[[ScanResult], None], duration: Optional[float] = None):
+        """
+        Runs :meth:`poll` in a new event loop, blocking until ``duration`` seconds have passed (forever if None).
+        ``callback`` is called with each ``ScanResult`` as it completes.
+        """
+        async def _run():
+            async with self:
+                start = time.perf_counter()
+                async for result in self.poll():
+                    callback(result)
+                    if duration is not None and time.perf_counter() - start >= duration:
+                        break
+
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(_run())
+        finally:
+            loop.close()
+
+    async def close(self):
+        """
+        Stops polling and closes all the drivers
+        """
+        tasks, self._tasks = self._tasks, []
+        await _cancel(tasks)
+
+        drivers, self._drivers = self._drivers, {}
+        for path, driver in drivers.items():
+            await self._close_driver(path, driver)
+
+    async def _poll_controller(self, path, tags, rate, queue):
+        while True:
+            start = time.perf_counter()
+            await queue.put(await self._scan(path, tags))
+            await asyncio.sleep(max(rate - (time.perf_counter() - start), 0))
+
+    async def _scan(self, path, tags) -> ScanResult:
+        if self._semaphore is None:  # created on first use so it belongs to the running event loop
+            self._semaphore = asyncio.Semaphore(self._max_concurrent)
+
+        async with self._semaphore:
+            timestamp = datetime.datetime.now(datetime.timezone.utc)
+            start = time.perf_counter()
+            try:
+                driver = await self._open_driver(path)
+                values = await driver.read(*tags)
+                if len(tags) == 1:
+                    values = [values]
+                error = None
+            except asyncio.CancelledError:  # a subclass of Exception before 3.8
+                raise
+            except Exception as err:
+                # any error is reported in the result, so polling the controller carries on
+                if isinstance(err, PycommError):
+                    self.__log.warning(f'Scan of {path} failed: {err}')
+                    error = str(err)
+                else:
+                    self.__log.exception(f'Scan of {path} failed')
+                    error = f'{type(err).__name__}: {err}'
+                values = []
+                driver = self._drivers.get(path)
+                if driver is not None:
+                    await self._close_driver(path, driver)
+            duration = time.perf_counter() - start
+
+        self._durations[path] = duration
+        return ScanResult(path, timestamp, values, duration, error)
+
+    async def _open_driver(self, path) -> AsyncLogixDriver:
+        driver = self._drivers.get(path)
+        if driver is None:
+            driver = self._drivers[path] = AsyncLogixDriver(path, **self._driver_kwargs)
+        if not driver.connected:
+            await driver.open()
+        return driver
+
+    async def _close_driver(self, path, driver):
+        try:
+            await driver.close()
+        except asyncio.CancelledError:
+            raise
+        except Exception as err:
+            self.__log.warning(f'Error closing connection to {path}: {err}')
+
+
+async def _cancel(tasks):
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
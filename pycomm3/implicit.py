@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 Ian Ottoway <ian@ottoway.dev>
+# Copyright (c) 2014 Agostino Ruscito <ruscito@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+__all__ = ['TagConsumer', ]
+
+import logging
+import time
+from os import urandom
+from typing import Optional, Iterator
+
+from .bytes_ import Pack, Unpack
+from .const import (PRIORITY, TIMEOUT_TICKS, TIMEOUT_MULTIPLIER, CLASS1_TRANSPORT_CLASS, CLASS1_UDP_PORT,
+                    EXTENDED_SYMBOL, STRUCTURE_READ_REPLY, ClassCode, ConnectionManagerService,
+                    ConnectionManagerInstance, DataType, DataTypeSize, AddressItem, DataItem)
+from .exceptions import CommError, DataError, RequestError
+from .packets import parse_read_reply
+from .socket_ import UDPSocket
+from .tag import Tag
+
+P2P_SCHEDULED_FIXED = 0b_0100_1000_0000_0000  # point-to-point, scheduled priority, fixed size - CIP Vol 1 3-5.5.1.1
+
+
+class TagConsumer:
+    """
+    Consumes a produced tag from a Logix controller over a class 1 (implicit I/O) connection.  Instead of polling,
+    the controller sends the value of the tag over UDP every RPI, without using the message queue of the controller.
+    The tag must be configured as a produced tag in the controller, the tag definitions uploaded by the driver
+    (:meth:`~pycomm3.LogixDriver.get_tag_list`) are used to decode the data.
+
+    The connection is kept alive by heartbeats sent while waiting in :meth:`receive`, so the consumer should be
+    read continuously or else the controller will close the connection after the RPI times the timeout multiplier.
+
+    >>> with LogixDriver('10.20.30.100') as plc, TagConsumer(plc, 'ProducedTag', rpi=10) as consumer:
+    ...     for tag in consumer:
+    ...         print(tag.value)
+
+    """
+    __log = logging.getLogger(f'{__module__}.{__qualname__}')
+
+    def __init__(self, plc, tag: str, rpi: float = 10.0, port: int = CLASS1_UDP_PORT, local_address: str = '0.0.0.0'):
+        """
+        :param plc: a connected :class:`~pycomm3.LogixDriver`, used to open and close the class 1 connection
+        :param tag: name of the produced tag
+        :param rpi: requested packet interval in milliseconds
+        :param port: local UDP port to receive the data on, the controller is told to use it if not the default (2222)
+        :param local_address: local address to receive the data on
+        """
+        self._plc = plc
+        self.tag = tag
+        self.rpi = rpi
+        self._port = port
+        self._local_address = local_address
+        self._sock = None
+        self._o_t_cid = None
+        self._t_o_cid = None
+        self._csn = None
+        self._o_t_sequence = 0
+        self._t_o_sequence = None
+        self._next_heartbeat = 0
+        self.last = None  #: the last value received, a ``Tag``
+
+        try:
+            self._tag_info = plc.tags[tag]
+        except KeyError:
+            raise RequestError(f'Tag {tag!r} not found, produced tags must be uploaded with get_tag_list') from None
+
+        self._elements = self._tag_info['dimensions'][0] if self._tag_info['dim'] else 1
+        self._size = _tag_data_size(self._tag_info, self._elements)
+        self._type_header = _tag_type_header(self._tag_info)
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def __iter__(self) -> Iterator[Tag]:
+        while self.connected:
+            tag = self.receive()
+            if tag is not None:
+                yield tag
+
+    @property
+    def connected(self) -> bool:
+        return self._o_t_cid is not None
+
+    @property
+    def port(self) -> int:
+        """
+        local UDP port the data is received on
+        """
+        return self._sock.port if self._sock else self._port
+
+    def open(self):
+        """
+        Opens the class 1 connection with a *Forward Open* sent using the driver.
+
+        :raises CommError: if the connection could not be opened
+        """
+        if self.connected:
+            return
+
+        self._sock = UDPSocket()
+        self._sock.bind(self._local_address, self._port)
+        self._t_o_cid = urandom(4)
+        self._csn = urandom(2)
+
+        request = self._plc._generic_message_request(**self._forward_open_message())
+        if self.port != CLASS1_UDP_PORT:
+            request.sockaddr_port = self.port
+        response = request.send()
+        if not response:
+            self._sock.close()
+            self._sock = None
+            raise CommError(f'Forward Open for produced tag {self.tag!r} failed - {response.error}')
+
+        self._o_t_cid = bytes(response.value[:4])
+        self._t_o_sequence = None
+        self._next_heartbeat = 0
+        self.__log.info(f'Class 1 connection opened for {self.tag!r}, T->O CID={self._t_o_cid!r}')
+
+    def close(self):
+        """
+        Closes the class 1 connection with a *Forward Close* and stops receiving data.
+        """
+        try:
+            if self.connected and self._plc.connected:
+                response = self._plc.generic_message(**self._forward_close_message())
+                if not response:
+                    self.__log.warning(f'Forward Close for {self.tag!r} failed - {response.error}')
+        finally:
+            self._o_t_cid = None
+            if self._sock is not None:
+                self._sock.close()
+                self._sock = None
+
+    def receive(self, timeout: Optional[float] = None) -> Optional[Tag]:
+        """
+        Waits for the next value of the tag, sending heartbeats to the controller while waiting.
+
+        :param timeout: seconds to wait, by default 32 times the RPI
+        :return: the new value, or ``None`` if the timeout expired
+        """
+        if not self.connected:
+            raise CommError('Class 1 connection is not open')
+
+        rpi = self.rpi / 1000
+        deadline = time.monotonic() + (timeout if timeout is not None else rpi * 32)
+        while True:
+            now = time.monotonic()
+            if now >= self._next_heartbeat:
+                self._send_heartbeat()
+                self._next_heartbeat = now + rpi
+
+            wait = min(deadline, self._next_heartbeat) - time.monotonic()
+            received = self._sock.receive_from(max(wait, 0))
+            if received is not None:
+                tag = self._decode(received[0])
+                if tag is not None:
+                    self.last = tag
+                    return tag
+            elif time.monotonic() >= deadline:
+                return None
+
+    def _send_heartbeat(self):
+        self._o_t_sequence = (self._o_t_sequence + 1) & 0xFFFFFFFF
+        msg = b''.join([
+            Pack.uint(2),  # item count
+            AddressItem.sequenced,
+            Pack.uint(8),
+            self._o_t_cid,
+            Pack.udint(self._o_t_sequence),
+            DataItem.connected,
+            Pack.uint(2),
+            Pack.uint(self._o_t_sequence & 0xFFFF),  # CIP sequence count, no data in a heartbeat
+        ])
+        try:
+            self._sock.send_to(msg, self._plc._cfg['ip address'], CLASS1_UDP_PORT)
+        except CommError as err:
+            self.__log.warning(f'Failed to send heartbeat: {err}')
+
+    def _decode(self, frame) -> Optional[Tag]:
+        """
+        Decodes a class 1 frame sent by the target, frames for other connections and old or duplicate frames
+        are ignored.
+        """
+        try:
+            items = _parse_cpf(frame)
+            address = items[AddressItem.sequenced]
+            data = items[DataItem.connected]
+        except (LookupError, ValueError):
+            self.__log.debug(f'Ignoring invalid class 1 frame: {frame!r}')
+            return None
+
+        if address[:4] != self._t_o_cid:
+            return None
+
+        sequence = Unpack.udint(address[4:8])
+        if self._t_o_sequence is not None and not 0 < (sequence - self._t_o_sequence) & 0xFFFFFFFF < 0x80000000:
+            return None  # older than or the same as the last frame received
+        self._t_o_sequence = sequence
+
+        try:
+            value, data_type = parse_read_reply(self._type_header + data[2:2 + self._size],
+                                                self._tag_info, self._elements)
+            return Tag(self.tag, value, data_type, None)
+        except Exception as err:
+            raise DataError(f'Failed to decode produced tag {self.tag!r}') from err
+
+    def _connection_path(self, pad_len=False):
+        name = self.tag.encode()
+        symbol = EXTENDED_SYMBOL + Pack.usint(len(name)) + name
+        return Pack.epath(self._plc._cfg['cip_path'] + symbol, pad_len=pad_len)
+
+    def _forward_open_message(self) -> dict:
+        rpi = Pack.udint(int(self.rpi * 1000))  # microseconds
+        forward_open_msg = [
+            PRIORITY,
+            TIMEOUT_TICKS,
+            b'\x00\x00\x00\x00',  # O->T connection ID, chosen by the target
+            self._t_o_cid,  # T->O connection ID, chosen by us for point-to-point connections
+            self._csn,
+            self._plc._cfg['vid'],
+            self._plc._cfg['vsn'],
+            TIMEOUT_MULTIPLIER,
+            b'\x00\x00\x00',  # reserved
+            rpi,  # O->T RPI
+            Pack.uint(P2P_SCHEDULED_FIXED | 2),  # O->T heartbeat, only the sequence count
+            rpi,  # T->O RPI
+            Pack.uint(P2P_SCHEDULED_FIXED | (self._size + 2)),  # T->O tag data + sequence count
+            CLASS1_TRANSPORT_CLASS,
+        ]
+        return {
+            'service': ConnectionManagerService.forward_open,
+            'class_code': ClassCode.connection_manager,
+            'instance': ConnectionManagerInstance.open_request,
+            'request_data': b''.join(forward_open_msg),
+            'route_path': self._connection_path(),
+            'connected': False,
+        }
+
+    def _forward_close_message(self) -> dict:
+        forward_close_msg = [
+            PRIORITY,
+            TIMEOUT_TICKS,
+            self._csn,
+            self._plc._cfg['vid'],
+            self._plc._cfg['vsn'],
+        ]
+        return {
+            'service': ConnectionManagerService.forward_close,
+            'class_code': ClassCode.connection_manager,
+            'instance': ConnectionManagerInstance.open_request,
+            'connected': False,
+            'route_path': self._connection_path(pad_len=True),
+            'request_data': b''.join(forward_close_msg),
+            'name': '__FORWARD_CLOSE__'
+        }
+
+
+def _parse_cpf(frame) -> dict:
+    """
+    Parses the common packet format items of a class 1 frame into a dict of ``{type id: item data}``
+    """
+    frame = memoryview(frame)
+    items = {}
+    offset = 2
+    for _ in range(Unpack.uint(frame[:2])):
+        type_id = bytes(frame[offset:offset + 2])
+        length = Unpack.uint(frame[offset + 2:offset + 4])
+        items[type_id] = frame[offset + 4:offset + 4 + length]
+        offset += 4 + length
+    if offset > len(frame):
+        raise ValueError('Frame is too short')
+    return items
+
+
+def _tag_type_header(tag_info) -> bytes:
+    """
+    The type header of a read reply for the tag, so the produced data can be decoded like a read reply
+    """
+    if tag_info['tag_type'] == 'struct':
+        return STRUCTURE_READ_REPLY + Pack.uint(tag_info['data_type']['template']['structure_handle'])
+    return Pack.uint(DataType[tag_info['data_type']])
+
+
+def _tag_data_size(tag_info, elements) -> int:
+    if tag_info['tag_type'] == 'struct':
+        return tag_info['data_type']['template']['structure_size'] * elements
+    return DataTypeSize[tag_info['data_type']] * elements
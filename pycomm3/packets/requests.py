@@ -23,7 +23,7 @@
 #
 
 import logging
-from typing import Union
+from typing import Union, Iterable, Iterator, List, Tuple
 from reprlib import repr as _r
 
 from . import Packet, DataFormatType
@@ -32,11 +32,12 @@ from . import (ResponsePacket, SendUnitDataResponsePacket, ReadTagServiceRespons
                MultiServiceResponsePacket, ReadTagFragmentedServiceResponsePacket, WriteTagServiceResponsePacket,
                WriteTagFragmentedServiceResponsePacket, GenericUnconnectedResponsePacket,
                GenericConnectedResponsePacket)
-from ..exceptions import CommError, RequestError
+from ..exceptions import CommError, RequestError, DataError
 from ..bytes_ import Pack, print_bytes_msg
 from ..const import (EncapsulationCommand, INSUFFICIENT_PACKETS, DataItem, AddressItem, EXTENDED_SYMBOL, ELEMENT_TYPE,
                      Services, CLASS_TYPE, INSTANCE_TYPE, DataType, DataTypeSize, ConnectionManagerService,
-                     ClassCode, Services, STRUCTURE_READ_REPLY, PRIORITY, TIMEOUT_TICKS, ATTRIBUTE_TYPE)
+                     ClassCode, Services, STRUCTURE_READ_REPLY, PRIORITY, TIMEOUT_TICKS, ATTRIBUTE_TYPE,
+                     SockaddrItem)
 
 
 class RequestPacket(Packet):
@@ -48,6 +49,7 @@ class RequestPacket(Packet):
     _response_class = ResponsePacket
     _response_args = ()
     _response_kwargs = {}
+    _reply_expected = True
     type_ = None
     VERBOSE_DEBUG = False
 
@@ -56,6 +58,7 @@ class RequestPacket(Packet):
         self._msg = []  # message data
         self._plc = plc
         self.error = None
+        self.context = plc._cfg['context']  # sender context, echoed back by the target in the reply
 
     def add(self, *value: bytes):
         self._msg.extend(value)
@@ -83,7 +86,7 @@ class RequestPacket(Packet):
                 Pack.uint(length),  # Length UINT
                 Pack.udint(self._plc._session),  # Session Handle UDINT
                 b'\x00\x00\x00\x00',  # Status UDINT
-                self._plc._cfg['context'],  # Sender Context 8 bytes
+                self.context,  # Sender Context 8 bytes
                 Pack.udint(self._plc._cfg['option']),  # Option UDINT
             ])
 
@@ -127,11 +130,17 @@ class RequestPacket(Packet):
                 self.__log.debug(print_bytes_msg(reply, '<<< RECEIVE <<<'))
             return reply
 
-    def send(self) -> ResponsePacket:
+    def _exchange(self):
+        """
+        Generator implementing the request/reply exchange for this packet.  It yields each message to be sent
+        and expects the raw reply for that message to be sent back into it. The response packet is the return value.
+
+        This keeps the packets independent of how they are actually sent, used by both :meth:`send` and the
+        asyncio driver.
+        """
         if not self.error:
-            self._send(self._build_request())
+            reply = yield self._build_request()
             self.__log.debug(f'Sent: {self!r}')
-            reply = self._receive()
             response = self._response_class(reply, *self._response_args, **self._response_kwargs)
         else:
             response = self._response_class(*self._response_args, **self._response_kwargs)
@@ -139,12 +148,108 @@ class RequestPacket(Packet):
         self.__log.debug(f'Received: {response!r}')
         return response
 
+    def send(self) -> ResponsePacket:
+        exchange = self._exchange()
+        try:
+            message = next(exchange)
+            while True:
+                self._send(message)
+                message = exchange.send(self._receive() if self._reply_expected else b'')
+        except StopIteration as stop:
+            return stop.value
+
+    def _check_reply(self, reply):
+        """
+        Checks the reply is for the message last sent by this request, raises ``CommError`` if not
+        """
+
     def __repr__(self):
         return f'{self.__class__.__name__}(message={_r(self._msg)})'
 
     __str__ = __repr__
 
 
+class RequestPipeline:
+    """
+    Keeps multiple requests in flight on the same connection.  Each request is given a unique sender context and
+    replies are matched back to their request using the context echoed by the target.  Requests that take
+    multiple messages (fragmented reads/writes) send their next message as soon as the previous reply is received.
+    The contexts are taken from ``contexts``, which should be kept by the connection so a context is never reused
+    and a reply left over from an earlier pipeline cannot be mistaken for the reply to a new request.
+
+    The pipeline does not do any I/O itself, it only provides the messages to send and consumes the replies received.
+    Completed requests are stored in :attr:`responses` as ``(request, response)`` tuples,
+    if the request failed the response will be the exception raised.
+    """
+    __log = logging.getLogger(f'{__module__}.{__qualname__}')
+
+    def __init__(self, requests: Iterable[RequestPacket], depth: int, contexts: Iterator[int]):
+        self._requests = iter(requests)
+        self._depth = depth
+        self._contexts = contexts
+        self._in_flight = {}
+        self.responses = []
+
+    @property
+    def in_flight(self) -> int:
+        """
+        Number of requests currently waiting on a reply
+        """
+        return len(self._in_flight)
+
+    def fill(self) -> List[Tuple[RequestPacket, bytes]]:
+        """
+        Starts new requests until there are ``depth`` requests in flight.
+
+        :return: list of ``(request, message)`` tuples to send
+        """
+        messages = []
+        while len(self._in_flight) < self._depth:
+            request = next(self._requests, None)
+            if request is None:
+                break
+            request.context = Pack.ulint(next(self._contexts))
+            message = self._step(request, request._exchange(), None)
+            if message is not None:
+                messages.append((request, message))
+
+        return messages
+
+    def reply(self, reply: bytes) -> List[Tuple[RequestPacket, bytes]]:
+        """
+        Passes the reply to the request it belongs to, then fills the pipeline back up.
+
+        :return: list of ``(request, message)`` tuples to send
+        """
+        context = bytes(reply[12:20])
+        try:
+            request, exchange = self._in_flight.pop(context)
+        except KeyError:
+            raise CommError(f'Received reply for unknown sender context: {context!r}')
+        request._check_reply(reply)
+
+        messages = []
+        message = self._step(request, exchange, reply)
+        if message is not None:
+            messages.append((request, message))
+
+        return messages + self.fill()
+
+    def _step(self, request, exchange, reply):
+        try:
+            message = next(exchange) if reply is None else exchange.send(reply)
+        except StopIteration as stop:
+            self.responses.append((request, stop.value))
+        except (RequestError, DataError) as err:
+            self.__log.exception('Error sending request')
+            self.responses.append((request, err))
+        else:
+            self._in_flight[request.context] = (request, exchange)
+            return message
+
+        return None
+
+
 class SendUnitDataRequestPacket(RequestPacket):
     __log = logging.getLogger(f'{__module__}.{__qualname__}')
     _message_type = DataItem.connected
@@ -154,7 +259,19 @@ class SendUnitDataRequestPacket(RequestPacket):
 
     def __init__(self, plc):
         super().__init__(plc)
-        self._msg = [Pack.uint(plc._sequence), ]
+        self._msg = [b'\x00\x00', ]  # sequence count, assigned when the request is built
+
+    def _build_request(self):
+        # the sequence count is taken from the connection the request is sent on,
+        # so a request may be built by one driver and sent over a different (pooled) connection
+        self._msg[0] = Pack.uint(self._plc._sequence)
+        return super()._build_request()
+
+    def _check_reply(self, reply):
+        # the target echoes the sequence count at the start of the connected data item
+        sequence = bytes(reply[44:46])
+        if len(sequence) == 2 and sequence != self._msg[0]:
+            raise CommError(f'Received reply for sequence count {sequence!r}, expected {self._msg[0]!r}')
 
 
 class ReadTagServiceRequestPacket(SendUnitDataRequestPacket):
@@ -168,6 +285,8 @@ class ReadTagServiceRequestPacket(SendUnitDataRequestPacket):
         self.elements = None
         self.tag_info = None
         self.request_id = None
+        self.as_numpy = False
+        self.lazy_structs = False
 
     def add(self, tag, request_path, elements, tag_info, request_id):
         self.tag = tag
@@ -183,12 +302,12 @@ class ReadTagServiceRequestPacket(SendUnitDataRequestPacket):
             Pack.uint(self.elements),
         )
 
-    def send(self):
+    def _exchange(self):
         if not self.error:
-            self._send(self._build_request())
+            reply = yield self._build_request()
             self.__log.debug(f'Sent: {self!r}')
-            reply = self._receive()
-            response = ReadTagServiceResponsePacket(reply, elements=self.elements, tag_info=self.tag_info, tag=self.tag)
+            response = ReadTagServiceResponsePacket(reply, elements=self.elements, tag_info=self.tag_info, tag=self.tag,
+                                                    as_numpy=self.as_numpy, lazy_structs=self.lazy_structs)
         else:
             response = ReadTagServiceResponsePacket(tag=self.tag)
             response._error = self.error
@@ -211,6 +330,8 @@ class ReadTagFragmentedServiceRequestPacket(SendUnitDataRequestPacket):
         self.tag_info = None
         self.request_path = None
         self.request_id = None
+        self.as_numpy = False
+        self.lazy_structs = False
 
     def add(self, tag, request_path, elements, tag_info, request_id):
         self.tag = tag
@@ -221,7 +342,7 @@ class ReadTagFragmentedServiceRequestPacket(SendUnitDataRequestPacket):
         if self.request_path is None:
             self.error = 'Invalid Tag Request Path'
 
-    def send(self):
+    def _exchange(self):
         if not self.error:
             offset = 0
             responses = []
@@ -230,15 +351,15 @@ class ReadTagFragmentedServiceRequestPacket(SendUnitDataRequestPacket):
                                   self.request_path,
                                   Pack.uint(self.elements),
                                   Pack.dint(offset)])
-                self._send(self._build_request())
+                reply = yield self._build_request()
                 self.__log.debug(f'Sent: {self!r} (offset={offset})')
-                reply = self._receive()
-                response = ReadTagFragmentedServiceResponsePacket(reply, self.tag_info, self.elements)
+                response = ReadTagFragmentedServiceResponsePacket(reply, self.tag_info, self.elements, self.as_numpy,
+                                                                  self.lazy_structs)
                 self.__log.debug(f'Received: {response!r}')
                 responses.append(response)
                 if response.service_status == INSUFFICIENT_PACKETS:
                     offset += len(response.bytes_)
-                    self._msg = [Pack.uint(self._plc._sequence)]
+                    self._msg = self._msg[:1]
                 else:
                     offset = None
             if all(responses):
@@ -335,21 +456,25 @@ class WriteTagFragmentedServiceRequestPacket(SendUnitDataRequestPacket):
             self.__log.exception('Failed adding request')
             self.error = err
 
-    def send(self):
+    def _exchange(self):
         if not self.error:
             responses = []
             segment_size = self._plc.connection_size - (len(self.request_path) + len(self._packed_type)
                                                         + 9)  # 9 = len of other stuff in the path
 
-            pack_func = Pack[self.data_type] if self.tag_info['tag_type'] == 'atomic' else lambda x: x
-            segments = (self.value[i:i+segment_size]
-                        for i in range(0, len(self.value), segment_size))
+            if isinstance(self.value, (bytes, bytearray, memoryview)):
+                # segments are slices of a view of the packed value, the data is only copied when building the message
+                value = memoryview(self.value).cast('B')
+                segments = (value[i:i + segment_size] for i in range(0, len(value), segment_size))
+            else:
+                pack_func = Pack[self.data_type] if self.tag_info['tag_type'] == 'atomic' else lambda x: x
+                segments = (b''.join(pack_func(s) for s in self.value[i:i + segment_size])
+                            for i in range(0, len(self.value), segment_size))
 
             offset = 0
             elements_packed = Pack.uint(self.elements)
 
-            for i, segment in enumerate(segments, start=1):
-                segment_bytes = b''.join(pack_func(s) for s in segment) if not isinstance(segment, bytes) else segment
+            for i, segment_bytes in enumerate(segments, start=1):
                 self._msg.extend((
                     Services.write_tag_fragmented,
                     self.request_path,
@@ -359,14 +484,13 @@ class WriteTagFragmentedServiceRequestPacket(SendUnitDataRequestPacket):
                     segment_bytes
                 ))
 
-                self._send(self._build_request())
+                reply = yield self._build_request()
                 self.__log.debug(f'Sent: {self!r} (part={i} offset={offset})')
-                reply = self._receive()
                 response = WriteTagFragmentedServiceResponsePacket(reply)
                 self.__log.debug(f'Received: {response!r}')
                 responses.append(response)
                 offset += len(segment_bytes)
-                self._msg = [Pack.uint(self._plc._sequence), ]
+                self._msg = self._msg[:1]
 
             if all(responses):
                 final_response = responses[-1]
@@ -387,6 +511,8 @@ class MultiServiceRequestPacket(SendUnitDataRequestPacket):
     def __init__(self, plc):
         super().__init__(plc)
         self.tags = []
+        self.as_numpy = False
+        self.lazy_structs = False
         self._msg.extend((
             Services.multiple_service_request,  # the Request Service
             Pack.usint(2),  # the Request Path Size length in word
@@ -395,12 +521,12 @@ class MultiServiceRequestPacket(SendUnitDataRequestPacket):
             INSTANCE_TYPE["8-bit"],
             b'\x01',  # Instance 1
         ))
-        self._message = None
         self._msg_errors = None
 
     @property
     def message(self) -> bytes:
-        return self._message
+        # built when the request is, so it includes the sequence count of the connection it is sent on
+        return self.build_message(self.tags)
 
     def build_message(self, tags):
         rp_list, errors = [], []
@@ -432,7 +558,6 @@ class MultiServiceRequestPacket(SendUnitDataRequestPacket):
             }
             message = self.build_message(self.tags + [_tag])
             if len(message) < self._plc.connection_size:
-                self._message = message
                 self.tags.append(_tag)
                 return True
             else:
@@ -454,7 +579,6 @@ class MultiServiceRequestPacket(SendUnitDataRequestPacket):
 
             message = self.build_message(self.tags + [_tag])
             if len(message) < self._plc.connection_size:
-                self._message = message
                 self.tags.append(_tag)
                 return True
             else:
@@ -464,13 +588,24 @@ class MultiServiceRequestPacket(SendUnitDataRequestPacket):
             self.__log.error(f'Failed to create request path for {tag}')
             raise RequestError('Failed to create request path')
 
-    def send(self):
+    def add_service(self, service, request_path, request_data, name, request_id):
+        """
+        Adds any other service to the request, the data of its reply is not parsed and is returned as the value
+        """
+        _tag = {'tag': name, 'rp': service + request_path + request_data, 'service': 'generic',
+                'request_id': request_id}
+        message = self.build_message(self.tags + [_tag])
+        if len(message) < self._plc.connection_size:
+            self.tags.append(_tag)
+            return True
+        return False
+
+    def _exchange(self):
         if not self._msg_errors:
-            request = self._build_request()
-            self._send(request)
+            reply = yield self._build_request()
             self.__log.debug(f'Sent: {self!r}')
-            reply = self._receive()
-            response = MultiServiceResponsePacket(reply, tags=self.tags)
+            response = MultiServiceResponsePacket(reply, tags=self.tags, as_numpy=self.as_numpy,
+                                                  lazy_structs=self.lazy_structs)
         else:
             self.error = f'Failed to create request path for: {", ".join(self._msg_errors)}'
             response = MultiServiceResponsePacket()
@@ -525,8 +660,22 @@ class SendRRDataRequestPacket(RequestPacket):
     _encap_command = EncapsulationCommand.send_rr_data
     _response_class = SendRRDataResponsePacket
 
+    def __init__(self, plc):
+        super().__init__(plc)
+        self.sockaddr_port = None  # UDP port to receive class 1 data on, sent as a T->O sockaddr info item
+
     def _build_common_packet_format(self, addr_data=None) -> bytes:
-        return super()._build_common_packet_format(addr_data=None)
+        cpf = super()._build_common_packet_format(addr_data=None)
+        if self.sockaddr_port is None:
+            return cpf
+
+        sockaddr = b''.join([
+            b'\x00\x02',  # sin_family (AF_INET), all sockaddr fields are big-endian
+            self.sockaddr_port.to_bytes(2, 'big'),
+            b'\x00\x00\x00\x00',  # sin_addr, target uses the address of the originator
+            b'\x00' * 8,  # sin_zero
+        ])
+        return b''.join([cpf[:6], Pack.uint(3), cpf[8:], SockaddrItem.t_o, Pack.uint(len(sockaddr)), sockaddr])
 
 
 class RegisterSessionRequestPacket(RequestPacket):
@@ -543,10 +692,9 @@ class UnRegisterSessionRequestPacket(RequestPacket):
     _encap_command = EncapsulationCommand.unregister_session
     _response_class = UnRegisterSessionResponsePacket
 
-    def _build_common_packet_format(self, addr_data=None) -> bytes:
-        return b''
+    _reply_expected = False
 
-    def _receive(self):
+    def _build_common_packet_format(self, addr_data=None) -> bytes:
         return b''
 
 
@@ -22,17 +22,24 @@
 # SOFTWARE.
 #
 import logging
-from itertools import tee, zip_longest, chain
+from collections.abc import Mapping
 from reprlib import repr as _r
+from struct import Struct, unpack_from
 
 from . import Packet, DataFormatType
 from .. import util
-from ..bytes_ import Unpack
+from ..bytes_ import Pack, Unpack, CODECS, unpack_ndarray, unpack_bools, np
 from ..const import (SUCCESS, INSUFFICIENT_PACKETS, Services, SERVICE_STATUS, EXTEND_CODES, MULTI_PACKET_SERVICES,
-                     DataType, STRUCTURE_READ_REPLY, DataTypeSize, StringTypeLenSize)
+                     DataType, STRUCTURE_READ_REPLY, StringTypeLenSize)
 
 
 class ResponsePacket(Packet):
+    """
+    Base class for all response packets.
+
+    Replies are parsed in place, ``data`` is a ``memoryview`` of the reply and any slices of it taken while parsing
+    do not copy the underlying bytes.  Only values returned to the user are converted to ``bytes``.
+    """
     __log = logging.getLogger(f'{__module__}.{__qualname__}')
 
     def __init__(self, raw_data: bytes = None, *args, **kwargs):
@@ -80,7 +87,7 @@ class ResponsePacket(Packet):
                 self._error = 'No Reply From PLC'
             else:
                 self.command = self.raw[:2]
-                self.command_status = Unpack.dint(self.raw[8:12])  # encapsulation status check
+                self.command_status = unpack_from('<i', self.raw, 8)[0]  # encapsulation status check
         except Exception as err:
             self._error = f'Failed to parse reply - {err}'
 
@@ -106,8 +113,8 @@ class SendUnitDataResponsePacket(ResponsePacket):
         try:
             super()._parse_reply()
             self.service = Services.get(Services.from_reply(self.raw[46:47]))
-            self.service_status = Unpack.usint(self.raw[48:49])
-            self.data = self.raw[50:]
+            self.service_status = self.raw[48]
+            self.data = memoryview(self.raw)[50:]
         except Exception as err:
             self._error = f'Failed to parse reply - {err}'
 
@@ -136,8 +143,8 @@ class SendRRDataResponsePacket(ResponsePacket):
         try:
             super()._parse_reply()
             self.service = Services.get(Services.from_reply(self.raw[40:41]))
-            self.service_status = Unpack.usint(self.raw[42:43])
-            self.data = self.raw[44:]
+            self.service_status = self.raw[42]
+            self.data = memoryview(self.raw)[44:]
         except Exception as err:
             self._error = f'Failed to parse reply - {err}'
 
@@ -166,7 +173,7 @@ class GenericConnectedResponsePacket(SendUnitDataResponsePacket):
         super()._parse_reply()
 
         if self.data_format is None:
-            self.value = self.data
+            self.value = bytes(self.data) if self.data is not None else None
         elif self.is_valid():
             try:
                 self.value = _parse_data(self.data, self.data_format)
@@ -187,7 +194,7 @@ class GenericUnconnectedResponsePacket(SendRRDataResponsePacket):
         super()._parse_reply()
 
         if self.data_format is None:
-            self.value = self.data
+            self.value = bytes(self.data) if self.data is not None else None
         elif self.is_valid():
             try:
                 self.value = _parse_data(self.data, self.data_format)
@@ -201,23 +208,21 @@ def _parse_data(data, fmt):
     start = 0
     for name, typ in fmt:
         if isinstance(typ, int):
-            value = data[start: start + typ]
+            value = bytes(data[start: start + typ])
             start += typ
         else:
             typ, cnt = util.get_array_index(typ)
-            unpack_func = Unpack[typ]
+            codec = CODECS.get(typ.upper())
 
-            if typ in StringTypeLenSize:
-                value = unpack_func(data[start:])
+            if codec is None:
+                value = Unpack[typ](data[start:])
                 data_size = len(value) + StringTypeLenSize[typ]
-
+            elif cnt:
+                value = tuple(codec.unpack_array(data, start, cnt))
+                data_size = codec.size * cnt
             else:
-                data_size = DataTypeSize[typ]
-                if cnt:
-                    value = tuple(unpack_func(data[i:]) for i in range(start, data_size * cnt, data_size))
-                    data_size *= cnt
-                else:
-                    value = unpack_func(data[start:])
+                value = codec.unpack_from(data, start)
+                data_size = codec.size
 
             start += data_size
 
@@ -230,19 +235,23 @@ def _parse_data(data, fmt):
 class ReadTagServiceResponsePacket(SendUnitDataResponsePacket):
     __log = logging.getLogger(f'{__module__}.{__qualname__}')
 
-    def __init__(self, raw_data: bytes = None, tag_info=None, elements=1, tag=None, *args,  **kwargs):
+    def __init__(self, raw_data: bytes = None, tag_info=None, elements=1, tag=None, as_numpy=False,
+                 lazy_structs=False, *args,  **kwargs):
         self.value = None
         self.elements = elements
         self.data_type = None
         self.tag_info = tag_info
         self.tag = tag
+        self.as_numpy = as_numpy
+        self.lazy_structs = lazy_structs
         super().__init__(raw_data, *args, **kwargs)
 
     def _parse_reply(self):
         try:
             super()._parse_reply()
             if self.is_valid():
-                self.value, self.data_type = parse_read_reply(self.data, self.tag_info, self.elements)
+                self.value, self.data_type = parse_read_reply(self.data, self.tag_info, self.elements,
+                                                              self.as_numpy, self.lazy_structs)
             else:
                 self.value, self.data_type = None, None
         except Exception as err:
@@ -257,11 +266,14 @@ class ReadTagServiceResponsePacket(SendUnitDataResponsePacket):
 class ReadTagFragmentedServiceResponsePacket(SendUnitDataResponsePacket):
     __log = logging.getLogger(f'{__module__}.{__qualname__}')
 
-    def __init__(self, raw_data: bytes = None, tag_info=None, elements=1, *args,  **kwargs):
+    def __init__(self, raw_data: bytes = None, tag_info=None, elements=1, as_numpy=False, lazy_structs=False,
+                 *args,  **kwargs):
         self.value = None
         self.elements = elements
         self.data_type = None
         self.tag_info = tag_info
+        self.as_numpy = as_numpy
+        self.lazy_structs = lazy_structs
         self.bytes_ = None
         super().__init__(raw_data, *args, **kwargs)
 
@@ -277,8 +289,9 @@ class ReadTagFragmentedServiceResponsePacket(SendUnitDataResponsePacket):
     def parse_bytes(self):
         try:
             if self.is_valid():
-                self.value, self.data_type = parse_read_reply(self._data_type + self.bytes_,
-                                                          self.tag_info, self.elements)
+                self.value, self.data_type = parse_read_reply(b''.join((self._data_type, self.bytes_)),
+                                                              self.tag_info, self.elements, self.as_numpy,
+                                                              self.lazy_structs)
             else:
                 self.value, self.data_type = None, None
         except Exception as err:
@@ -305,32 +318,36 @@ class WriteTagFragmentedServiceResponsePacket(SendUnitDataResponsePacket):
 class MultiServiceResponsePacket(SendUnitDataResponsePacket):
     __log = logging.getLogger(f'{__module__}.{__qualname__}')
 
-    def __init__(self, raw_data: bytes = None, tags=None, *args, **kwargs):
+    def __init__(self, raw_data: bytes = None, tags=None, as_numpy=False, lazy_structs=False, *args, **kwargs):
         self.tags = tags
+        self.as_numpy = as_numpy
+        self.lazy_structs = lazy_structs
         self.values = None
         self.request_statuses = None
         super().__init__(raw_data, *args, **kwargs)
 
     def _parse_reply(self):
         super()._parse_reply()
-        num_replies = Unpack.uint(self.data)
-        offset_data = self.data[2:2 + 2 * num_replies]
-        offsets = (Unpack.uint(offset_data[i:i+2]) for i in range(0, len(offset_data), 2))
-        start, end = tee(offsets)  # split offsets into start/end indexes
-        next(end)   # advance end by 1 so 2nd item is the end index for the first item
-        reply_data = [self.data[i:j] for i, j in zip_longest(start, end)]
+        data = self.data
+        num_replies = unpack_from('<H', data)[0]
+        offsets = unpack_from(f'<{num_replies}H', data, 2) + (len(data), )
         values = []
 
-        for data, tag in zip(reply_data, self.tags):
-            service = data[0:1]
-            service_status = data[2]
+        # each reply is parsed directly from the offsets, so the reply data is never copied
+        for start, end, tag in zip(offsets, offsets[1:], self.tags):
+            service = data[start:start + 1]
+            service_status = data[start + 2]
             tag['service_status'] = service_status
             if service_status != SUCCESS:
-                tag['error'] = f'{get_service_status(service_status)} - {get_extended_status(data, 2)}'
+                tag['error'] = f'{get_service_status(service_status)} - {get_extended_status(data, start + 2)}'
 
-            if Services.get(Services.from_reply(service)) == Services.read_tag:
+            if tag['service'] == 'generic':
+                tag['value'] = data[start + 4 + data[start + 3] * 2:end] if service_status == SUCCESS else None
+                tag['data_type'] = None
+            elif Services.get(Services.from_reply(service)) == Services.read_tag:
                 if service_status == SUCCESS:
-                    value, dt = parse_read_reply(data[4:], tag['tag_info'], tag['elements'])
+                    value, dt = parse_read_reply(data[start + 4:end], tag['tag_info'], tag['elements'],
+                                                 self.as_numpy, self.lazy_structs)
                 else:
                     value, dt = None, None
 
@@ -408,7 +425,7 @@ class ListIdentityResponsePacket(ResponsePacket):
     def _parse_reply(self):
         try:
             super()._parse_reply()
-            self.data = self.raw[28:]
+            self.data = memoryview(self.raw)[28:]
             self.identity = _parse_data(self.data, self._data_format)
         except Exception as err:
             self.__log.exception('Failed to parse response')
@@ -424,30 +441,39 @@ class ListIdentityResponsePacket(ResponsePacket):
         return f'{self.__class__.__name__}(identity={self.identity!r}, error={self.error!r})'
 
 
-def parse_read_reply(data, data_type, elements):
+_TYPE_CODE = Struct('<H')
+
+
+def parse_read_reply(data, data_type, elements, as_numpy=False, lazy_structs=False):
     if data[:2] == STRUCTURE_READ_REPLY:
         data = data[4:]
         size = data_type['data_type']['template']['structure_size']
         dt_name = data_type['data_type']['name']
-        if elements > 1:
+        if elements > 1 and as_numpy:
+            value = np.frombuffer(data, struct_dtype(data_type['data_type']), elements)
+        elif lazy_structs:
+            decoder = struct_decoder(data_type['data_type'])
+            if elements > 1:
+                value = [decoder.view(data[i: i + size]) for i in range(0, len(data), size)]
+            else:
+                value = decoder.view(data)
+        elif elements > 1:
             value = [parse_read_reply_struct(data[i: i + size], data_type['data_type'])
                      for i in range(0, len(data), size)]
         else:
             value = parse_read_reply_struct(data, data_type['data_type'])
     else:
-        datatype = DataType[Unpack.uint(data[:2])]
-        dt_name = datatype
-        if elements > 1:
-            func = Unpack[datatype]
-            size = DataTypeSize[datatype]
-            data = data[2:]
-            value = [func(data[i:i + size]) for i in range(0, len(data), size)]
-            if datatype == 'DWORD':
-                value = list(chain.from_iterable(dword_to_bool_array(val) for val in value))
+        type_code = _TYPE_CODE.unpack_from(data)[0]
+        codec = CODECS.get(type_code)
+        datatype = dt_name = DataType[type_code] if codec is None else codec.name
+        if elements > 1 and as_numpy:
+            value = unpack_ndarray(datatype, data[2:])
+        elif datatype == 'DWORD':
+            value = unpack_bools(data[2:2 + 4 * elements])
+        elif elements > 1:
+            value = CODECS[datatype].unpack_array(data, 2)
         else:
-            value = Unpack[datatype](data[2:])
-            if datatype == 'DWORD':
-                value = dword_to_bool_array(value)
+            value = CODECS[datatype].unpack_from(data, 2)
 
     if dt_name == 'DWORD':
         dt_name = f'BOOL[{elements * 32}]'
@@ -458,63 +484,201 @@ def parse_read_reply(data, data_type, elements):
 
 
 def parse_read_reply_struct(data, data_type):
-    values = {}
+    return struct_decoder(data_type).decode(data)
+
+
+class StructDecoder:
+    """
+    Decodes the value of a structure (UDT) into a dict of ``{attribute: value}``.  The decoder is compiled once from
+    the template of the data type, all the atomic members are decoded by a single ``struct.Struct`` with the members
+    at their offsets and nested structures use their own decoders.
+    """
+
+    def __init__(self, data_type):
+        self.name = data_type['name']
+        self.size = data_type['template']['structure_size']
+        self.attributes = data_type['attributes']
+        self._data_type = data_type
+        self._string = data_type.get('string')
+        self._getters = None  # {attribute: function to decode the attribute}, only compiled if views are used
+        self._atomic = []  # (name, index in unpacked values, element count, conversion)
+        self._overlapped = []  # (name, Struct, offset, conversion), members that overlap others are unpacked alone
+        self._bits = []  # (name, byte offset, bit mask)
+        self._structs = []  # (name, offset, element count, decoder)
+
+        fields = []
+        for name in self.attributes:
+            member = data_type['internal_tags'][name]
+            datatype, offset, array = member['data_type'], member['offset'], member.get('array')
+            if member['tag_type'] == 'struct':
+                self._structs.append((name, offset, array, struct_decoder(datatype)))
+            elif datatype == 'BOOL':
+                self._bits.append((name, offset, 1 << member.get('bit', 0)))
+            else:
+                fields.append((offset, name, datatype, array))
 
-    if data_type.get('string'):
-        return parse_string(data)
+        fmt, index, position = ['<'], 0, 0
+        for offset, name, datatype, array in sorted(fields, key=lambda field: field[0]):
+            count = array or 1
+            if datatype == 'DWORD':  # BOOL arrays, unpacked from the bytes of the DWORDs
+                field_fmt, items, convert = f'{count * 4}s', 1, _bools
+            else:
+                field_fmt, items, convert = f'{count}{CODECS[datatype].format}', count, list if array else None
 
-    for tag, type_def in data_type['internal_tags'].items():
-        datatype = type_def['data_type']
-        array = type_def.get('array')
-        offset = type_def['offset']
-        if type_def['tag_type'] == 'atomic':
-            dt_len = DataTypeSize[datatype]
-            func = Unpack[datatype]
-            if array:
-                ary_data = data[offset:offset + (dt_len * array)]
-                value = [func(ary_data[i:i + dt_len]) for i in range(0, array * dt_len, dt_len)]
-                if datatype == 'DWORD':
-                    value = list(chain.from_iterable(dword_to_bool_array(val) for val in value))
+            if offset < position:
+                self._overlapped.append((name, Struct(f'<{field_fmt}'), offset, convert or _first))
             else:
-                if datatype == 'BOOL':
-                    bit = type_def.get('bit', 0)
-                    value = bool(data[offset] & (1 << bit))
-                else:
-                    value = func(data[offset:offset + dt_len])
-                    if datatype == 'DWORD':
-                        value = dword_to_bool_array(value)
+                fmt.append(f'{offset - position}x{field_fmt}')
+                self._atomic.append((name, index, items, convert))
+                index += items
+                position = offset + count * CODECS[datatype].size
+        self._struct = Struct(''.join(fmt))
+
+    def decode(self, data):
+        if self._string:
+            return parse_string(data)
+
+        values = dict.fromkeys(self.attributes)  # keeps the order of the attributes
+        unpacked = self._struct.unpack_from(data)
+        for name, index, count, convert in self._atomic:
+            values[name] = unpacked[index] if convert is None else convert(unpacked[index:index + count])
 
-            values[tag] = value
-        elif datatype.get('string'):
-            str_size = datatype['template']['structure_size']
+        for name, field, offset, convert in self._overlapped:
+            values[name] = convert(field.unpack_from(data, offset))
+
+        for name, offset, mask in self._bits:
+            values[name] = bool(data[offset] & mask)
+
+        for name, offset, array, decoder in self._structs:
             if array:
-                array_data = data[offset:offset + (str_size * array)]
-                values[tag] = [parse_string(array_data[i:i+str_size]) for i in range(0, len(array_data), str_size)]
+                size = decoder.size
+                values[name] = [decoder.decode(data[i:i + size]) for i in range(offset, offset + size * array, size)]
             else:
-                values[tag] = parse_string(data[offset:offset + str_size])
+                values[name] = decoder.decode(data[offset:offset + decoder.size])
+
+        return values
+
+    def view(self, data):
+        """
+        Returns a :class:`StructView` of the data, strings are decoded
+        """
+        if self._string:
+            return parse_string(data)
+        return StructView(data, self)
+
+    def decode_attribute(self, data, name):
+        if self._getters is None:
+            self._getters = {name: _attribute_getter(self._data_type['internal_tags'][name])
+                             for name in self.attributes}
+        return self._getters[name](data)
+
+
+def _attribute_getter(member):
+    datatype, offset, array = member['data_type'], member['offset'], member.get('array')
+    if member['tag_type'] == 'struct':
+        decoder = struct_decoder(datatype)
+        size = decoder.size
+        if array:
+            return lambda data: [decoder.view(data[i:i + size]) for i in range(offset, offset + size * array, size)]
+        return lambda data: decoder.view(data[offset:offset + size])
+
+    if datatype == 'BOOL':
+        mask = 1 << member.get('bit', 0)
+        return lambda data: bool(data[offset] & mask)
+
+    if datatype == 'DWORD':
+        size = 4 * (array or 1)
+        return lambda data: unpack_bools(data[offset:offset + size])
+
+    field = Struct(f'<{array or 1}{CODECS[datatype].format}')
+    convert = list if array else _first
+    return lambda data: convert(field.unpack_from(data, offset))
+
+
+class StructView(Mapping):
+    """
+    Read-only mapping of ``{attribute: value}`` over the data of a structure, an attribute is only decoded the first
+    time it is accessed.  Nested structures are views too, :meth:`to_dict` decodes all the attributes into a dict.
+    """
+    __slots__ = ('_data', '_decoder', '_values')
+
+    def __init__(self, data, decoder: StructDecoder):
+        self._data = data
+        self._decoder = decoder
+        self._values = {}
+
+    def __getitem__(self, name):
+        try:
+            return self._values[name]
+        except KeyError:
+            value = self._values[name] = self._decoder.decode_attribute(self._data, name)
+            return value
+
+    def __contains__(self, name):
+        return name in self._decoder.attributes
+
+    def __iter__(self):
+        return iter(self._decoder.attributes)
+
+    def __len__(self):
+        return len(self._decoder.attributes)
+
+    def to_dict(self) -> dict:
+        return self._decoder.decode(self._data)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self._decoder.name!r}, {_r(self.to_dict())})'
+
+
+#: returns the decoder for a structure data type, compiled the first time it is used
+struct_decoder = util.DataTypeCache(StructDecoder)
+
+
+def _struct_dtype(data_type):
+    """
+    Builds the NumPy structured dtype of a structure data type.  The fields are at the member offsets and the itemsize
+    is the structure size, so the layout (including padding) matches the data of the structure.  BOOL members that
+    are aliased to a bit cannot be fields, their (hidden) host member is included instead.
+    """
+    if np is None:
+        raise ImportError('NumPy is required to create a dtype for a structure')
+
+    names, formats, offsets = [], [], []
+    for name, member in data_type['internal_tags'].items():
+        datatype, array = member['data_type'], member.get('array')
+        if member['tag_type'] == 'struct':
+            fmt = struct_dtype(datatype)
+        elif datatype == 'BOOL':
+            continue
         else:
-            struct_size = datatype['template']['structure_size']
-            if array:
-                ary_data = data[offset:offset + (struct_size * array)]
-                values[tag] = [parse_read_reply_struct(ary_data[i:i + struct_size], datatype) for i in
-                               range(0, len(ary_data), struct_size)]
-            else:
-                values[tag] = parse_read_reply_struct(data[offset:offset + struct_size], datatype)
+            fmt = np.dtype(f'<{CODECS[datatype].format}')
+        names.append(name)
+        formats.append((fmt, (array, )) if array else fmt)
+        offsets.append(member['offset'])
+
+    return np.dtype({'names': names, 'formats': formats, 'offsets': offsets,
+                     'itemsize': data_type['template']['structure_size']})
+
+
+#: returns the NumPy structured dtype for a structure data type, see :func:`_struct_dtype`
+struct_dtype = util.DataTypeCache(_struct_dtype)
+
+
+def _first(values):
+    return values[0]
+
 
-    return {k: v for k, v in values.items() if k in data_type['attributes']}
+def _bools(values):
+    return unpack_bools(values[0])
 
 
 def parse_string(data):
-    str_len = Unpack.dint(data)
-    str_data = data[4:4+str_len]
-    return ''.join(chr(v + 256) if v < 0 else chr(v) for v in str_data)
+    str_len = unpack_from('<i', data)[0]
+    return bytes(data[4:4+str_len]).decode('iso-8859-1')
 
 
 def dword_to_bool_array(dword):
-    bits = [x == '1' for x in bin(dword)[2:]]
-    bools = [False for _ in range(32 - len(bits))] + bits
-    bools.reverse()
-    return bools
+    return unpack_bools(Pack.udint(dword))
 
 
 def get_service_status(status):
@@ -28,7 +28,7 @@ import logging
 import re
 from typing import List, Tuple, Optional, Union
 
-from .bytes_ import Pack, Unpack
+from .bytes_ import Pack, Unpack, CODECS
 from .cip_base import CIPDriver, with_forward_open
 from .const import (CLASS_TYPE, SUCCESS, PCCC_CT, PCCC_DATA_TYPE, PCCC_DATA_SIZE, PCCC_ERROR_CODE,
                     SLC_CMD_CODE, SLC_FNC_READ, SLC_FNC_WRITE, SLC_REPLY_START, PCCC_PATH)
@@ -370,7 +370,8 @@ def _parse_read_reply(tag, data) -> Tag:
         bit_read = tag.get('address_field', 0) == 3
         bit_position = int(tag.get('sub_element') or 0)
         data_size = PCCC_DATA_SIZE[tag['file_type']]
-        unpack_func = Unpack[f'pccc_{tag["file_type"].lower()}']
+        codec = CODECS.get(f'PCCC_{tag["file_type"].upper()}')
+        unpack_func = Unpack[f'pccc_{tag["file_type"].lower()}'] if codec is None else codec.unpack_from
         if bit_read:
             new_value = 0
             if tag['file_type'] in {'T', 'C'}:
@@ -393,8 +394,10 @@ def _parse_read_reply(tag, data) -> Tag:
                        None)
 
         else:
-            values_list = [unpack_func(data[i: i + data_size])
-                           for i in range(0, len(data), data_size)]
+            if codec is None:
+                values_list = [unpack_func(data[i: i + data_size]) for i in range(0, len(data), data_size)]
+            else:
+                values_list = [codec.unpack_from(data, i) for i in range(0, len(data), data_size)]
             if len(values_list) > 1:
                 return Tag(tag['tag'], values_list, tag['file_type'], None)
             else:
@@ -22,21 +22,65 @@
 # SOFTWARE.
 #
 
+import asyncio
 import logging
 import socket
 import struct
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Callable, Optional
 
 from .exceptions import CommError
-from .const import HEADER_SIZE
+from .const import HEADER_SIZE, MAX_ENCAPSULATION_DATA
 
 
-class Socket:
+class Transport(ABC):
+    """
+    Base class for the connection the drivers use to send requests and receive replies, each message is a complete
+    encapsulation frame (header + data).  A driver creates a new transport every time it opens a connection,
+    a different transport can be used by setting the ``transport`` argument of the driver to its class
+    (or any callable that returns a new transport).  Transports for the :class:`~pycomm3.AsyncLogixDriver`
+    implement these methods as coroutines.
+    """
+
+    @abstractmethod
+    def connect(self, host, port):
+        """
+        Connects to the device at ``host`` and ``port``
+        """
+
+    @abstractmethod
+    def send(self, msg, timeout=0) -> int:
+        """
+        Sends the whole message, returns the number of bytes sent
+        """
+
+    @abstractmethod
+    def receive(self, timeout=0) -> bytes:
+        """
+        Receives exactly one encapsulation frame
+        """
+
+    @abstractmethod
+    def close(self):
+        """
+        Closes the connection
+        """
+
+
+class Socket(Transport):
+    """
+    TCP transport, the default for all drivers
+    """
     __log = logging.getLogger(f'{__module__}.{__qualname__}')
 
     def __init__(self, timeout=5.0):
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.sock.settimeout(timeout)
         self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        # receive buffer is reused for every reply, sized for the largest possible encapsulation frame
+        self._buffer = bytearray(HEADER_SIZE + MAX_ENCAPSULATION_DATA)
+        self._buffer_view = memoryview(self._buffer)
 
     def connect(self, host, port):
         try:
@@ -47,10 +91,11 @@ class Socket:
     def send(self, msg, timeout=0):
         if timeout != 0:
             self.sock.settimeout(timeout)
+        msg_view = memoryview(msg)
         total_sent = 0
         while total_sent < len(msg):
             try:
-                sent = self.sock.send(msg[total_sent:])
+                sent = self.sock.send(msg_view[total_sent:])
                 if sent == 0:
                     raise CommError("socket connection broken.")
                 total_sent += sent
@@ -59,17 +104,178 @@ class Socket:
         return total_sent
 
     def receive(self, timeout=0):
+        """
+        Receives exactly one encapsulation frame (header + data).  The frame is read into a reusable buffer and
+        copied out once, replies are kept by the response packets so the buffer itself cannot be returned.
+        """
         try:
             if timeout != 0:
                 self.sock.settimeout(timeout)
-            data = self.sock.recv(4096)
-            data_len = struct.unpack_from('<H', data, 2)[0]
-            while len(data) - HEADER_SIZE < data_len:
-                data += self.sock.recv(4096)
-
-            return data
+            self._receive_into(self._buffer_view[:HEADER_SIZE])
+            frame_len = HEADER_SIZE + struct.unpack_from('<H', self._buffer, 2)[0]
+            self._receive_into(self._buffer_view[HEADER_SIZE:frame_len])
+            return bytes(self._buffer_view[:frame_len])
         except socket.error as err:
             raise CommError('socket connection broken') from err
 
+    def _receive_into(self, view):
+        received, size = 0, len(view)
+        while received < size:
+            count = self.sock.recv_into(view[received:], size - received)
+            if not count:
+                raise CommError('socket connection broken')
+            received += count
+
     def close(self):
         self.sock.close()
+
+
+class LoopbackTransport(Transport):
+    """
+    In-memory transport that passes every request to a Python ``responder`` instead of sending it to a device.
+    The ``responder`` is called with each request frame and returns the reply frame, or ``None`` if the request
+    does not have a reply.  Useful for testing and benchmarking without any hardware or network.
+
+    >>> plc = LogixDriver('10.20.30.100', transport=lambda: LoopbackTransport(my_responder))
+    """
+
+    def __init__(self, responder: Callable[[bytes], Optional[bytes]]):
+        self.responder = responder
+        self.connected = False
+        self._replies = deque()
+
+    def connect(self, host, port):
+        self.connected = True
+
+    def send(self, msg, timeout=0):
+        if not self.connected:
+            raise CommError("socket connection broken.")
+        reply = self.responder(bytes(msg))
+        if reply is not None:
+            self._replies.append(reply)
+        return len(msg)
+
+    def receive(self, timeout=0):
+        if not self._replies:
+            raise CommError('socket connection broken')
+        return self._replies.popleft()
+
+    def close(self):
+        self.connected = False
+        self._replies.clear()
+
+
+class UDPSocket:
+    """
+    UDP socket used for sending unconnected encapsulation commands (like ListIdentity) to many devices at once.
+    Broadcasting is enabled, so requests may be sent to broadcast addresses too.
+    """
+    __log = logging.getLogger(f'{__module__}.{__qualname__}')
+
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        self._buffer = bytearray(HEADER_SIZE + MAX_ENCAPSULATION_DATA)
+
+    def bind(self, host, port):
+        try:
+            self.sock.bind((host, port))
+        except socket.error as err:
+            raise CommError(f'failed to bind to {host}:{port}') from err
+
+    @property
+    def port(self) -> int:
+        return self.sock.getsockname()[1]
+
+    def send_to(self, msg, host, port):
+        try:
+            self.sock.sendto(msg, (host, port))
+        except socket.error as err:
+            raise CommError(f'failed to send to {host}') from err
+
+    def receive_from(self, timeout):
+        """
+        Waits up to ``timeout`` seconds for a datagram, ``timeout`` of 0 only returns an already received datagram
+
+        :return: ``(data, ip address)`` or ``None`` if nothing was received before the timeout
+        """
+        try:
+            if timeout > 0:
+                self.sock.settimeout(timeout)
+            else:
+                self.sock.setblocking(False)
+            count, (host, _) = self.sock.recvfrom_into(self._buffer)
+        except (socket.timeout, BlockingIOError):
+            return None
+        except ConnectionResetError:  # windows reports ICMP port unreachable from a previous send this way
+            return None
+        except socket.error as err:
+            raise CommError('socket receive failed') from err
+
+        return bytes(self._buffer[:count]), host
+
+    def close(self):
+        self.sock.close()
+
+
+class AsyncSocket(Transport):
+    """
+    asyncio streams version of :class:`Socket`, used by the :class:`~pycomm3.AsyncLogixDriver`
+    """
+    __log = logging.getLogger(f'{__module__}.{__qualname__}')
+
+    def __init__(self, timeout=5.0):
+        self.timeout = timeout
+        self._reader = None
+        self._writer = None
+
+    async def connect(self, host, port):
+        try:
+            self._reader, self._writer = await asyncio.wait_for(asyncio.open_connection(host, port), self.timeout)
+        except asyncio.TimeoutError:
+            raise CommError("Socket timeout during connection.")
+
+        sock = self._writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+
+    async def send(self, msg, timeout=0):
+        try:
+            self._writer.write(msg)
+            await asyncio.wait_for(self._writer.drain(), timeout or self.timeout)
+        except (asyncio.TimeoutError, socket.error) as err:
+            raise CommError("socket connection broken.") from err
+        return len(msg)
+
+    async def receive(self, timeout=0):
+        try:
+            header = await asyncio.wait_for(self._reader.readexactly(HEADER_SIZE), timeout or self.timeout)
+            data_len = struct.unpack_from('<H', header, 2)[0]
+            data = await asyncio.wait_for(self._reader.readexactly(data_len), timeout or self.timeout)
+            return header + data
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, socket.error) as err:
+            raise CommError('socket connection broken') from err
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            if hasattr(self._writer, 'wait_closed'):  # added in 3.7
+                await self._writer.wait_closed()
+
+
+class AsyncLoopbackTransport(LoopbackTransport):
+    """
+    asyncio version of :class:`LoopbackTransport`, used with the :class:`~pycomm3.AsyncLogixDriver`
+    """
+
+    async def connect(self, host, port):
+        super().connect(host, port)
+
+    async def send(self, msg, timeout=0):
+        return super().send(msg, timeout)
+
+    async def receive(self, timeout=0):
+        return super().receive(timeout)
+
+    async def close(self):
+        super().close()
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2020 Ian Ottoway <ian@ottoway.dev>
+# Copyright (c) 2014 Agostino Ruscito <ruscito@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""
+Saving and loading the tag definitions uploaded by the :class:`~pycomm3.LogixDriver` to and from a JSON file,
+so they do not need to be uploaded from the controller every time a driver is created.
+
+The structure definitions are shared by all the tags (and structure members) of that type, in the file they are
+stored once in ``data_types`` and referenced by name, loading the file links them back together.
+"""
+
+import json
+import os
+from typing import Optional
+
+from .util import StructType
+
+CACHE_VERSION = 1  # changes if the format of the file or the tag definitions change
+
+
+def save_tag_cache(path: str, key: dict, tags: dict, data_types: dict, info: dict):
+    """
+    Saves the tag definitions to a file, the file is written to a temporary file first and then replaced
+    so a failed save does not leave behind a partial file.
+
+    :param path: path of the cache file
+    :param key: identity of the controller and its project, the cache is only loaded for the same key
+    :param tags: tag definitions, ``LogixDriver.tags``
+    :param data_types: structure definitions, ``LogixDriver.data_types``
+    :param info: ``LogixDriver.info``, only the ``programs``, ``tasks`` and ``modules`` are saved
+    """
+    cache = {
+        'version': CACHE_VERSION,
+        'key': key,
+        'data_types': {name: _dump_data_type(data_type) for name, data_type in data_types.items()},
+        'tags': {name: _dump_definition(tag) for name, tag in tags.items()},
+        'info': {name: info.get(name, {}) for name in ('programs', 'tasks', 'modules')},
+    }
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def load_tag_cache(path: str, key: dict) -> Optional[dict]:
+    """
+    Loads the tag definitions from a file saved by :func:`save_tag_cache`
+
+    :return: ``{'tags': ..., 'data_types': ..., 'info': ...}`` or ``None`` if the file was not found or it was saved
+             for a different key or version
+    """
+    try:
+        with open(path, encoding='utf-8') as f:
+            cache = json.load(f)
+    except FileNotFoundError:
+        return None
+
+    if cache.get('version') != CACHE_VERSION or cache.get('key') != key:
+        return None
+
+    data_types = {name: StructType(data_type) for name, data_type in cache['data_types'].items()}
+    for data_type in data_types.values():
+        for member in data_type['internal_tags'].values():
+            _link_definition(member, data_types)
+    for tag in cache['tags'].values():
+        _link_definition(tag, data_types)
+
+    for module in cache['info']['modules'].values():
+        if 'slots' in module:  # json only has string keys
+            module['slots'] = {int(slot): value for slot, value in module['slots'].items()}
+
+    return {'tags': cache['tags'], 'data_types': data_types, 'info': cache['info']}
+
+
+def _dump_data_type(data_type: dict) -> dict:
+    return {**data_type,
+            'internal_tags': {name: _dump_definition(member) for name, member in data_type['internal_tags'].items()}}
+
+
+def _dump_definition(definition: dict) -> dict:
+    if definition['tag_type'] == 'struct':
+        return {**definition, 'data_type': definition['data_type_name']}
+    return definition
+
+
+def _link_definition(definition: dict, data_types: dict):
+    if definition['tag_type'] == 'struct':
+        definition['data_type'] = data_types[definition['data_type_name']]
@@ -29,7 +29,7 @@
 Various utility functions.
 """
 
-from typing import Tuple
+from typing import Tuple, Callable, Any
 
 
 def strip_array(tag: str) -> str:
@@ -57,3 +57,40 @@ def get_array_index(tag: str) -> Tuple[str, int]:
         idx = 0
 
     return tag, idx
+
+
+class StructType(dict):
+    """
+    A structure data type definition, a ``dict`` that also holds the objects compiled from it (like the decoder and
+    encoder).  The compiled objects are not items of the dict, so they are not compared, copied or saved with the
+    definition and they are released with it.
+    """
+    __slots__ = ('_compiled', )
+
+    def __reduce_ex__(self, protocol):
+        return self.__class__, (dict(self), )
+
+
+class DataTypeCache:
+    """
+    Builds an object from a structure data type definition the first time it is needed, like the compiled decoders
+    and encoders.  The objects are stored in the :class:`StructType` definitions (the ones uploaded by the driver), so
+    they live as long as the definition does.  For plain dicts the object is built each time.
+    """
+
+    def __init__(self, factory: Callable[[dict], Any]):
+        self._factory = factory
+
+    def __call__(self, data_type: dict):
+        try:
+            compiled = data_type._compiled
+        except AttributeError:
+            if not isinstance(data_type, StructType):
+                return self._factory(data_type)
+            compiled = data_type._compiled = {}
+
+        try:
+            return compiled[self]
+        except KeyError:
+            value = compiled[self] = self._factory(data_type)
+            return value
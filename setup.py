@@ -22,6 +22,7 @@ setup(
     packages=['pycomm3', 'pycomm3.packets'],
     package_data={'pycomm3': ['py.typed']},
     python_requires='>=3.6.1',
+    extras_require={'numpy': ['numpy>=1.17']},
     include_package_data=True,
     classifiers=[
         'Development Status :: 4 - Beta',
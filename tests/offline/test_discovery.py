@@ -0,0 +1,56 @@
+import socket
+import struct
+import threading
+
+import pytest
+
+from pycomm3 import CIPDriver
+
+
+def _identity_reply(request, name):
+    item = b''.join([
+        struct.pack('<HH', 1, 0),  # encap protocol version, socket address follows
+        b'\x00' * 16,
+        struct.pack('<HHBBHI', 1, 14, 20, 11, 0x3060, 0xC0FFEE),  # vendor, product code, revision, status, serial
+        bytes([len(name)]), name.encode(),
+        b'\x03',  # state
+    ])
+    data = struct.pack('<HHH', 1, 0x0C, len(item)) + item
+    return request[:2] + struct.pack('<H', len(data)) + request[4:24] + data
+
+
+@pytest.fixture
+def responder():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', 0))
+    requests = []
+
+    def _respond():
+        while True:
+            try:
+                request, addr = sock.recvfrom(1024)
+            except OSError:
+                return
+            requests.append(request)
+            sock.sendto(_identity_reply(request, 'Fake PLC'), addr)
+            sock.sendto(_identity_reply(request, 'Fake PLC'), addr)  # duplicate replies are ignored
+
+    thread = threading.Thread(target=_respond, daemon=True)
+    thread.start()
+    yield sock.getsockname()[1], requests
+    sock.close()
+
+
+def test_discover(responder):
+    port, requests = responder
+    devices = list(CIPDriver.discover('127.0.0.1', timeout=0.2, port=port))
+
+    assert len(devices) == 1
+    assert devices[0]['ip_address'] == '127.0.0.1'
+    assert devices[0]['product_name'] == 'Fake PLC'
+    assert devices[0]['serial_number'] == 0xC0FFEE
+    assert requests[0][:2] == b'\x63\x00' and len(requests[0]) == 24
+
+
+def test_discover_no_replies():
+    assert list(CIPDriver.discover(['127.0.0.2/31'], timeout=0.1, port=9)) == []
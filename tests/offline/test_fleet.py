@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+
+import pycomm3.fleet
+from pycomm3 import AsyncLogixDriver
+from pycomm3.fleet import FleetPoller
+from pycomm3.socket_ import AsyncLoopbackTransport
+
+from .test_tag_list import TagListPLC, DINT
+
+PATHS = ('10.20.30.100', '10.20.30.101', '10.20.30.102')
+
+
+@pytest.fixture
+def fakes(monkeypatch):
+    """
+    A fake PLC for each path, the drivers created by the poller are connected to them
+    """
+    fakes = {}
+    for i, path in enumerate(PATHS):
+        fakes[path] = TagListPLC({None: {'dint1': (1, DINT, [0]), 'array': (2, 0x2000 | DINT, [100])}}, {})
+        fakes[path].values[b'dint1'] = [i]
+
+    def _driver(path, **kwargs):
+        return AsyncLogixDriver(path, transport=lambda: AsyncLoopbackTransport(fakes[path]), **kwargs)
+
+    monkeypatch.setattr(pycomm3.fleet, 'AsyncLogixDriver', _driver)
+    return fakes
+
+
+def _poller(rate=1.0):
+    return FleetPoller({path: (['dint1', 'array{2}'], rate) for path in PATHS}, max_concurrent=2,
+                       init_info=False, lazy_tags=True)
+
+
+def _run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def test_fleet_scan(fakes):
+    async def _scan():
+        async with _poller() as fleet:
+            return await fleet.scan(), fleet.durations
+
+    results, durations = _run(_scan())
+    assert list(results) == list(durations) == list(PATHS)
+    for i, path in enumerate(PATHS):
+        result = results[path]
+        assert result and result.path == path and result.error is None
+        assert [tag.value for tag in result.tags] == [i, [0, 1]]
+
+
+def test_fleet_recovery(fakes):
+    failed = PATHS[1]
+
+    async def _scan():
+        async with _poller() as fleet:
+            await fleet.scan()
+            fakes[failed].drops = 100
+            first = await fleet.scan()
+            assert not fleet.drivers[failed].connected
+            fakes[failed].drops = 0
+            return first, await fleet.scan()
+
+    first, second = _run(_scan())
+    assert not first[failed] and first[failed].tags == [] and first[failed].error
+    assert all(first[path] for path in PATHS if path != failed)
+    assert all(second.values())
+    assert [tag.value for tag in second[failed].tags] == [1, [0, 1]]
+    assert fakes[failed].counts['symbol'] == 2  # the tags were not uploaded again after reopening
+
+
+def test_fleet_unexpected_error(fakes, monkeypatch):
+    failed = PATHS[2]
+    read = AsyncLogixDriver.read
+
+    async def _read(self, *tags, **kwargs):
+        if self._cfg['ip address'] == failed and fakes[failed].broken:
+            raise OSError('network is unreachable')
+        return await read(self, *tags, **kwargs)
+
+    monkeypatch.setattr(AsyncLogixDriver, 'read', _read)
+    fakes[failed].broken = True
+
+    async def _poll():
+        results = []
+        async with _poller(rate=0.01) as fleet:
+            async for result in fleet.poll():
+                results.append(result)
+                if result.path == failed and result.error:
+                    fakes[failed].broken = False
+                if result.path == failed and result:
+                    break
+        return results
+
+    async def _poll_with_timeout():  # a poll task that stopped would leave the poller waiting forever
+        return await asyncio.wait_for(_poll(), 5)
+
+    results = _run(_poll_with_timeout())
+    failures = [result for result in results if result.path == failed and not result]
+    assert failures and failures[0].error == 'OSError: network is unreachable' and failures[0].tags == []
+    # the controller kept being polled after the error
+    assert results[-1].path == failed and [tag.value for tag in results[-1].tags] == [2, [0, 1]]
+
+
+def test_fleet_poll(fakes):
+    async def _poll():
+        results = []
+        async with _poller(rate=0.01) as fleet:
+            async for result in fleet.poll():
+                results.append(result)
+                if len(results) == 3 * len(PATHS):
+                    break
+        return results
+
+    results = _run(_poll())
+    assert all(results)
+    for path in PATHS:
+        assert sum(result.path == path for result in results) >= 2
+
+
+def test_fleet_run(fakes):
+    results = []
+    fleet = _poller(rate=0.01)
+    fleet.run(results.append, duration=0.1)
+    assert {result.path for result in results} == set(PATHS) and all(results)
+    assert fleet.drivers == {}  # closed when done
@@ -0,0 +1,46 @@
+import socket
+import struct
+
+import pytest
+
+from pycomm3 import LogixDriver, TagConsumer
+from pycomm3.socket_ import LoopbackTransport
+
+from .test_loopback import FakePLC, CONNECTION_ID
+
+PRODUCED = {'tag_name': 'produced', 'instance_id': 3, 'tag_type': 'atomic', 'data_type': 'DINT',
+            'data_type_name': 'DINT', 'dim': 1, 'dimensions': [4, 0, 0]}
+
+
+def _frame(cid, sequence, values):
+    data = struct.pack('<H4i', sequence & 0xFFFF, *values)
+    return (struct.pack('<HHH', 2, 0x8002, 8) + cid + struct.pack('<I', sequence) +
+            struct.pack('<HH', 0x00B1, len(data)) + data)
+
+
+@pytest.fixture
+def consumer():
+    fake = FakePLC()
+    plc = LogixDriver('127.0.0.1', init_info=False, init_tags=False, transport=lambda: LoopbackTransport(fake))
+    plc._tags = {'produced': PRODUCED}
+    with plc, TagConsumer(plc, 'produced', rpi=5, port=0, local_address='127.0.0.1') as consumer:
+        yield consumer
+
+
+def test_consume_produced_tag(consumer):
+    producer = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        address = ('127.0.0.1', consumer.port)
+        producer.sendto(_frame(b'\xff\xff\xff\xff', 1, [9, 9, 9, 9]), address)  # another connection
+        producer.sendto(_frame(consumer._t_o_cid, 1, [1, 2, 3, 4]), address)
+        producer.sendto(_frame(consumer._t_o_cid, 1, [1, 2, 3, 4]), address)  # duplicate
+        producer.sendto(_frame(consumer._t_o_cid, 2, [5, 6, 7, 8]), address)
+
+        assert consumer.receive(timeout=1) == ('produced', [1, 2, 3, 4], 'DINT[4]', None)
+        assert consumer.receive(timeout=1) == ('produced', [5, 6, 7, 8], 'DINT[4]', None)
+        assert consumer.receive(timeout=0.05) is None
+    finally:
+        producer.close()
+
+    assert consumer.connected
+    assert consumer._o_t_cid == CONNECTION_ID
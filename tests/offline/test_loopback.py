@@ -0,0 +1,401 @@
+import asyncio
+import struct
+from array import array
+from collections import deque
+from itertools import count
+
+import pytest
+
+from pycomm3 import LogixDriver, AsyncLogixDriver, RequestError, CommError
+from pycomm3.packets import RequestPipeline
+from pycomm3.socket_ import LoopbackTransport, AsyncLoopbackTransport
+
+SESSION = 0x1234
+CONNECTION_ID = b'\x01\x02\x03\x04'
+
+TAGS = {
+    'dint1': {'tag_name': 'dint1', 'instance_id': 1, 'tag_type': 'atomic', 'data_type': 'DINT',
+              'data_type_name': 'DINT', 'dim': 0, 'dimensions': [0, 0, 0]},
+    'array': {'tag_name': 'array', 'instance_id': 2, 'tag_type': 'atomic', 'data_type': 'DINT',
+              'data_type_name': 'DINT', 'dim': 1, 'dimensions': [100, 0, 0]},
+    'recipe': {'tag_name': 'recipe', 'instance_id': 3, 'tag_type': 'atomic', 'data_type': 'DINT',
+               'data_type_name': 'DINT', 'dim': 1, 'dimensions': [1000, 0, 0]},
+}
+
+
+class FakePLC:
+    """
+    Responds to the requests needed to read and write DINT tags, the tag values are stored in ``values``.
+    The next ``drops`` connected requests are not answered, like after the connection was lost.
+    Every session gets its own handle, the CIP sequence counts of the connected requests on each are kept
+    in ``sequences`` and must be strictly increasing, like a target that discards duplicate requests.
+    """
+
+    def __init__(self):
+        self.values = {b'dint1': [42], b'array': list(range(100)), b'recipe': [0] * 1000}
+        self.requests = 0
+        self.drops = 0
+        self.sequences = {}
+
+    def __call__(self, msg):
+        self.requests += 1
+        command, session, context = msg[:2], struct.unpack_from('<I', msg, 4)[0], msg[12:20]
+        if command == b'\x65\x00':  # register session
+            session = SESSION + len(self.sequences)
+            self.sequences[session] = []
+            return self._frame(command, context, b'\x01\x00\x00\x00', session)
+        if command == b'\x66\x00':  # unregister session, no reply
+            return None
+        if command == b'\x70\x00' and self.drops:
+            self.drops -= 1
+            return None
+
+        address_len = struct.unpack_from('<H', msg, 34)[0]
+        data_start = 36 + address_len
+        data_len = struct.unpack_from('<H', msg, data_start + 2)[0]
+        data = msg[data_start + 4: data_start + 4 + data_len]
+        if command == b'\x6f\x00':  # send rr data, forward open/close
+            reply = bytes([data[0] | 0x80, 0, 0, 0]) + CONNECTION_ID + b'\x00' * 24
+            items = b'\x00\x00\x00\x00' + b'\xb2\x00' + struct.pack('<H', len(reply)) + reply
+        else:  # send unit data
+            sequences = self.sequences[session]
+            sequences.append(struct.unpack_from('<H', data)[0])
+            assert len(sequences) < 2 or sequences[-1] > sequences[-2], f'sequence count not increasing: {sequences}'
+            reply = data[:2] + self._cip_reply(data[2:])
+            items = (b'\xa1\x00\x04\x00' + CONNECTION_ID + b'\xb1\x00' + struct.pack('<H', len(reply)) + reply)
+        return self._frame(command, context, b'\x00\x00\x00\x00\x0a\x00\x02\x00' + items, session)
+
+    def _cip_reply(self, request):
+        service = request[0]
+        path_len = request[1] * 2
+        if service == 0x0a:  # multiple service packet
+            count = struct.unpack_from('<H', request, 6)[0]
+            offsets = list(struct.unpack_from(f'<{count}H', request, 8)) + [len(request) - 6]
+            replies = [self._cip_reply(request[6 + start: 6 + end]) for start, end in zip(offsets, offsets[1:])]
+            reply_offsets, offset = [], 2 + 2 * count
+            for reply in replies:
+                reply_offsets.append(offset)
+                offset += len(reply)
+            return (b'\x8a\x00\x00\x00' + struct.pack(f'<H{count}H', count, *reply_offsets) + b''.join(replies))
+
+        path = request[2: 2 + path_len]
+        name = path[2: 2 + path[1]]
+        values = self.values[name]
+        if service == 0x4c:  # read tag
+            elements = struct.unpack_from('<H', request, 2 + path_len)[0]
+            return b'\xcc\x00\x00\x00\xc4\x00' + struct.pack(f'<{elements}i', *values[:elements])
+        if service == 0x4d:  # write tag
+            elements = struct.unpack_from('<H', request, 4 + path_len)[0]
+            values[:elements] = struct.unpack_from(f'<{elements}i', request, 6 + path_len)
+            return b'\xcd\x00\x00\x00'
+        if service == 0x53:  # write tag fragmented
+            offset = struct.unpack_from('<i', request, 6 + path_len)[0] // 4
+            data = request[10 + path_len:]
+            values[offset:offset + len(data) // 4] = struct.unpack(f'<{len(data) // 4}i', data)
+            return b'\xd3\x00\x00\x00'
+        return bytes([service | 0x80, 0, 0x08, 0])  # service not supported
+
+    @staticmethod
+    def _frame(command, context, data, session=SESSION):
+        return command + struct.pack('<HII', len(data), session, 0) + context + b'\x00\x00\x00\x00' + data
+
+
+class CountingTransport(LoopbackTransport):
+    """
+    Counts the requests sent and the most replies waiting to be received at once (requests in flight),
+    ``in_flight`` has the sequence counts of the connected requests in flight after each one is sent
+    """
+
+    def __init__(self, responder):
+        super().__init__(responder)
+        self.sent = 0
+        self.max_in_flight = 0
+        self.in_flight = []
+        self._sequences = deque()
+
+    def send(self, msg, timeout=0):
+        sent = super().send(msg, timeout)
+        self.sent += 1
+        self.max_in_flight = max(self.max_in_flight, len(self._replies))
+        if msg[:2] == b'\x70\x00':
+            address_len = struct.unpack_from('<H', msg, 34)[0]
+            self._sequences.append(struct.unpack_from('<H', msg, 40 + address_len)[0])
+            self.in_flight.append(list(self._sequences))
+        return sent
+
+    def receive(self, timeout=0):
+        reply = super().receive(timeout)
+        if reply[:2] == b'\x70\x00':
+            self._sequences.popleft()
+        return reply
+
+
+def _driver(cls, fake, transport, **kwargs):
+    plc = cls('10.20.30.100', init_info=False, init_tags=False, transport=lambda: transport(fake), **kwargs)
+    plc.use_instance_ids = False
+    plc._tags = TAGS
+    return plc
+
+
+@pytest.mark.parametrize('kwargs', [{}, {'pipeline': 4}, {'connections': 3}, {'large_packets': False}])
+def test_loopback_read_write(kwargs):
+    fake = FakePLC()
+    with _driver(LogixDriver, fake, LoopbackTransport, **kwargs) as plc:
+        assert plc.read('dint1') == ('dint1', 42, 'DINT', None)
+        assert plc.write(('dint1', 123))
+        assert fake.values[b'dint1'] == [123]
+
+        tags = ['dint1', 'array{100}'] * 20
+        results = plc.read(*tags)
+        assert [r.value for r in results] == [123, list(range(100))] * 20
+
+
+def test_loopback_sequence():
+    fake = FakePLC()
+    with _driver(LogixDriver, fake, LoopbackTransport) as plc:
+        plc.read('dint1')
+        plc.read('dint1', 'array{10}')  # multi-service requests
+        plc.write(('dint1', 1), ('array{2}', [1, 2]))
+        plc.read('dint1', 'array{10}')
+
+    sequences, = fake.sequences.values()
+    assert sequences == list(range(sequences[0], sequences[0] + 4))
+
+
+@pytest.mark.parametrize('pipeline', [1, 4])
+def test_loopback_pipeline(pipeline):
+    fake, transports = FakePLC(), []
+    with _driver(LogixDriver, fake, lambda fake: transports.append(CountingTransport(fake)) or transports[-1],
+                 large_packets=False, pipeline=pipeline) as plc:
+        assert plc.write(('recipe{1000}', list(range(1000))))  # 9 fragments
+        assert fake.values[b'recipe'] == list(range(1000))
+        tags = ['dint1', 'array{100}'] * 20
+        assert [r.value for r in plc.read(*tags)] == [42, list(range(100))] * 20
+
+    transport, = transports
+    assert transport.max_in_flight == pipeline
+    # the requests in flight together have distinct, increasing sequence counts
+    assert max(len(sequences) for sequences in transport.in_flight) == pipeline
+    assert all(sequences == sorted(set(sequences)) for sequences in transport.in_flight)
+
+
+class TimeoutTransport(CountingTransport):
+    """
+    Fails receiving once ``timeout`` is counted down to 0, leaving the replies in flight unread
+    """
+
+    def __init__(self, responder):
+        super().__init__(responder)
+        self.timeout = None
+        self.contexts = []
+
+    def send(self, msg, timeout=0):
+        if msg[:2] == b'\x70\x00':
+            self.contexts.append(msg[12:20])
+        return super().send(msg, timeout)
+
+    def receive(self, timeout=0):
+        if self.timeout is not None:
+            self.timeout -= 1
+            if not self.timeout:
+                raise CommError('timed out')
+        return super().receive(timeout)
+
+
+@pytest.mark.parametrize('reconnect_attempts', [0, 1])
+def test_loopback_pipeline_failed(reconnect_attempts):
+    fake, transports = FakePLC(), []
+    with _driver(LogixDriver, fake, lambda fake: transports.append(TimeoutTransport(fake)) or transports[-1],
+                 large_packets=False, pipeline=4, reconnect_attempts=reconnect_attempts) as plc:
+        tags = [f'array{{{i}}}' for i in range(91, 101)]  # a request each
+        assert [r.value for r in plc.read(*tags)] == [list(range(i)) for i in range(91, 101)]
+        transports[0].timeout = 2
+        if reconnect_attempts:
+            assert [r.value for r in plc.read(*tags)] == [list(range(i)) for i in range(91, 101)]
+        else:
+            with pytest.raises(CommError):
+                plc.read(*tags)
+            assert not plc.connected
+            plc.open()
+        # the replies left in flight are not received as the replies to later requests
+        assert [r.value for r in plc.read('dint1', 'array{3}')] == [42, [0, 1, 2]]
+
+    assert len(transports) == 2
+    contexts = transports[0].contexts
+    assert len(contexts) == len(set(contexts))
+
+
+def test_pipeline_reply_sequence():
+    fake = FakePLC()
+    with _driver(LogixDriver, fake, LoopbackTransport, pipeline=2) as plc:
+        request = plc._read_build_requests(plc._parse_requested_tags(['dint1']))[0]
+        pipeline = RequestPipeline([request], 2, count())
+        (_, message), = pipeline.fill()
+        reply = bytearray(fake(message))
+        reply[44:46] = struct.pack('<H', struct.unpack_from('<H', reply, 44)[0] + 1)
+        with pytest.raises(CommError):
+            pipeline.reply(bytes(reply))
+
+
+def test_loopback_connections():
+    fake, transports = FakePLC(), []
+    with _driver(LogixDriver, fake, lambda fake: transports.append(CountingTransport(fake)) or transports[-1],
+                 large_packets=False, connections=3) as plc:
+        assert plc.write(('recipe{1000}', list(range(1000))))
+        assert fake.values[b'recipe'] == list(range(1000))
+        tags = ['dint1', 'array{100}'] * 20
+        assert [r.value for r in plc.read(*tags)] == [42, list(range(100))] * 20
+
+        assert len(transports) == 3 and len(plc._pool) == 2
+        # each connection sent more than its register session and forward open requests
+        assert all(transport.sent > 2 for transport in transports)
+    assert plc._pool == []
+
+
+def test_loopback_connections_failed():
+    fake, transports = FakePLC(), []
+    with _driver(LogixDriver, fake, lambda fake: transports.append(TimeoutTransport(fake)) or transports[-1],
+                 large_packets=False, connections=3) as plc:
+        tags = [f'array{{{i}}}' for i in range(91, 101)]  # a request each
+        assert [r.value for r in plc.read(*tags)] == [list(range(i)) for i in range(91, 101)]
+        transports[1].timeout = 2
+        with pytest.raises(CommError):
+            plc.read(*tags)
+        # every connection had replies in flight, so the whole pool is dropped with the connection
+        assert plc._pool == [] and not plc.connected
+        plc.open()
+        assert [r.value for r in plc.read(*tags)] == [list(range(i)) for i in range(91, 101)]
+        assert len(plc._pool) == 2
+
+
+def test_loopback_connections_open_failed():
+    class RefusedTransport(LoopbackTransport):
+        def connect(self, host, port):
+            raise CommError('connection refused')
+
+    fake, transports = FakePLC(), []
+    factories = iter([CountingTransport, RefusedTransport])
+    with _driver(LogixDriver, fake, lambda fake: transports.append(next(factories, CountingTransport)(fake))
+                 or transports[-1], large_packets=False, connections=3) as plc:
+        tags = [f'array{{{i}}}' for i in range(91, 101)]
+        # the pooled connection that failed to open is dropped, the requests are sent over the others
+        assert [r.value for r in plc.read(*tags)] == [list(range(i)) for i in range(91, 101)]
+        assert len(plc._pool) == 1 and transports[2].sent > 2
+        # the next read opens a new connection in its place
+        assert [r.value for r in plc.read(*tags)] == [list(range(i)) for i in range(91, 101)]
+        assert len(plc._pool) == 2 and len(transports) == 4
+
+
+@pytest.mark.parametrize('kwargs', [{}, {'large_packets': False}])
+def test_loopback_read_numpy(kwargs):
+    np = pytest.importorskip('numpy')
+    with _driver(LogixDriver, FakePLC(), LoopbackTransport, **kwargs) as plc:
+        dint1, array = plc.read('dint1', 'array{100}', as_numpy=True)
+        assert dint1.value == 42
+        assert isinstance(array.value, np.ndarray) and array.value.dtype == np.dtype('<i4')
+        assert array.value.tolist() == list(range(100))
+        assert isinstance(plc.read('array{100}', as_numpy=True).value, np.ndarray)
+
+
+def test_loopback_write_numpy():
+    np = pytest.importorskip('numpy')
+    fake = FakePLC()
+    with _driver(LogixDriver, fake, LoopbackTransport) as plc:
+        assert plc.write(('array{3}', np.array([1, 2, 3], dtype=np.uint8)))  # cast, not written as raw bytes
+        assert fake.values[b'array'][:4] == [1, 2, 3, 3]
+        assert plc.write(('array{10}', np.arange(10)))  # int64, cast since the values fit
+        assert fake.values[b'array'][:11] == list(range(10)) + [10]
+        assert plc.write(('array{3}', np.array([7, 8, 9], dtype=np.uint32)))
+        assert fake.values[b'array'][:4] == [7, 8, 9, 3]
+        for value in (np.array([1.5, 2, 3]), np.array([1, 2, 2 ** 31], dtype=np.int64),
+                      np.array([1, 2, 2 ** 32 - 1], dtype=np.uint32)):
+            with pytest.raises(RequestError):
+                plc.write(('array{3}', value))
+        assert fake.values[b'array'][:4] == [7, 8, 9, 3]
+
+
+@pytest.mark.parametrize('large_packets', [True, False])
+def test_loopback_write_buffer(large_packets):
+    fake = FakePLC()
+    with _driver(LogixDriver, fake, LoopbackTransport, large_packets=large_packets) as plc:
+        assert plc.write(('recipe{1000}', array('i', range(1000))))
+        assert fake.values[b'recipe'] == list(range(1000))
+        assert plc.write(('array{10}', memoryview(bytearray(struct.pack('<10i', *range(10, 20)))).cast('i')))
+        assert fake.values[b'array'][:10] == list(range(10, 20))
+        for value in (array('d', range(10)), bytearray(40), array('B', range(10))):  # wrong type, raw bytes to a DINT
+            with pytest.raises(RequestError):
+                plc.write(('array{10}', value))
+        assert fake.values[b'array'][:10] == list(range(10, 20))
+
+
+def test_async_loopback_read():
+    async def _read():
+        async with _driver(AsyncLogixDriver, FakePLC(), AsyncLoopbackTransport) as plc:
+            return await asyncio.gather(plc.read('dint1'), plc.read('array{10}'))
+
+    loop = asyncio.new_event_loop()
+    try:
+        dint1, array = loop.run_until_complete(_read())
+    finally:
+        loop.close()
+
+    assert dint1.value == 42
+    assert array.value == list(range(10))
+
+
+def test_async_loopback_write():
+    fake = FakePLC()
+
+    async def _write():
+        async with _driver(AsyncLogixDriver, fake, AsyncLoopbackTransport, large_packets=False) as plc:
+            # the fragmented write and the other requests take turns on the connection
+            results = await asyncio.gather(plc.write(('recipe{1000}', list(range(1000)))),
+                                           plc.write(('dint1', 7)), plc.read('array{100}'))
+            return results, await plc.read('dint1', 'recipe{100}')
+
+    loop = asyncio.new_event_loop()
+    try:
+        (recipe, dint1, array), (read_dint1, read_recipe) = loop.run_until_complete(_write())
+    finally:
+        loop.close()
+
+    assert recipe and dint1 and array.value == list(range(100))
+    assert read_dint1.value == 7 and read_recipe.value == list(range(100))
+    assert fake.values[b'recipe'] == list(range(1000))
+
+
+class SlowTransport(AsyncLoopbackTransport):
+    """
+    Waits ``delay`` seconds before receiving each reply
+    """
+    delay = 0
+
+    async def receive(self, timeout=0):
+        await asyncio.sleep(self.delay)
+        return await super().receive(timeout)
+
+
+def test_async_loopback_cancelled():
+    fake = FakePLC()
+
+    async def _read():
+        async with _driver(AsyncLogixDriver, fake, SlowTransport) as plc:
+            assert (await plc.read('dint1')).value == 42
+            SlowTransport.delay = 1
+            try:
+                with pytest.raises(asyncio.TimeoutError):
+                    await asyncio.wait_for(plc.read('dint1'), 0.05)
+            finally:
+                SlowTransport.delay = 0
+            # the reply to the cancelled read was left unread, so the connection was dropped
+            assert not plc.connected
+            await plc.open()
+            return await plc.read('array{5}')
+
+    loop = asyncio.new_event_loop()
+    try:
+        array = loop.run_until_complete(_read())
+    finally:
+        loop.close()
+
+    assert array.value == [0, 1, 2, 3, 4]
@@ -1,6 +1,13 @@
+import array
+import struct
+
 import pytest
 from pycomm3.cip_base import parse_connection_path
+from pycomm3.clx import writable_value
 from pycomm3 import RequestError
+from pycomm3.bytes_ import Pack, Unpack, CODECS, unpack_ndarray, pack_bools, unpack_bools
+from pycomm3.const import DataType, DataTypeSize
+from pycomm3.packets.responses import _parse_data
 
 _simple_path = ('192.168.1.100', b'\x01\x01\x00')
 _simple_paths = [
@@ -48,4 +55,114 @@ _bad_paths = [
 @pytest.mark.parametrize('path', _bad_paths)
 def test_bad_plc_paths(path):
     with pytest.raises(RequestError):
-        parse_connection_path(path)
\ No newline at end of file
+        parse_connection_path(path)
+
+_array_tests = [
+    ('DINT', b'\x01\x00\x00\x00\xff\xff\xff\xff', [1, -1]),
+    ('UINT', b'\x01\x00\xff\xff\x02', [1, 0xFFFF]),  # partial element is ignored
+    ('SINT', b'\x01\xff', [1, -1]),
+    ('REAL', b'\x00\x00\x80\x3f\x00\x00\x00\xc0', [1.0, -2.0]),
+    ('LINT', b'\xff' * 8, [-1]),
+]
+
+
+@pytest.mark.parametrize('datatype, data, expected', _array_tests)
+def test_unpack_array(datatype, data, expected):
+    codec = CODECS[datatype]
+    assert codec.unpack_array(memoryview(data)) == expected
+    assert codec.unpack_array(data) == [Unpack[datatype](data[i:i + DataTypeSize[datatype]])
+                                        for i in range(0, len(expected) * DataTypeSize[datatype],
+                                                       DataTypeSize[datatype])]
+
+
+@pytest.mark.parametrize('datatype, data, expected', _array_tests)
+def test_unpack_ndarray(datatype, data, expected):
+    pytest.importorskip('numpy')
+    array = unpack_ndarray(datatype, memoryview(data))
+    assert array.tolist() == expected
+    assert array.dtype.itemsize == DataTypeSize[datatype]
+
+
+def test_unpack_ndarray_dword():
+    pytest.importorskip('numpy')
+    bools = unpack_ndarray('DWORD', b'\x05\x00\x00\x80\x01\x00\x00\x00')
+    assert bools.tolist() == [True, False, True] + [False] * 28 + [True] + [True] + [False] * 31
+
+
+def _atomic_tag(data_type, value, elements):
+    return {'value': value, 'elements': elements,
+            'tag_info': {'tag_type': 'atomic', 'data_type': data_type, 'data_type_name': data_type}}
+
+
+def test_writable_ndarray_cast():
+    np = pytest.importorskip('numpy')
+    assert writable_value(_atomic_tag('DINT', np.arange(4), 3)) == struct.pack('<3i', 0, 1, 2)
+    assert writable_value(_atomic_tag('REAL', np.array([1.5, -2.25]), 2)) == struct.pack('<2f', 1.5, -2.25)
+    assert writable_value(_atomic_tag('INT', np.array([1, 255], dtype=np.uint8), 2)) == struct.pack('<2h', 1, 255)
+    for data_type, value in (('DINT', np.array([2 ** 31])), ('SINT', np.array([-129])), ('UINT', np.array([-1])),
+                             ('REAL', np.array([1e300])), ('DINT', np.array([1.5]))):
+        with pytest.raises(RequestError):
+            writable_value(_atomic_tag(data_type, value, 1))
+
+
+_string_tests = [
+    ('logix_string', 'abc\xe9', b'\x04\x00\x00\x00abc\xe9'),
+    ('string', 'abc', b'\x03\x00abc'),
+    ('short_string', '', b'\x00'),
+    ('pccc_st', 'abcd', b'\x04\x00badc'),
+    ('pccc_st', 'abc', b'\x03\x00ba\x00c'),
+    ('pccc_a', 'ab', b'ba'),
+]
+
+
+@pytest.mark.parametrize('typ, string, data', _string_tests)
+def test_strings(typ, string, data):
+    assert Pack[typ](string) == data
+    assert Unpack[typ](data) == string
+    assert Unpack[typ](memoryview(data)) == string
+
+
+@pytest.mark.parametrize('size', [0, 1, 4, 512])
+def test_bools(size):
+    data = bytes((i * 37) & 0xFF for i in range(size))
+    bools = unpack_bools(data)
+    assert bools == [bool(byte & (1 << bit)) for byte in data for bit in range(8)]
+    assert unpack_bools(memoryview(data)) == bools
+    assert pack_bools(bools) == data
+    assert pack_bools([int(b) * 2 for b in bools]) == data
+
+
+@pytest.mark.parametrize('typecode', ['b', 'B', 'h', 'i', 'q', 'd'])
+def test_pack_bools_int_arrays(typecode):
+    bools = [1] + [0] * 30 + [1]
+    assert pack_bools(array.array(typecode, bools)) == b'\x01\x00\x00\x80'
+
+
+def test_pack_bools_int_ndarray():
+    np = pytest.importorskip('numpy')
+    bools = [1] + [0] * 30 + [1]
+    for dtype in (np.int8, np.int64, np.bool_):
+        assert pack_bools(np.array(bools, dtype=dtype)) == b'\x01\x00\x00\x80'
+
+
+@pytest.mark.parametrize('datatype, value', [
+    ('BOOL', True), ('SINT', -2), ('USINT', 254), ('INT', -300), ('UINT', 65000), ('DINT', -70000),
+    ('UDINT', 0xFFFFFFFF), ('LINT', -2 ** 40), ('ULINT', 2 ** 63), ('REAL', 1.5), ('WORD', 0xABCD),
+])
+def test_codecs(datatype, value):
+    codec = CODECS[datatype]
+    assert CODECS[DataType[datatype]] is codec and codec.size == DataTypeSize[datatype]
+    data = Pack[datatype](value)
+    assert codec.pack(value) == data
+    assert codec.unpack_from(b'\x00' + data, 1) == Unpack[datatype](data) == value
+
+    buffer = bytearray(codec.size * 2)
+    codec.pack_into(buffer, codec.size, value)
+    assert buffer[codec.size:] == data
+    assert codec.unpack_array(memoryview(buffer), codec.size) == [value]
+
+
+def test_parse_data():
+    data = b'\xff\xff\x01\x00\x02\x00\x03\x00\x03abc\x04\x00\x00\x00'
+    fmt = [(None, 2), ('words', 'UINT[3]'), ('name', 'SHORT_STRING'), ('dint', 'DINT')]
+    assert _parse_data(data, fmt) == {'words': (1, 2, 3), 'name': 'abc', 'dint': 4}
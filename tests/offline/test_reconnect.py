@@ -0,0 +1,212 @@
+import asyncio
+
+import pytest
+
+from pycomm3 import LogixDriver, AsyncLogixDriver, CommError
+from pycomm3.cip_base import _reconnect_delays
+from pycomm3.socket_ import LoopbackTransport, AsyncLoopbackTransport
+
+from .test_loopback import FakePLC, TAGS
+
+
+class ReconnectPLC(FakePLC):
+    """
+    Also answers generic Get Attribute Single requests and counts the sessions registered in ``sessions``
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.sessions = 0
+
+    def __call__(self, msg):
+        if msg[:2] == b'\x65\x00':
+            self.sessions += 1
+        return super().__call__(msg)
+
+    def _cip_reply(self, request):
+        if request[0] == 0x0e:  # get attribute single
+            return b'\x8e\x00\x00\x00\x2a\x00'
+        if request[0] == 0x03:  # get attribute list, program name
+            return b'\x83\x00\x00\x00\x01\x00\x01\x00\x00\x00\x04\x00Test'
+        return super()._cip_reply(request)
+
+
+class FailingTransport(LoopbackTransport):
+    def connect(self, host, port):
+        raise CommError('connection refused')
+
+
+def _driver(cls, transport, **kwargs):
+    plc = cls('10.20.30.100', init_info=False, init_tags=False, transport=transport, **kwargs)
+    plc.use_instance_ids = False
+    plc._tags = TAGS
+    return plc
+
+
+def test_reconnect_delays():
+    assert list(_reconnect_delays(0, 0.5)) == []
+    assert list(_reconnect_delays(1, 0.5)) == [0]
+    assert list(_reconnect_delays(6, 0.5)) == [0, 0.5, 1, 2, 4, 8]
+    assert list(_reconnect_delays(5, 10)) == [0, 10, 20, 30, 30]  # limited to MAX_RECONNECT_DELAY
+
+
+def test_reconnect(monkeypatch):
+    monkeypatch.setattr('pycomm3.cip_base.time.sleep', lambda delay: None)
+    fake = ReconnectPLC()
+    with _driver(LogixDriver, lambda: LoopbackTransport(fake), reconnect_attempts=3) as plc:
+        assert plc.read('dint1').value == 42
+        fake.drops = 1
+        assert plc.read('dint1').value == 42
+        fake.drops = 1
+        tag = plc.generic_message(service=b'\x0e', class_code=b'\x01', instance=b'\x01', attribute=b'\x01')
+        assert tag.value == b'\x2a\x00'
+        assert fake.sessions == 3
+
+
+def test_reconnect_nested(monkeypatch):
+    monkeypatch.setattr('pycomm3.cip_base.time.sleep', lambda delay: None)
+    fake = ReconnectPLC()
+    with _driver(LogixDriver, lambda: LoopbackTransport(fake), reconnect_attempts=3) as plc:
+        reconnects = []
+        reconnect = plc._reconnect
+        monkeypatch.setattr(plc, '_reconnect', lambda: reconnects.append(1) or reconnect())
+
+        # get_plc_name -> generic_message, only the outer call reconnects and retries
+        fake.drops = 1
+        assert plc.get_plc_name() == 'Test'
+        assert len(reconnects) == 1 and fake.sessions == 2
+
+        fake.drops = 2
+        with pytest.raises(CommError):
+            plc.get_plc_name()
+        assert len(reconnects) == 2 and fake.sessions == 3
+
+
+def test_reconnect_disabled():
+    fake = ReconnectPLC()
+    with _driver(LogixDriver, lambda: LoopbackTransport(fake)) as plc:
+        plc.read('dint1')
+        fake.drops = 1
+        with pytest.raises(CommError):
+            plc.read('dint1')
+        assert fake.sessions == 1
+
+
+def test_reconnect_failed(monkeypatch):
+    delays = []
+    monkeypatch.setattr('pycomm3.cip_base.time.sleep', delays.append)
+    fake = ReconnectPLC()
+    transports = iter([LoopbackTransport(fake)])
+    with _driver(LogixDriver, lambda: next(transports, FailingTransport(fake)),
+                 reconnect_attempts=4, reconnect_delay=1) as plc:
+        plc.read('dint1')
+        fake.drops = 1
+        with pytest.raises(CommError, match='Failed to reconnect after 4 attempt'):
+            plc.read('dint1')
+        assert delays == [0, 1, 2, 4]
+        assert not plc._target_is_connected and plc._sock is None
+
+
+def test_reconnect_recovered(monkeypatch):
+    monkeypatch.setattr('pycomm3.cip_base.time.sleep', lambda delay: None)
+    fake = ReconnectPLC()
+    network = {'up': True}
+    with _driver(LogixDriver, lambda: (LoopbackTransport if network['up'] else FailingTransport)(fake),
+                 reconnect_attempts=2) as plc:
+        plc.read('dint1')
+        fake.drops, network['up'] = 1, False
+        with pytest.raises(CommError, match='Failed to reconnect'):
+            plc.read('dint1')
+        with pytest.raises(CommError, match='Failed to reconnect'):
+            plc.read('dint1')
+        # once the network is back the next call reconnects instead of failing without a session
+        network['up'] = True
+        assert plc.read('dint1').value == 42
+        assert fake.sessions == 2
+
+
+def test_async_reconnect_recovered(monkeypatch):
+    class AsyncFailingTransport(AsyncLoopbackTransport):
+        async def connect(self, host, port):
+            raise CommError('connection refused')
+
+    async def _sleep(delay):
+        pass
+
+    monkeypatch.setattr('pycomm3.async_.asyncio.sleep', _sleep)
+    fake = ReconnectPLC()
+    network = {'up': True}
+    plc = _driver(AsyncLogixDriver, lambda: (AsyncLoopbackTransport if network['up'] else AsyncFailingTransport)(fake),
+                  reconnect_attempts=2)
+
+    async def _read():
+        async with plc:
+            await plc.read('dint1')
+            fake.drops, network['up'] = 1, False
+            with pytest.raises(CommError, match='Failed to reconnect'):
+                await plc.read('dint1')
+            network['up'] = True
+            return await plc.read('dint1')
+
+    loop = asyncio.new_event_loop()
+    try:
+        assert loop.run_until_complete(_read()).value == 42
+    finally:
+        loop.close()
+    assert fake.sessions == 2
+
+
+def test_async_reconnect(monkeypatch):
+    fake = ReconnectPLC()
+    plc = _driver(AsyncLogixDriver, lambda: AsyncLoopbackTransport(fake), reconnect_attempts=2)
+    locked = []
+
+    async def _sleep(delay):
+        locked.append(plc._connection_lock.locked())
+
+    monkeypatch.setattr('pycomm3.async_.asyncio.sleep', _sleep)
+
+    async def _read():
+        async with plc:
+            await plc.read('dint1')
+            fake.drops = 1
+            return await asyncio.gather(plc.read('dint1'), plc.read('array{10}'))
+
+    loop = asyncio.new_event_loop()
+    try:
+        dint1, array = loop.run_until_complete(_read())
+    finally:
+        loop.close()
+
+    assert dint1.value == 42 and array.value == list(range(10))
+    assert fake.sessions == 2  # reconnected once, the other task used the new connection
+    assert locked == [True]  # the lock is held while reconnecting
+
+
+def test_async_reconnect_nested(monkeypatch):
+    fake = ReconnectPLC()
+    plc = _driver(AsyncLogixDriver, lambda: AsyncLoopbackTransport(fake), reconnect_attempts=2)
+    reconnects = []
+
+    async def _sleep(delay):
+        reconnects.append(delay)
+
+    monkeypatch.setattr('pycomm3.async_.asyncio.sleep', _sleep)
+
+    async def _plc_name():
+        async with plc:
+            fake.drops = 2
+            with pytest.raises(CommError):
+                await plc.get_plc_name()
+            # get_plc_name -> generic_message, only the outer call reconnected (once) and retried
+            assert reconnects == [0] and fake.sessions == 2
+            # the failed retry dropped the connection, the next call reconnects
+            return await plc.get_plc_name()
+
+    loop = asyncio.new_event_loop()
+    try:
+        assert loop.run_until_complete(_plc_name()) == 'Test'
+    finally:
+        loop.close()
+
+    assert reconnects == [0, 0] and fake.sessions == 3
@@ -0,0 +1,66 @@
+import socket
+import struct
+
+import pytest
+
+from pycomm3 import CommError
+from pycomm3.socket_ import Socket, Transport
+
+
+def _frame(data):
+    return b'\x70\x00' + struct.pack('<H', len(data)) + b'\x00' * 20 + data
+
+
+@pytest.fixture
+def sock_pair():
+    sock = Socket()
+    sock.sock.close()
+    sock.sock, remote = socket.socketpair()
+    yield sock, remote
+    sock.close()
+    remote.close()
+
+
+def test_receive_single_frame(sock_pair):
+    sock, remote = sock_pair
+    frame = _frame(b'\x01\x02\x03\x04')
+    remote.sendall(frame)
+    assert sock.receive() == frame
+
+
+def test_receive_back_to_back_frames(sock_pair):
+    sock, remote = sock_pair
+    frame1, frame2 = _frame(b'first reply'), _frame(b'second')
+    remote.sendall(frame1 + frame2)
+    assert sock.receive() == frame1
+    assert sock.receive() == frame2
+
+
+def test_receive_large_fragmented_frame(sock_pair):
+    sock, remote = sock_pair
+    frame = _frame(bytes(range(256)) * 16)
+    for i in range(0, len(frame), 100):
+        remote.sendall(frame[i:i + 100])
+    received = sock.receive()
+    assert received == frame
+    assert isinstance(received, bytes)
+
+
+def test_receive_closed_connection(sock_pair):
+    sock, remote = sock_pair
+    remote.sendall(_frame(b'partial')[:10])
+    remote.close()
+    with pytest.raises(CommError):
+        sock.receive()
+
+
+def test_incomplete_transport():
+    class NoClose(Transport):
+        def connect(self, host, port): ...
+
+        def send(self, msg, timeout=0): ...
+
+        def receive(self, timeout=0): ...
+
+    with pytest.raises(TypeError):
+        NoClose()
@@ -0,0 +1,155 @@
+import asyncio
+
+from pycomm3 import LogixDriver, AsyncLogixDriver
+from pycomm3.socket_ import LoopbackTransport, AsyncLoopbackTransport
+from pycomm3.tag_cache import save_tag_cache, load_tag_cache
+
+from .test_tag_list import TagListPLC, TEMPLATES, DINT, INT, STRUCT, _symbols, _driver as _tag_list_driver
+from .test_udt import OUTER, INNER
+
+KEY = {'serial': '00c0ffee', 'revision': '32.11', 'name': 'PLC', 'program_tags': False}
+
+TAGS = {
+    'dint1': {'tag_name': 'dint1', 'instance_id': 1, 'tag_type': 'atomic', 'data_type': 'DINT',
+              'data_type_name': 'DINT', 'dim': 0, 'dimensions': [0, 0, 0]},
+    'outer': {'tag_name': 'outer', 'instance_id': 2, 'tag_type': 'struct', 'data_type': OUTER,
+              'data_type_name': 'OUTER', 'template_instance_id': 0x123, 'dim': 1, 'dimensions': [5, 0, 0]},
+}
+DATA_TYPES = {'OUTER': OUTER, 'INNER': INNER, 'STRING': OUTER['internal_tags']['Name']['data_type']}
+INFO = {'programs': {'MainProgram': {'instance_id': 5, 'routines': ['MainRoutine']}}, 'tasks': {},
+        'modules': {'Local': {'slots': {1: {'types': ['I', 'O']}}}}}
+
+
+def test_save_load(tmp_path):
+    path = str(tmp_path / 'tags.json')
+    save_tag_cache(path, KEY, TAGS, DATA_TYPES, {**INFO, 'serial': KEY['serial']})
+
+    cache = load_tag_cache(path, KEY)
+    assert cache['tags'] == TAGS
+    assert cache['data_types'] == DATA_TYPES
+    assert cache['info'] == INFO
+
+    data_types = cache['data_types']
+    assert cache['tags']['outer']['data_type'] is data_types['OUTER']
+    assert data_types['OUTER']['internal_tags']['Inners']['data_type'] is data_types['INNER']
+
+    assert load_tag_cache(path, {**KEY, 'name': 'OTHER'}) is None
+    assert load_tag_cache(str(tmp_path / 'missing.json'), KEY) is None
+
+
+def test_driver_tag_cache(tmp_path):
+    path = str(tmp_path / 'tags.json')
+    plc = LogixDriver('10.20.30.100', init_info=False, init_tags=False, tag_cache=path,
+                      transport=lambda: LoopbackTransport(lambda msg: None))
+    assert not plc._load_tag_cache(None)  # no controller info
+
+    plc._info.update(serial=KEY['serial'], revision=KEY['revision'], name=KEY['name'], **INFO)
+    plc._tags, plc._data_types = TAGS, DATA_TYPES
+    plc._save_tag_cache(None)
+    assert not plc._load_tag_cache('*')  # saved without the program-scoped tags
+
+    plc._tags, plc._data_types = {}, {}
+    assert plc._load_tag_cache(None)
+    assert plc.tags == TAGS and plc.data_types == DATA_TYPES
+    assert plc.info['modules'] == INFO['modules']
+
+
+def test_driver_tag_cache_scope(tmp_path):
+    path = str(tmp_path / 'tags.json')
+    plc = LogixDriver('10.20.30.100', init_info=False, init_tags=False, tag_cache=path,
+                      transport=lambda: LoopbackTransport(lambda msg: None))
+    plc._info.update(serial=KEY['serial'], revision=KEY['revision'], name=KEY['name'], **INFO)
+    local = {**TAGS['dint1'], 'tag_name': 'Program:MainProgram.local'}
+    plc._tags, plc._data_types = {**TAGS, 'Program:MainProgram.local': local}, DATA_TYPES
+
+    plc._save_tag_cache(None)  # like refresh_tag_list() after uploading the program tags
+    assert plc._load_tag_cache(None)
+    assert plc.tags == TAGS  # only the controller-scoped tags
+
+    plc._tags = {**TAGS, 'Program:MainProgram.local': local}
+    plc._save_tag_cache('*')
+    plc._tags = {}
+    assert plc._load_tag_cache('*')
+    assert list(plc.tags) == ['dint1', 'outer', 'Program:MainProgram.local']
+
+
+def _cached_driver(fake, path, **kwargs):
+    plc = _tag_list_driver(fake, tag_cache=path, **kwargs)
+    plc._info.update(serial=KEY['serial'], revision=KEY['revision'], name=KEY['name'])
+    return plc
+
+
+def test_driver_tag_cache_checked(tmp_path):
+    path = str(tmp_path / 'tags.json')
+    fake = TagListPLC(_symbols(), dict(TEMPLATES))
+    with _cached_driver(fake, path) as plc:
+        assert not plc._use_tag_cache(None)
+        plc.get_tag_list()
+
+    fake.counts = dict.fromkeys(fake.counts, 0)
+    with _cached_driver(fake, path) as plc:
+        assert plc._use_tag_cache(None)
+        assert plc.tags['outer']['data_type'] is plc.data_types['OUTER']
+        assert fake.counts['makeup'] == 2 and fake.counts['template'] == 0  # only checked, not uploaded
+
+    # online edit, the tags are refreshed
+    fake.symbols[None]['dint2'] = (5, DINT, [0])
+    with _cached_driver(fake, path) as plc:
+        assert plc._use_tag_cache(None)
+        assert list(plc.tags) == ['dint1', 'array', 'outer', 'dint2']
+
+    # downloaded again with the same name but a different layout of INNER, the cache is not used
+    fake.templates[0x10] = ('INNER', 12, [('Value', 0, DINT, 0), ('Count', 0, INT, 4), ('Total', 0, DINT, 8)])
+    with _cached_driver(fake, path) as plc:
+        assert not plc._use_tag_cache(None)
+        assert plc.tags == {} and plc.data_types == {}
+        plc.get_tag_list()
+        assert list(plc.data_types['INNER']['internal_tags']) == ['Value', 'Count', 'Total']
+
+    with _cached_driver(fake, path) as plc:
+        assert plc._use_tag_cache(None)
+        assert plc.data_types['INNER']['template']['structure_size'] == 12
+
+
+def test_driver_tag_cache_lazy(tmp_path):
+    path = str(tmp_path / 'tags.json')
+    fake = TagListPLC(_symbols(), dict(TEMPLATES))
+    with _cached_driver(fake, path) as plc:
+        plc.get_tag_list()
+
+    fake.symbols[None]['array'] = (2, 0x2000 | DINT, [20])
+    del fake.symbols[None]['dint1']
+    with _cached_driver(fake, path, lazy_tags=True) as plc:
+        assert plc._use_tag_cache(None)
+        # the changed and removed tags are dropped, to be uploaded again when used
+        assert list(plc.tags) == ['outer']
+        assert plc.get_tag_info('array')['dimensions'] == [20, 0, 0]
+
+
+def test_async_driver_tag_cache_checked(tmp_path):
+    path = str(tmp_path / 'tags.json')
+    fake = TagListPLC(_symbols(), dict(TEMPLATES))
+
+    def _async_driver():
+        plc = AsyncLogixDriver('10.20.30.100', init_info=False, init_tags=False, tag_cache=path,
+                               transport=lambda: AsyncLoopbackTransport(fake))
+        plc._info.update(serial=KEY['serial'], revision=KEY['revision'], name=KEY['name'])
+        return plc
+
+    async def _check():
+        async with _async_driver() as plc:
+            assert not await plc._use_tag_cache(None)
+            await plc.get_tag_list()
+        async with _async_driver() as plc:
+            assert await plc._use_tag_cache(None)
+            assert list(plc.tags) == ['dint1', 'array', 'outer']
+        fake.templates[0x11] = ('OUTER', 16, [('Id', 0, DINT, 0), ('Inner', 0, STRUCT | 0x10, 8)])
+        async with _async_driver() as plc:
+            assert not await plc._use_tag_cache(None)
+            return plc.tags
+
+    loop = asyncio.new_event_loop()
+    try:
+        assert loop.run_until_complete(_check()) == {}
+    finally:
+        loop.close()
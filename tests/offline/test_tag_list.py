@@ -0,0 +1,357 @@
+import asyncio
+import struct
+
+import pytest
+
+from pycomm3 import LogixDriver, AsyncLogixDriver, CommError, RequestError
+from pycomm3.socket_ import LoopbackTransport, AsyncLoopbackTransport
+
+from .test_loopback import FakePLC
+
+DINT, INT = 0xc4, 0xc3
+STRUCT = 0x8000
+
+
+class TagListPLC(FakePLC):
+    """
+    Responds to the requests needed to upload the tag list, ``symbols`` is ``{scope: {name: (instance id, symbol type,
+    dimensions)}}`` with ``None`` for the controller scope and ``templates`` is ``{instance id: (name, size, members)}``
+    with the members as ``(name, array size or bit, type, offset)``.  Counts the requests for each kind in ``counts``,
+    template reads are split into replies of ``fragment_size`` if set.
+    """
+
+    def __init__(self, symbols, templates, page_size=2, fragment_size=None):
+        super().__init__()
+        self.symbols = symbols
+        self.templates = templates
+        self.page_size = page_size
+        self.fragment_size = fragment_size
+        self.counts = {'symbols': 0, 'symbol': 0, 'makeup': 0, 'template': 0}
+
+    def _cip_reply(self, request):
+        service = request[0]
+        path = request[2: 2 + request[1] * 2]
+        if service == 0x03 and path[0] == 0x91:  # get attribute list of a symbol, by name
+            self.counts['symbol'] += 1
+            return self._symbol_reply(path, request[2 + len(path):])
+
+        scope = None
+        if path[0] == 0x91:  # program scope symbol
+            scope = path[2: 2 + path[1]].decode()[len('Program:'):]
+            path = path[2 + path[1] + path[1] % 2:]
+
+        if path[:2] == b'\x20\x6b' and service == 0x55:
+            self.counts['symbols'] += 1
+            return self._symbols_reply(scope, struct.unpack_from('<H', path, 4)[0])
+        if path[:2] == b'\x20\x6c':
+            instance_id = struct.unpack_from('<H', path, 4)[0]
+            if service == 0x03:
+                self.counts['makeup'] += 1
+                return self._makeup_reply(instance_id)
+            if service == 0x4c:
+                self.counts['template'] += 1
+                offset, size = struct.unpack_from('<iH', request, 2 + len(path))
+                return self._template_reply(instance_id, offset, size)
+        return super()._cip_reply(request)
+
+    def _symbols_reply(self, scope, start):
+        symbols = sorted((symbol for symbol in self.symbols.get(scope, {}).items() if symbol[1][0] >= start),
+                         key=lambda symbol: symbol[1][0])
+        data = b''
+        for name, (instance_id, symbol_type, dimensions) in symbols[:self.page_size]:
+            data += struct.pack('<iH', instance_id, len(name)) + name.encode()
+            data += struct.pack('<H6I', symbol_type, 0, 0, 0x0400, *(list(dimensions) + [0, 0, 0])[:3])
+        status = 0x06 if len(symbols) > self.page_size else 0x00
+        return bytes([0xd5, 0, status, 0]) + data
+
+    def _symbol_reply(self, path, request_data):
+        names = []
+        while path:
+            names.append(path[2: 2 + path[1]].decode())
+            path = path[2 + path[1] + path[1] % 2:]
+        scope = names.pop(0)[len('Program:'):] if names[0].startswith('Program:') else None
+        try:
+            if len(names) != 1:
+                raise KeyError(names)
+            _, symbol_type, dimensions = self.symbols[scope][names[0]]
+        except KeyError:
+            return b'\x83\x00\x05\x00'  # path destination unknown
+
+        count = struct.unpack_from('<H', request_data)[0]
+        values = {2: struct.pack('<H', symbol_type), 3: b'\x00' * 4, 5: b'\x00' * 4, 6: struct.pack('<I', 0x0400),
+                  8: struct.pack('<3I', *(list(dimensions) + [0, 0, 0])[:3])}
+        attributes = struct.unpack_from(f'<{count}H', request_data, 2)
+        return b'\x83\x00\x00\x00' + struct.pack('<H', count) + b''.join(
+            struct.pack('<HH', attr, 0) + values[attr] for attr in attributes)
+
+    def _template_data(self, instance_id):
+        name, size, members = self.templates[instance_id]
+        info = b''.join(struct.pack('<HHI', array, typ, offset) for _, array, typ, offset in members)
+        names = f'{name};n\x00'.encode() + b''.join(member[0].encode() + b'\x00' for member in members)
+        return info + names
+
+    def _makeup_reply(self, instance_id):
+        name, size, members = self.templates[instance_id]
+        definition_size = (len(self._template_data(instance_id)) + 21 + 3) // 4
+        return b'\x83\x00\x00\x00' + struct.pack('<HHHIHHIHHHHHH', 4, 4, 0, definition_size, 5, 0, size,
+                                                 2, 0, len(members), 1, 0, 0x1000 + instance_id)
+
+    def _template_reply(self, instance_id, offset, size):
+        data = self._template_data(instance_id).ljust(size + offset, b'\x00')[offset:offset + size]
+        chunk = min(len(data), self.fragment_size or len(data))
+        return bytes([0xcc, 0, 0x06 if chunk < len(data) else 0x00, 0]) + data[:chunk]
+
+
+TEMPLATES = {
+    0x10: ('INNER', 8, [('Value', 0, DINT, 0), ('Count', 0, INT, 4)]),
+    0x11: ('OUTER', 12, [('Id', 0, DINT, 0), ('Inner', 0, STRUCT | 0x10, 4)]),
+}
+
+
+def _symbols():
+    return {
+        None: {
+            'dint1': (1, DINT, [0]),
+            'array': (2, 0x2000 | DINT, [10]),
+            'outer': (3, STRUCT | 0x11, [0]),
+            'Program:MainProgram': (4, 0x1068, [0]),
+        },
+        'MainProgram': {
+            'local': (1, STRUCT | 0x10, [0]),
+        },
+    }
+
+
+def _driver(fake, **kwargs):
+    plc = LogixDriver('10.20.30.100', init_info=False, init_tags=False, transport=lambda: LoopbackTransport(fake),
+                      **kwargs)
+    plc.open()
+    return plc
+
+
+@pytest.mark.parametrize('fragment_size', [None, 16])
+def test_get_tag_list(fragment_size):
+    fake = TagListPLC(_symbols(), TEMPLATES, fragment_size=fragment_size)
+    with _driver(fake) as plc:
+        tags = plc.get_tag_list('*')
+        assert [tag['tag_name'] for tag in tags] == ['dint1', 'array', 'outer', 'Program:MainProgram.local']
+        assert plc.tags['array']['dimensions'] == [10, 0, 0]
+        outer = plc.tags['outer']['data_type']
+        assert outer['name'] == 'OUTER' and outer['internal_tags']['Inner']['data_type'] is plc.data_types['INNER']
+        assert plc.tags['Program:MainProgram.local']['data_type'] is plc.data_types['INNER']
+
+
+def test_get_tag_list_batched():
+    # 100 UDTs, each with a member of one of 10 nested UDTs
+    templates = {i: (f'INNER{i}', 4, [('Value', 0, DINT, 0)]) for i in range(10)}
+    templates.update({i: (f'OUTER{i}', 8, [('Id', 0, DINT, 0), ('Inner', 0, STRUCT | i % 10, 4)])
+                      for i in range(10, 110)})
+    symbols = {None: {f'tag{i}': (i, STRUCT | i, [0]) for i in range(10, 110)}}
+    fake = TagListPLC(symbols, templates, page_size=100)
+    with _driver(fake) as plc:
+        fake.requests = 0
+        tags = plc.get_tag_list()
+        assert len(tags) == 100 and len(plc.data_types) == 110
+        assert plc.tags['tag15']['data_type']['internal_tags']['Inner']['data_type'] is plc.data_types['INNER5']
+        assert fake.counts['makeup'] == fake.counts['template'] == 110
+        assert fake.requests < 20
+
+
+def test_upload_data_types_batches():
+    # two uploads back to back, each a batch of structure makeups and a batch of templates
+    templates = {0x20: ('FIRST', 4, [('A', 0, DINT, 0)]), 0x21: ('SECOND', 4, [('B', 0, DINT, 0)]),
+                 0x22: ('THIRD', 8, [('C', 0, INT, 0), ('D', 0, DINT, 4)]), 0x23: ('FOURTH', 2, [('E', 0, INT, 0)])}
+    symbols = {None: {'first': (1, STRUCT | 0x20, [0]), 'second': (2, STRUCT | 0x21, [0])}}
+    fake = TagListPLC(symbols, templates)
+    with _driver(fake) as plc:
+        plc.get_tag_list()
+        fake.symbols[None].update({'third': (3, STRUCT | 0x22, [0]), 'fourth': (4, STRUCT | 0x23, [0])})
+        plc.refresh_tag_list()
+
+        members = {name: list(data_type['internal_tags']) for name, data_type in plc.data_types.items()}
+        assert members == {'FIRST': ['A'], 'SECOND': ['B'], 'THIRD': ['C', 'D'], 'FOURTH': ['E']}
+        assert fake.counts['makeup'] == fake.counts['template'] == 4
+
+    sequences, = fake.sequences.values()
+    assert sequences == sorted(set(sequences))
+
+
+def test_refresh_tag_list():
+    fake = TagListPLC(_symbols(), TEMPLATES)
+    with _driver(fake) as plc:
+        plc.get_tag_list()
+        tags = plc.tags
+        dint1, outer = tags['dint1'], tags['outer']
+        assert plc.refresh_tag_list() == {'added': [], 'changed': [], 'removed': []}
+
+        fake.symbols[None]['dint2'] = (5, DINT, [0])
+        fake.symbols[None]['array'] = (2, 0x2000 | DINT, [20])
+        fake.symbols[None]['inner'] = (6, STRUCT | 0x10, [0])
+        del fake.symbols[None]['dint1']
+        fake.counts = dict.fromkeys(fake.counts, 0)
+
+        changes = plc.refresh_tag_list()
+        assert changes == {'added': ['dint2', 'inner'], 'changed': ['array'], 'removed': ['dint1']}
+        assert plc.tags is tags and plc.tags['outer'] is outer and dint1 not in plc.tags.values()
+        assert plc.tags['array']['dimensions'] == [20, 0, 0]
+        assert plc.tags['inner']['data_type'] is outer['data_type']['internal_tags']['Inner']['data_type']
+        assert fake.counts['makeup'] == fake.counts['template'] == 0  # INNER was already uploaded
+
+
+def test_refresh_lazy_tags():
+    fake = TagListPLC(_symbols(), TEMPLATES)
+    plc = LogixDriver('10.20.30.100', init_info=False, lazy_tags=True, transport=lambda: LoopbackTransport(fake))
+    with plc:
+        plc.read('dint1')
+        plc.get_tag_info('outer')
+        plc.get_tag_info('Program:MainProgram.local')
+        dint1 = plc.tags['dint1']
+        assert dint1['instance_id'] is None
+
+        changes = plc.refresh_tag_list('*')
+        assert changes == {'added': ['array'], 'changed': [], 'removed': []}
+        assert plc.tags['dint1'] is dint1 and dint1['instance_id'] == 1
+        assert plc.tags['Program:MainProgram.local']['instance_id'] == 1
+
+        fake.symbols[None]['dint1'] = (1, INT, [0])
+        assert plc.refresh_tag_list() == {'added': [], 'changed': ['dint1'], 'removed': []}
+
+
+def test_async_refresh_tag_list():
+    fake = TagListPLC(_symbols(), TEMPLATES)
+
+    async def _refresh():
+        async with AsyncLogixDriver('10.20.30.100', init_info=False,
+                                    transport=lambda: AsyncLoopbackTransport(fake)) as plc:
+            fake.symbols[None]['inner'] = (6, STRUCT | 0x10, [0])
+            return plc, await plc.refresh_tag_list()
+
+    loop = asyncio.new_event_loop()
+    try:
+        plc, changes = loop.run_until_complete(_refresh())
+    finally:
+        loop.close()
+
+    assert changes == {'added': ['inner'], 'changed': [], 'removed': []}
+    assert plc.tags['inner']['data_type'] is plc.data_types['INNER']
+    assert plc.tags['outer']['data_type']['internal_tags']['Inner']['data_type'] is plc.data_types['INNER']
+
+
+def test_lazy_tags():
+    fake = TagListPLC(_symbols(), TEMPLATES)
+    plc = LogixDriver('10.20.30.100', init_info=False, lazy_tags=True, transport=lambda: LoopbackTransport(fake))
+    with plc:
+        assert plc.tags == {}
+        assert plc.read('dint1') == ('dint1', 42, 'DINT', None)
+        assert list(plc.tags) == ['dint1'] and plc.tags['dint1']['instance_id'] is None
+
+        assert plc.get_tag_info('outer.Inner.Value')['data_type'] == 'DINT'
+        assert plc.get_tag_info('Program:MainProgram.local')['data_type'] is plc.data_types['INNER']
+        assert plc.tags['outer']['data_type']['internal_tags']['Inner']['data_type'] is plc.data_types['INNER']
+
+        assert not plc.read('missing')
+        assert fake.counts['symbols'] == 0 and fake.counts['symbol'] == 4
+        assert fake.counts['makeup'] == fake.counts['template'] == 2
+
+        assert not plc.read('missing') and not plc.write(('missing', 1))  # not requested again
+        with pytest.raises(RequestError):
+            plc.get_tag_info('missing')
+        assert fake.counts['symbol'] == 4
+
+        fake.symbols[None]['missing'] = (5, DINT, [0])
+        plc.refresh_tag_list()
+        assert plc.get_tag_info('missing')['data_type'] == 'DINT'
+
+    sequences, = fake.sequences.values()  # symbol attribute batches are multiple service requests
+    assert sequences == sorted(set(sequences))
+
+
+def test_lazy_tags_reconnect(monkeypatch):
+    monkeypatch.setattr('pycomm3.cip_base.time.sleep', lambda delay: None)
+    fake = TagListPLC(_symbols(), TEMPLATES)
+    plc = LogixDriver('10.20.30.100', init_info=False, lazy_tags=True, reconnect_attempts=1,
+                      transport=lambda: LoopbackTransport(fake))
+    with plc:
+        fake.drops = 1
+        assert plc.read('dint1').value == 42
+        assert len(fake.sequences) == 2
+
+        fake.drops = 2  # the upload fails again after reconnecting
+        with pytest.raises(CommError):
+            plc.read('outer')
+        assert len(fake.sequences) == 3  # reconnected once, not again by the read
+
+
+def test_async_lazy_tags():
+    fake = TagListPLC(_symbols(), TEMPLATES)
+
+    async def _read():
+        async with AsyncLogixDriver('10.20.30.100', init_info=False, lazy_tags=True,
+                                    transport=lambda: AsyncLoopbackTransport(fake)) as plc:
+            with pytest.raises(RequestError, match='has not been uploaded yet'):
+                plc.get_tag_info('dint1')
+            tag = await plc.read('dint1')
+            missing = await plc.read('missing')
+            await plc.read('missing')
+            return plc, tag, missing
+
+    loop = asyncio.new_event_loop()
+    try:
+        plc, tag, missing = loop.run_until_complete(_read())
+    finally:
+        loop.close()
+
+    assert tag.value == 42 and not missing
+    assert plc.get_tag_info('dint1')['data_type'] == 'DINT'
+    with pytest.raises(RequestError, match="doesn't exist"):
+        plc.get_tag_info('missing')
+    assert fake.counts['symbol'] == 2
+
+
+def test_iter_tag_list():
+    fake = TagListPLC(_symbols(), TEMPLATES, page_size=1)
+    with _driver(fake) as plc:
+        tags = plc.iter_tag_list('*')
+        assert next(tags)['tag_name'] == 'dint1'
+        assert fake.counts == {'symbols': 1, 'symbol': 0, 'makeup': 0, 'template': 0}
+        assert [tag['tag_name'] for tag in tags] == ['array', 'outer', 'Program:MainProgram.local']
+        assert fake.counts['symbols'] == 5 and fake.counts['makeup'] == fake.counts['template'] == 2
+        assert plc.tags == {} and plc._cache is None
+        assert plc.data_types['OUTER']['internal_tags']['Inner']['data_type'] is plc.data_types['INNER']
+
+        expected = plc.get_tag_list('*')
+        assert list(plc.iter_tag_list('*')) == expected
+
+
+@pytest.mark.parametrize('reconnect_attempts', [0, 1])
+def test_iter_tag_list_reconnect(reconnect_attempts):
+    fake = TagListPLC(_symbols(), TEMPLATES, page_size=1)
+    with _driver(fake, reconnect_attempts=reconnect_attempts) as plc:
+        tags = plc.iter_tag_list('*')
+        assert not plc._target_is_connected  # forward open when iterated, not when created
+        assert next(tags)['tag_name'] == 'dint1'
+        fake.drops = 1
+        if reconnect_attempts:
+            assert [tag['tag_name'] for tag in tags] == ['array', 'outer', 'Program:MainProgram.local']
+            assert plc.info['programs']['MainProgram']['instance_id'] == 4
+        else:
+            with pytest.raises(CommError):
+                next(tags)
+
+
+def test_async_iter_tag_list():
+    fake = TagListPLC(_symbols(), TEMPLATES, page_size=1)
+
+    async def _iter():
+        async with AsyncLogixDriver('10.20.30.100', init_info=False, init_tags=False,
+                                    transport=lambda: AsyncLoopbackTransport(fake)) as plc:
+            return plc, [tag async for tag in plc.iter_tag_list('*')]
+
+    loop = asyncio.new_event_loop()
+    try:
+        plc, tags = loop.run_until_complete(_iter())
+    finally:
+        loop.close()
+
+    assert [tag['tag_name'] for tag in tags] == ['dint1', 'array', 'outer', 'Program:MainProgram.local']
+    assert tags[2]['data_type'] is plc.data_types['OUTER'] and plc.tags == {}
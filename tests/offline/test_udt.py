@@ -0,0 +1,163 @@
+import array
+import copy
+import gc
+import json
+import struct
+import weakref
+
+import pytest
+
+from pycomm3 import RequestError
+from pycomm3.util import StructType
+from pycomm3.clx import writable_value
+from pycomm3.packets import parse_read_reply, struct_dtype, StructView
+from pycomm3.packets.responses import struct_decoder
+
+
+def _member(data_type, offset, array=0, bit=None):
+    member = {'offset': offset, 'tag_type': 'atomic', 'data_type': data_type, 'data_type_name': data_type}
+    if isinstance(data_type, dict):
+        member.update(tag_type='struct', data_type_name=data_type['name'])
+    if bit is None:
+        member['array'] = array
+    else:
+        member['bit'] = bit
+    return member
+
+
+def _data_type(name, size, members, string=None):
+    data_type = StructType({
+        'name': name,
+        'internal_tags': members,
+        'attributes': [member for member in members if not member.startswith('ZZZZZZZZZZ')],
+        'template': {'structure_handle': 0x1234, 'structure_size': size},
+    })
+    if string:
+        data_type['string'] = string
+    return data_type
+
+
+STRING = _data_type('STRING', 12, {'LEN': _member('DINT', 0), 'DATA': _member('SINT', 4, 8)}, string=8)
+
+INNER = _data_type('INNER', 8, {
+    'ZZZZZZZZZZINNER0': _member('SINT', 0),
+    'Flag': _member('BOOL', 0, bit=2),
+    'Value': _member('INT', 2),
+    'Total': _member('REAL', 4),
+})
+
+OUTER = _data_type('OUTER', 48, {
+    'Id': _member('DINT', 0),
+    'Counts': _member('INT', 4, 2),
+    'Bools': _member('DWORD', 8, 1),
+    'Name': _member(STRING, 12),
+    'Inner': _member(INNER, 24),
+    'Inners': _member(INNER, 32, 2),
+})
+
+OUTER_DATA = b''.join((
+    struct.pack('<ihhI', 7, 1, -1, 0x80000001),
+    struct.pack('<i8s', 3, b'abc'),
+    struct.pack('<BxhfBxhfBxhf', 0b100, 10, 1.5, 0, 20, 2.5, 0b100, 30, 3.5),
+))
+
+OUTER_VALUE = {
+    'Id': 7,
+    'Counts': [1, -1],
+    'Bools': [True] + [False] * 30 + [True],
+    'Name': 'abc',
+    'Inner': {'Flag': True, 'Value': 10, 'Total': 1.5},
+    'Inners': [{'Flag': False, 'Value': 20, 'Total': 2.5}, {'Flag': True, 'Value': 30, 'Total': 3.5}],
+}
+
+TAG_INFO = {'tag_type': 'struct', 'data_type': OUTER, 'data_type_name': 'OUTER'}
+
+
+def test_decode_struct():
+    value, data_type = parse_read_reply(b'\xa0\x02\x34\x12' + OUTER_DATA, TAG_INFO, 1)
+    assert data_type == 'OUTER'
+    assert value == OUTER_VALUE
+    assert list(value) == OUTER['attributes']
+
+
+def test_decode_struct_array():
+    value, data_type = parse_read_reply(memoryview(b'\xa0\x02\x34\x12' + OUTER_DATA * 3), TAG_INFO, 3)
+    assert data_type == 'OUTER[3]'
+    assert value == [OUTER_VALUE] * 3
+
+
+def test_decode_overlapped_members():
+    data_type = _data_type('ALIAS', 4, {'Word': _member('DINT', 0), 'Low': _member('INT', 0)})
+    value, _ = parse_read_reply(b'\xa0\x02\x34\x12' + struct.pack('<i', 0x10002), {'data_type': data_type}, 1)
+    assert value == {'Word': 0x10002, 'Low': 2}
+
+
+def test_encode_struct():
+    assert writable_value({'value': OUTER_VALUE, 'elements': 1, 'tag_info': TAG_INFO}) == OUTER_DATA
+    values = [OUTER_VALUE[attr] for attr in OUTER['attributes']]
+    assert writable_value({'value': values, 'elements': 1, 'tag_info': TAG_INFO}) == OUTER_DATA
+
+
+def test_encode_struct_array():
+    assert writable_value({'value': [OUTER_VALUE] * 3, 'elements': 3, 'tag_info': TAG_INFO}) == OUTER_DATA * 3
+
+
+def test_encode_struct_invalid():
+    with pytest.raises(RequestError):
+        writable_value({'value': {**OUTER_VALUE, 'Counts': [1]}, 'elements': 1, 'tag_info': TAG_INFO})
+
+
+def test_encode_struct_bools_size(monkeypatch):
+    monkeypatch.setattr('pycomm3.clx.pack_bools', lambda bools: bytes(len(bools)))
+    with pytest.raises(RequestError):
+        writable_value({'value': OUTER_VALUE, 'elements': 1, 'tag_info': TAG_INFO})
+
+
+def test_encode_struct_int_bools():
+    value = {**OUTER_VALUE, 'Bools': array.array('q', OUTER_VALUE['Bools'])}
+    assert writable_value({'value': value, 'elements': 1, 'tag_info': TAG_INFO}) == OUTER_DATA
+
+
+def test_struct_dtype():
+    np = pytest.importorskip('numpy')
+    data_type = struct_dtype(OUTER)
+    assert data_type.itemsize == 48
+    assert struct_dtype(OUTER) is data_type
+    assert struct_dtype(dict(OUTER)) == data_type  # not cached for plain dicts
+
+    value, _ = parse_read_reply(b'\xa0\x02\x34\x12' + OUTER_DATA * 3, TAG_INFO, 3, as_numpy=True)
+    assert isinstance(value, np.ndarray) and value.dtype == data_type
+    assert value['Id'].tolist() == [7, 7, 7]
+    assert value['Inners']['Value'].tolist() == [[20, 30]] * 3
+    assert bytes(value['Name']['DATA'][0][:3]) == b'abc'
+
+    assert writable_value({'value': value, 'elements': 3, 'tag_info': TAG_INFO}) == OUTER_DATA * 3
+    with pytest.raises(RequestError):
+        writable_value({'value': value[['Id']], 'elements': 3, 'tag_info': TAG_INFO})
+
+
+def test_struct_views():
+    value, _ = parse_read_reply(b'\xa0\x02\x34\x12' + OUTER_DATA * 2, TAG_INFO, 2, lazy_structs=True)
+    assert len(value) == 2
+    view = value[1]
+    assert isinstance(view, StructView)
+    assert list(view) == OUTER['attributes'] and len(view) == len(OUTER_VALUE)
+    assert view['Id'] == 7 and view['Name'] == 'abc'
+    assert isinstance(view['Inner'], StructView) and view['Inner']['Total'] == 1.5
+    assert view['Inners'][1]['Value'] == 30
+    assert 'Inner' in view and 'Missing' not in view and view.get('Missing') is None
+    assert view.to_dict() == OUTER_VALUE
+    assert view == OUTER_VALUE
+
+
+def test_compiled_with_data_type():
+    inner = copy.deepcopy(INNER)
+    assert type(inner) is StructType and inner == INNER
+    decoder = struct_decoder(inner)
+    assert struct_decoder(inner) is decoder and struct_decoder(INNER) is not decoder
+    assert inner == INNER and json.loads(json.dumps(inner)) == json.loads(json.dumps(INNER))
+
+    released = weakref.ref(decoder)
+    del inner, decoder
+    gc.collect()
+    assert released() is None